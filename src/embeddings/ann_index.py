@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Pluggable nearest-neighbour indexes over normalized embedding matrices.
+
+All indexes answer the same question as VectorStore's exact scan - the k rows
+with the highest inner product (cosine similarity for normalized vectors) -
+and are written in plain NumPy with no native dependencies.
+
+Index types:
+    exact - brute-force scan (reference for recall)
+    ivf   - inverted file: spherical k-means partitions the vectors into
+            n_lists clusters; a query scans only the nprobe closest clusters
+    int8  - scalar quantization: an int8 copy of the matrix (1/4 of float32)
+            is scanned and the best candidates are rescored against the
+            full-precision (typically memory-mapped) vectors
+    binary - sign bits packed into 1/32 of the float32 size (1024 dims ->
+            128 bytes); Hamming distance picks a candidate pool that is
+            reranked by exact cosine
+
+An index keeps a reference to the vectors it was built over (an in-memory or
+memory-mapped matrix) and only saves its own structures, so a saved index is
+loaded against the same matrix:
+
+    index = build_index('ivf', matrix, n_lists=256)
+    index.save('data/embeddings/.../sections-verilog.ivf')
+    index = load_index('data/embeddings/.../sections-verilog.ivf', matrix)
+    rows, scores = index.search(query, k=10, nprobe=16)
+
+See benchmark_index.py for recall@k versus latency against the exact scan.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+# Rows scored per matrix product when assigning vectors to clusters (bounds memory)
+ASSIGN_CHUNK_ROWS = 65536
+
+# Rows of int8 codes widened to float32 at a time: small enough to stay in
+# cache, which keeps the quantized scan as fast as a float32 BLAS scan
+QUANTIZED_CHUNK_ROWS = 256
+
+# Packed rows XOR-ed and popcounted at a time in Hamming scans
+HAMMING_CHUNK_ROWS = 8192
+
+# Set bits per byte, for NumPy versions without np.bitwise_count (< 2.0)
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Get indices of the k highest scores, best first.
+
+    Uses argpartition (O(n)) and only sorts the k selected entries.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+def top_k_indices_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Per-row top_k_indices for a (queries, items) score matrix.
+
+    One argpartition along axis 1 for all rows, then only the k selected
+    columns of each row are sorted.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.int64)
+
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1)
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for each vector (computed in chunks)"""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK_ROWS], dtype=np.float32)
+        assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    iterations: int = 10,
+    sample_size: Optional[int] = None,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Cluster normalized vectors by cosine similarity.
+
+    Args:
+        vectors: (N, dim) normalized matrix
+        n_clusters: Number of centroids
+        iterations: Lloyd iterations
+        sample_size: Rows used for training (default: 64 per cluster)
+        seed: Random seed
+
+    Returns:
+        (n_clusters, dim) normalized float32 centroids
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), sample_size or n_clusters * 64)
+    sample_rows = np.sort(rng.choice(len(vectors), sample_size, replace=False))
+    sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+
+    centroids = sample[rng.choice(len(sample), n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = assign_to_centroids(sample, centroids)
+        counts = np.bincount(assignments, minlength=n_clusters)
+
+        # Sum members per cluster: sort by cluster, then reduce contiguous runs
+        order = np.argsort(assignments, kind='stable')
+        nonempty = np.flatnonzero(counts)
+        starts = (np.cumsum(counts) - counts)[nonempty]
+        sums = np.zeros_like(centroids)
+        sums[nonempty] = np.add.reduceat(sample[order], starts, axis=0)
+
+        # Re-seed empty clusters with random sample rows
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = sums / norms
+
+    return centroids.astype(np.float32)
+
+
+def pack_signs(matrix: np.ndarray) -> np.ndarray:
+    """
+    Pack the sign bit of each value into uint64 words.
+
+    Rows are zero-padded to a whole number of words; padding bits are zero in
+    every row and query, so they never add to a Hamming distance.
+    """
+    packed = np.packbits(matrix > 0, axis=1)
+    padding = -packed.shape[1] % 8
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def popcount_rows(words: np.ndarray) -> np.ndarray:
+    """Number of set bits in each row of a uint64 matrix"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.uint16)
+    return POPCOUNT_TABLE[words.view(np.uint8)].sum(axis=1, dtype=np.uint16)
+
+
+class VectorIndex:
+    """Base class for indexes over a normalized (N, dim) matrix"""
+
+    name = None
+
+    def __init__(self):
+        self.vectors = None
+
+    def build(self, vectors: np.ndarray) -> 'VectorIndex':
+        """Build the index over vectors (kept by reference)"""
+        self.vectors = vectors
+        return self
+
+    def search(self, query: np.ndarray, k: int, **params) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k rows most similar to a normalized query.
+
+        Returns:
+            Tuple of (row indices, scores), best first
+        """
+        raise NotImplementedError
+
+    def get_params(self) -> dict:
+        """Constructor parameters, saved in index.json"""
+        return {}
+
+    def get_arrays(self) -> Dict[str, np.ndarray]:
+        """Index structures saved as .npy files"""
+        return {}
+
+    def set_arrays(self, arrays: Dict[str, np.ndarray]):
+        """Restore structures from get_arrays()"""
+
+    def nbytes(self) -> int:
+        """Memory used by the index structures (excluding the shared vectors)"""
+        return sum(array.nbytes for array in self.get_arrays().values())
+
+    def save(self, path: str):
+        """Save index structures to a directory (vectors are not included)"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, array in self.get_arrays().items():
+            np.save(path / f"{name}.npy", array)
+        (path / 'index.json').write_text(json.dumps({
+            'type': self.name,
+            'count': len(self.vectors),
+            'params': self.get_params()
+        }, indent=2))
+
+
+class ExactIndex(VectorIndex):
+    """Brute-force scan: one matrix-vector product and argpartition"""
+
+    name = 'exact'
+
+    def search(self, query: np.ndarray, k: int, **params) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.vectors @ query
+        idx = top_k_indices(scores, k)
+        return idx, scores[idx]
+
+
+class IVFIndex(VectorIndex):
+    """Inverted file index: scan only the clusters closest to the query"""
+
+    name = 'ivf'
+
+    def __init__(self, n_lists: Optional[int] = None, nprobe: int = 8, iterations: int = 10, seed: int = 0):
+        """
+        Args:
+            n_lists: Number of clusters (default: 4 * sqrt(N))
+            nprobe: Clusters scanned per query (recall/latency trade-off)
+            iterations: k-means iterations
+            seed: Random seed for k-means
+        """
+        super().__init__()
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+
+        self.centroids = None
+        self.order = None       # Row indices grouped by cluster
+        self.offsets = None     # Cluster i owns order[offsets[i]:offsets[i + 1]]
+
+    def build(self, vectors: np.ndarray) -> 'IVFIndex':
+        self.vectors = vectors
+        if self.n_lists is None:
+            self.n_lists = int(4 * np.sqrt(len(vectors)))
+        self.n_lists = max(1, min(self.n_lists, len(vectors)))
+
+        self.centroids = spherical_kmeans(vectors, self.n_lists, self.iterations, seed=self.seed)
+        assignments = assign_to_centroids(vectors, self.centroids)
+
+        self.order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return self
+
+    def search(self, query: np.ndarray, k: int, nprobe: Optional[int] = None, **params) -> Tuple[np.ndarray, np.ndarray]:
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        lists = top_k_indices(self.centroids @ query, nprobe)
+
+        rows = np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+        rows.sort()  # Sequential access into (possibly memory-mapped) vectors
+
+        scores = np.asarray(self.vectors[rows] @ query, dtype=np.float32)
+        idx = top_k_indices(scores, k)
+        return rows[idx], scores[idx]
+
+    def get_params(self) -> dict:
+        return {'n_lists': self.n_lists, 'nprobe': self.nprobe, 'iterations': self.iterations, 'seed': self.seed}
+
+    def get_arrays(self) -> Dict[str, np.ndarray]:
+        return {'centroids': self.centroids, 'order': self.order, 'offsets': self.offsets}
+
+    def set_arrays(self, arrays: Dict[str, np.ndarray]):
+        self.centroids = arrays['centroids']
+        self.order = arrays['order']
+        self.offsets = arrays['offsets']
+
+
+class Int8Index(VectorIndex):
+    """
+    Scalar-quantized scan with full-precision rescoring of the top candidates.
+
+    The int8 codes only replace the float32 matrix in memory when that matrix
+    is memory-mapped from an export (export_embeddings.py): rescoring then
+    pages in just the candidate rows. When the vectors are loaded from the
+    database instead, the full float32 matrix stays resident next to the
+    codes (it also backs the delta merge and all-languages searches), so the
+    index saves scan bandwidth but adds ~1/4 to memory rather than saving 3/4.
+    """
+
+    name = 'int8'
+
+    def __init__(self, scale_mode: str = 'dimension', rescore: int = 100):
+        """
+        Args:
+            scale_mode: 'dimension' (scale/offset per column) or 'vector' (per row)
+            rescore: Candidates rescored with full-precision vectors (0 = int8 ranking only)
+        """
+        super().__init__()
+        if scale_mode not in ('dimension', 'vector'):
+            raise ValueError(f"Invalid scale_mode: {scale_mode}")
+        self.scale_mode = scale_mode
+        self.rescore = rescore
+
+        self.codes = None   # (N, dim) int8
+        self.scale = None   # (dim,) or (N,) float32
+        self.offset = None  # (dim,) or (N,) float32
+
+    def build(self, vectors: np.ndarray) -> 'Int8Index':
+        self.vectors = vectors
+        axis = 0 if self.scale_mode == 'dimension' else 1
+
+        # Map [min, max] onto [-127, 127]: x ~= codes * scale + offset
+        low = np.full(vectors.shape[1 - axis], np.inf, dtype=np.float32)
+        high = np.full(vectors.shape[1 - axis], -np.inf, dtype=np.float32)
+        for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+            chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK_ROWS], dtype=np.float32)
+            if axis == 0:
+                np.minimum(low, chunk.min(axis=0), out=low)
+                np.maximum(high, chunk.max(axis=0), out=high)
+            else:
+                low[start:start + len(chunk)] = chunk.min(axis=1)
+                high[start:start + len(chunk)] = chunk.max(axis=1)
+
+        self.offset = (high + low) / 2
+        self.scale = np.maximum((high - low) / 254, np.finfo(np.float32).tiny)
+
+        self.codes = np.empty(vectors.shape, dtype=np.int8)
+        for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+            rows = slice(start, start + ASSIGN_CHUNK_ROWS)
+            chunk = np.asarray(vectors[rows], dtype=np.float32)
+            if axis == 0:
+                quantized = (chunk - self.offset) / self.scale
+            else:
+                quantized = (chunk - self.offset[rows, None]) / self.scale[rows, None]
+            self.codes[rows] = np.clip(np.rint(quantized), -127, 127)
+        return self
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Inner products of the query with the dequantized vectors"""
+        if self.scale_mode == 'dimension':
+            # q . (c * s + o) = c . (q * s) + q . o
+            weights = query * self.scale
+            bias = float(query @ self.offset)
+        else:
+            # q . (c * s_i + o_i) = s_i * (c . q) + o_i * sum(q)
+            weights = query
+
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        buffer = np.empty((QUANTIZED_CHUNK_ROWS, self.codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.codes), QUANTIZED_CHUNK_ROWS):
+            codes = self.codes[start:start + QUANTIZED_CHUNK_ROWS]
+            widened = buffer[:len(codes)]
+            widened[...] = codes
+            scores[start:start + len(codes)] = widened @ weights
+
+        if self.scale_mode == 'dimension':
+            scores += bias
+        else:
+            scores = scores * self.scale + self.offset * float(query.sum())
+        return scores
+
+    def search(self, query: np.ndarray, k: int, rescore: Optional[int] = None, **params) -> Tuple[np.ndarray, np.ndarray]:
+        rescore = self.rescore if rescore is None else rescore
+        scores = self.approximate_scores(query)
+
+        if rescore <= 0:
+            idx = top_k_indices(scores, k)
+            return idx, scores[idx]
+
+        candidates = np.sort(top_k_indices(scores, max(rescore, k)))
+        exact = np.asarray(self.vectors[candidates] @ query, dtype=np.float32)
+        idx = top_k_indices(exact, k)
+        return candidates[idx], exact[idx]
+
+    def get_params(self) -> dict:
+        return {'scale_mode': self.scale_mode, 'rescore': self.rescore}
+
+    def get_arrays(self) -> Dict[str, np.ndarray]:
+        return {'codes': self.codes, 'scale': self.scale, 'offset': self.offset}
+
+    def set_arrays(self, arrays: Dict[str, np.ndarray]):
+        self.codes = arrays['codes']
+        self.scale = arrays['scale']
+        self.offset = arrays['offset']
+
+
+class BinaryIndex(VectorIndex):
+    """Hamming-distance prefilter over packed sign bits, reranked by exact cosine"""
+
+    name = 'binary'
+
+    def __init__(self, candidates: int = 200, center: bool = True):
+        """
+        Args:
+            candidates: Hamming candidates reranked at full precision (0 = Hamming ranking only)
+            center: Subtract the per-dimension mean before taking signs (balances the bits)
+        """
+        super().__init__()
+        self.candidates = candidates
+        self.center = center
+
+        self.bits = None    # (N, words) uint64 packed sign bits
+        self.mean = None    # (dim,) float32 centring vector
+
+    def build(self, vectors: np.ndarray) -> 'BinaryIndex':
+        self.vectors = vectors
+        dimension = vectors.shape[1]
+
+        self.mean = np.zeros(dimension, dtype=np.float32)
+        if self.center:
+            for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+                self.mean += np.asarray(vectors[start:start + ASSIGN_CHUNK_ROWS], dtype=np.float32).sum(axis=0)
+            self.mean /= max(len(vectors), 1)
+
+        self.bits = np.empty((len(vectors), (dimension + 63) // 64), dtype=np.uint64)
+        for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+            chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK_ROWS], dtype=np.float32)
+            self.bits[start:start + len(chunk)] = pack_signs(chunk - self.mean)
+        return self
+
+    def hamming_distances(self, query: np.ndarray) -> np.ndarray:
+        """Hamming distance from the query's sign bits to every row"""
+        query_bits = pack_signs((query - self.mean)[None, :])[0]
+        distances = np.empty(len(self.bits), dtype=np.uint16)
+        for start in range(0, len(self.bits), HAMMING_CHUNK_ROWS):
+            chunk = self.bits[start:start + HAMMING_CHUNK_ROWS]
+            distances[start:start + len(chunk)] = popcount_rows(chunk ^ query_bits)
+        return distances
+
+    def search(self, query: np.ndarray, k: int, candidates: Optional[int] = None, **params) -> Tuple[np.ndarray, np.ndarray]:
+        candidates = self.candidates if candidates is None else candidates
+        # Negated so the smallest distances rank first
+        closeness = -self.hamming_distances(query).astype(np.int32)
+
+        if candidates <= 0:
+            idx = top_k_indices(closeness, k)
+            # Hamming similarity in [-1, 1], comparable in scale to cosine
+            return idx, 1 + 2 * closeness[idx].astype(np.float32) / self.vectors.shape[1]
+
+        pool = np.sort(top_k_indices(closeness, max(candidates, k)))
+        exact = np.asarray(self.vectors[pool] @ query, dtype=np.float32)
+        idx = top_k_indices(exact, k)
+        return pool[idx], exact[idx]
+
+    def get_params(self) -> dict:
+        return {'candidates': self.candidates, 'center': self.center}
+
+    def get_arrays(self) -> Dict[str, np.ndarray]:
+        return {'bits': self.bits, 'mean': self.mean}
+
+    def set_arrays(self, arrays: Dict[str, np.ndarray]):
+        self.bits = arrays['bits']
+        self.mean = arrays['mean']
+
+
+INDEX_TYPES = {
+    ExactIndex.name: ExactIndex,
+    IVFIndex.name: IVFIndex,
+    Int8Index.name: Int8Index,
+    BinaryIndex.name: BinaryIndex,
+}
+
+
+def build_index(index_type: str, vectors: np.ndarray, **params) -> VectorIndex:
+    """Build an index of the given type over a normalized matrix"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type} (available: {', '.join(INDEX_TYPES)})")
+    return INDEX_TYPES[index_type](**params).build(vectors)
+
+
+def load_index(path: str, vectors: np.ndarray, mmap: bool = True) -> VectorIndex:
+    """
+    Load a saved index and attach it to the matrix it was built over.
+
+    Raises:
+        ValueError: If the index was built over a different number of vectors
+    """
+    path = Path(path)
+    meta = json.loads((path / 'index.json').read_text())
+    if meta['count'] != len(vectors):
+        raise ValueError(f"Index at {path} was built for {meta['count']} vectors, got {len(vectors)}")
+
+    index = INDEX_TYPES[meta['type']](**meta['params'])
+    index.vectors = vectors
+    index.set_arrays({p.stem: np.load(p, mmap_mode='r' if mmap else None) for p in path.glob('*.npy')})
+    return index
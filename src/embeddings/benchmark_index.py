@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Recall@k versus latency benchmark for approximate vector indexes.
+
+Builds an index from ann_index.py over stored embeddings (or a synthetic
+clustered set, to simulate corpora far larger than one LRM), then sweeps its
+search parameters and compares every setting against the exact scan:
+recall@k, mean/p50/p95 latency per query and speedup.
+
+Queries are stored vectors with a little Gaussian noise added, so the exact
+neighbours are meaningful without needing a model.
+
+With --batch, measures batched search instead: N queries scored with one
+matrix-matrix product (MultiLanguageMatrix.search_batch) against N
+sequential single-query searches over the same all-languages matrix.
+
+Usage:
+    python benchmark_index.py --kind sections --language systemverilog --index ivf
+    python benchmark_index.py --synthetic 200000 --index ivf --nlist 1024 --sweep nprobe=4,8,16,32,64
+    python benchmark_index.py --synthetic 200000 --index ivf --output bench-ivf.json
+    python benchmark_index.py --index int8 --scale-mode vector --sweep rescore=0,50,100
+    python benchmark_index.py --kind sections --index binary --sweep candidates=100,200,500
+    python benchmark_index.py --synthetic 100000 --batch 1,8,32,128
+"""
+
+import argparse
+import itertools
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ann_index import INDEX_TYPES, ExactIndex, VectorIndex, build_index
+from vector_store import EMBEDDING_TABLES, EmbeddingMatrix, MultiLanguageMatrix, normalize_rows
+
+
+# Parameters swept when --sweep is not given
+DEFAULT_SWEEPS = {
+    'exact': {},
+    'ivf': {'nprobe': [1, 2, 4, 8, 16, 32, 64]},
+    'int8': {'rescore': [0, 20, 50, 100, 200]},
+    'binary': {'candidates': [0, 50, 100, 200, 500, 1000]},
+}
+
+
+def synthetic_vectors(count: int, dimension: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Normalized vectors scattered around random cluster centres (embedding-like structure)"""
+    rng = np.random.default_rng(seed)
+    centres = normalize_rows(rng.standard_normal((clusters, dimension)).astype(np.float32))
+    vectors = centres[rng.integers(0, clusters, count)]
+    vectors += rng.standard_normal((count, dimension)).astype(np.float32) * (1.5 / np.sqrt(dimension))
+    return normalize_rows(vectors)
+
+
+def load_matrices(db_path: str, model_name: str, kind: str, language: Optional[str]) -> Dict[str, EmbeddingMatrix]:
+    """Stored embeddings per language (one language, or all of them)"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        table, _ = EMBEDDING_TABLES[kind]
+        languages = [language] if language else [row[0] for row in conn.execute(
+            f"SELECT DISTINCT language FROM {table} WHERE embedding_model = ?", (model_name,))]
+        matrices = {lang: EmbeddingMatrix.from_db(conn, kind, lang, model_name) for lang in languages}
+    finally:
+        conn.close()
+
+    matrices = {lang: m for lang, m in matrices.items() if len(m)}
+    if not matrices:
+        raise ValueError(f"No {kind} embeddings for model {model_name}")
+    return matrices
+
+
+def load_vectors(db_path: str, model_name: str, kind: str, language: Optional[str]) -> np.ndarray:
+    """Stored embeddings for one language, or all languages stacked"""
+    return np.vstack([m.matrix for m in load_matrices(db_path, model_name, kind, language).values()])
+
+
+def synthetic_languages(vectors: np.ndarray, count: int = 3) -> MultiLanguageMatrix:
+    """Split synthetic vectors into equal pseudo-languages"""
+    bounds = np.linspace(0, len(vectors), count + 1).astype(int)
+    return MultiLanguageMatrix.from_matrices({
+        f"lang{i}": EmbeddingMatrix(np.arange(bounds[i], bounds[i + 1]), vectors[bounds[i]:bounds[i + 1]])
+        for i in range(count)
+    })
+
+
+def make_queries(vectors: np.ndarray, count: int, noise: float = 0.3, seed: int = 1) -> np.ndarray:
+    """Random stored vectors plus noise of roughly the given norm"""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), min(count, len(vectors)), replace=False)
+    queries = np.asarray(vectors[rows], dtype=np.float32).copy()
+    queries += rng.standard_normal(queries.shape).astype(np.float32) * (noise / np.sqrt(vectors.shape[1]))
+    return normalize_rows(queries)
+
+
+def time_searches(index: VectorIndex, queries: np.ndarray, k: int, params: dict):
+    """
+    Run each query separately.
+
+    Returns:
+        Tuple of (list of result row arrays, per-query latencies in ms)
+    """
+    results = []
+    latencies = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        rows, _ = index.search(query, k, **params)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        results.append(rows)
+    return results, latencies
+
+
+def recall_at_k(truth: List[np.ndarray], found: List[np.ndarray], k: int) -> float:
+    """Mean fraction of the exact top-k that the index returned"""
+    hits = [len(np.intersect1d(t[:k], f[:k])) / min(k, len(t)) for t, f in zip(truth, found) if len(t)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def latency_summary(latencies: np.ndarray) -> dict:
+    """Mean, median and p95 latency in ms"""
+    return {
+        'mean_ms': round(float(latencies.mean()), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 4),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 4),
+    }
+
+
+def parse_sweep(spec: Optional[str], index_type: str) -> Dict[str, list]:
+    """Parse 'name=v1,v2;name2=v3' into a parameter grid"""
+    if not spec:
+        return DEFAULT_SWEEPS.get(index_type, {})
+
+    grid = {}
+    for part in spec.split(';'):
+        name, values = part.split('=', 1)
+        grid[name.strip()] = [int(v) if v.strip().lstrip('-').isdigit() else float(v) for v in values.split(',')]
+    return grid
+
+
+def run_benchmark(
+    vectors: np.ndarray,
+    index_type: str,
+    index_params: dict,
+    sweep: Dict[str, list],
+    k: int = 10,
+    num_queries: int = 200
+) -> dict:
+    """
+    Compare an index against the exact scan.
+
+    Returns:
+        Report dict with build time, index size and one entry per sweep setting
+    """
+    queries = make_queries(vectors, num_queries)
+    print(f"Vectors: {len(vectors)} x {vectors.shape[1]}, queries: {len(queries)}, k={k}", file=sys.stderr)
+
+    exact = ExactIndex().build(vectors)
+    truth, exact_latencies = time_searches(exact, queries, k, {})
+    exact_summary = latency_summary(exact_latencies)
+    print(f"  exact: {exact_summary['mean_ms']:.3f} ms/query", file=sys.stderr)
+
+    build_start = time.perf_counter()
+    index = build_index(index_type, vectors, **index_params)
+    build_s = time.perf_counter() - build_start
+    print(f"  {index_type} built in {build_s:.2f}s ({index.nbytes() / 1024 / 1024:.1f} MB)", file=sys.stderr)
+
+    names = list(sweep)
+    settings = [dict(zip(names, values)) for values in itertools.product(*sweep.values())] or [{}]
+
+    runs = []
+    for params in settings:
+        found, latencies = time_searches(index, queries, k, params)
+        summary = latency_summary(latencies)
+        run = {
+            'params': params,
+            'recall_at_k': round(recall_at_k(truth, found, k), 4),
+            **summary,
+            'speedup': round(exact_summary['mean_ms'] / summary['mean_ms'], 2) if summary['mean_ms'] else None
+        }
+        runs.append(run)
+        print(f"  {params}: recall@{k} {run['recall_at_k']:.3f}, {summary['mean_ms']:.3f} ms "
+              f"(p95 {summary['p95_ms']:.3f}), {run['speedup']}x", file=sys.stderr)
+
+    return {
+        'vectors': len(vectors),
+        'dimension': int(vectors.shape[1]),
+        'k': k,
+        'queries': len(queries),
+        'index': index_type,
+        'index_params': index.get_params(),
+        'build_s': round(build_s, 3),
+        'index_bytes': int(index.nbytes()),
+        'vector_bytes': int(vectors.nbytes),
+        'memory_ratio': round(vectors.nbytes / index.nbytes(), 2) if index.nbytes() else None,
+        'exact': exact_summary,
+        'runs': runs
+    }
+
+
+def run_batch_benchmark(multi: MultiLanguageMatrix, batch_sizes: List[int], k: int = 10, repeats: int = 5) -> dict:
+    """
+    Compare one batched search of N queries with N sequential searches.
+
+    Both sides search all languages and return the merged top-k; the best of
+    `repeats` runs is reported for each.
+
+    Returns:
+        Report dict with one entry per batch size
+    """
+    print(f"Vectors: {len(multi)} x {multi.matrix.shape[1]} in {len(multi.languages)} languages, k={k}",
+          file=sys.stderr)
+
+    runs = []
+    for size in batch_sizes:
+        queries = make_queries(multi.matrix, size, seed=size)
+
+        sequential_s = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            sequential = [multi.search(query, k)['merged'] for query in queries]
+            sequential_s = min(sequential_s, time.perf_counter() - start)
+
+        batch_s = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            batched = multi.search_batch(queries, [k] * len(queries), [None] * len(queries))
+            batch_s = min(batch_s, time.perf_counter() - start)
+
+        agreement = float(np.mean([
+            len({hit[1] for hit in a} & {hit[1] for hit in b}) / max(len(a), 1)
+            for a, b in zip(sequential, batched)
+        ]))
+        run = {
+            'queries': len(queries),
+            'sequential_ms': round(sequential_s * 1000, 3),
+            'batch_ms': round(batch_s * 1000, 3),
+            'sequential_qps': round(len(queries) / sequential_s, 1),
+            'batch_qps': round(len(queries) / batch_s, 1),
+            'speedup': round(sequential_s / batch_s, 2),
+            'agreement': round(agreement, 4)
+        }
+        runs.append(run)
+        print(f"  N={run['queries']}: sequential {run['sequential_ms']:.2f} ms ({run['sequential_qps']} q/s), "
+              f"batch {run['batch_ms']:.2f} ms ({run['batch_qps']} q/s), {run['speedup']}x", file=sys.stderr)
+
+    return {
+        'vectors': len(multi),
+        'dimension': int(multi.matrix.shape[1]),
+        'languages': multi.languages,
+        'k': k,
+        'runs': runs
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark recall@k versus latency of approximate vector indexes'
+    )
+    parser.add_argument(
+        '--db',
+        default='data/hdl-lrm.db',
+        help='Path to SQLite database'
+    )
+    parser.add_argument(
+        '--model',
+        default='Qwen/Qwen3-Embedding-0.6B',
+        help='Embedding model'
+    )
+    parser.add_argument(
+        '--kind',
+        choices=list(EMBEDDING_TABLES),
+        default='sections',
+        help='Embeddings to index (default: sections)'
+    )
+    parser.add_argument(
+        '--language',
+        default=None,
+        help='Language to index (default: all stacked)'
+    )
+    parser.add_argument(
+        '--synthetic',
+        type=int,
+        default=None,
+        help='Benchmark N synthetic clustered vectors instead of the database'
+    )
+    parser.add_argument(
+        '--dimension',
+        type=int,
+        default=1024,
+        help='Dimension of synthetic vectors (default: 1024)'
+    )
+    parser.add_argument(
+        '--index',
+        choices=list(INDEX_TYPES),
+        default='ivf',
+        help='Index type (default: ivf)'
+    )
+    parser.add_argument(
+        '--nlist',
+        type=int,
+        default=None,
+        help='IVF clusters (default: 4 * sqrt(N))'
+    )
+    parser.add_argument(
+        '--scale-mode',
+        choices=['dimension', 'vector'],
+        default='dimension',
+        help='int8 quantization scale/offset per dimension or per vector (default: dimension)'
+    )
+    parser.add_argument(
+        '--sweep',
+        default=None,
+        help="Search parameters to sweep, e.g. 'nprobe=1,4,16' (default: per index type)"
+    )
+    parser.add_argument(
+        '--k',
+        type=int,
+        default=10,
+        help='Results per query (default: 10)'
+    )
+    parser.add_argument(
+        '--queries',
+        type=int,
+        default=200,
+        help='Number of queries (default: 200)'
+    )
+    parser.add_argument(
+        '--batch',
+        default=None,
+        help="Benchmark batched against sequential search for these batch sizes, e.g. '1,8,32,128'"
+    )
+    parser.add_argument(
+        '--output',
+        default=None,
+        help='Write the JSON report to this file (default: stdout)'
+    )
+
+    args = parser.parse_args()
+
+    if not args.synthetic and not Path(args.db).exists():
+        print(f"Error: Database not found at {args.db}", file=sys.stderr)
+        return 1
+
+    if args.batch:
+        batch_sizes = [int(size) for size in args.batch.split(',')]
+        if args.synthetic:
+            multi = synthetic_languages(synthetic_vectors(args.synthetic, args.dimension))
+        else:
+            multi = MultiLanguageMatrix.from_matrices(load_matrices(args.db, args.model, args.kind, args.language))
+        report = run_batch_benchmark(multi, batch_sizes, k=args.k)
+    else:
+        if args.synthetic:
+            vectors = synthetic_vectors(args.synthetic, args.dimension)
+        else:
+            vectors = load_vectors(args.db, args.model, args.kind, args.language)
+        report = run_index_benchmark(args, vectors)
+
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(report_json)
+        print(f"✓ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(report_json)
+    return 0
+
+
+def run_index_benchmark(args: argparse.Namespace, vectors: np.ndarray) -> dict:
+    """Index benchmark with parameters from the command line"""
+    index_params = {}
+    if args.index == 'ivf' and args.nlist:
+        index_params['n_lists'] = args.nlist
+    if args.index == 'int8':
+        index_params['scale_mode'] = args.scale_mode
+    return run_benchmark(vectors, args.index, index_params, parse_sweep(args.sweep, args.index),
+                         k=args.k, num_queries=args.queries)
+
+
+if __name__ == '__main__':
+    exit(main())
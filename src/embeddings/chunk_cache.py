@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Persistent chunk-embedding cache for Athens HDL MCP.
+
+Stores embeddings keyed by a hash of (model, inference precision, chunk
+text) in a standalone SQLite file, so identical chunks are only ever encoded
+once - across languages, sections and generate_embeddings.py runs - and
+embeddings computed at different precisions (e.g. float32 and bfloat16
+autocast) never end up mixed in one index. The cache lives outside
+the main database to keep the release artifact small.
+
+Usage:
+    python generate_embeddings.py --chunk-cache data/chunk-cache.db
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+def chunk_hash(model_name: str, text: str, precision: str = 'float32') -> str:
+    """
+    Compute the cache key for a chunk.
+
+    Args:
+        model_name: Embedding model name (embeddings differ between models)
+        text: Chunk text exactly as it is encoded
+        precision: Inference precision, e.g. 'float32' or 'bfloat16-autocast'
+            (embeddings differ slightly between precisions)
+
+    Returns:
+        SHA256 hex digest of model, precision and text
+    """
+    return hashlib.sha256(f"{model_name}\0{precision}\0{text}".encode('utf-8')).hexdigest()
+
+
+class ChunkEmbeddingCache:
+    """SQLite-backed store of chunk embeddings as raw float32 bytes"""
+
+    def __init__(self, cache_path: str):
+        self.cache_path = Path(cache_path)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.cache_path))
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunk_embeddings (
+                chunk_hash TEXT PRIMARY KEY,
+                embedding_model TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at INTEGER NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up cached embeddings.
+
+        Args:
+            hashes: Chunk hashes from chunk_hash()
+
+        Returns:
+            Dict mapping each found hash to its float32 embedding
+        """
+        hashes = list(hashes)
+        found = {}
+
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f"SELECT chunk_hash, embedding FROM chunk_embeddings WHERE chunk_hash IN ({placeholders})",
+                batch
+            ).fetchall()
+            for h, blob in rows:
+                found[h] = np.frombuffer(blob, dtype=np.float32)
+
+        return found
+
+    def put_many(self, model_name: str, items: List[Tuple[str, np.ndarray]]):
+        """
+        Store embeddings for chunks.
+
+        Args:
+            model_name: Embedding model name
+            items: List of (chunk_hash, embedding) pairs
+        """
+        now = int(time.time())
+        self.conn.executemany("""
+            INSERT OR REPLACE INTO chunk_embeddings
+            (chunk_hash, embedding_model, dimension, embedding, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            (h, model_name, len(emb), np.asarray(emb, dtype=np.float32).tobytes(), now)
+            for h, emb in items
+        ])
+        self.conn.commit()
+
+    def count(self) -> int:
+        """Number of cached chunk embeddings"""
+        return self.conn.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()[0]
+
+    def close(self):
+        """Close the cache database"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
@@ -14,8 +14,15 @@ Usage:
 
 import argparse
 import sqlite3
+import sys
 from pathlib import Path
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.index_generation import bump_generation
+from utils.index_manifest import write_index_manifest
+
 
 def clear_embeddings(db_path: str, model_name: str = None, language: str = None, clear_all: bool = False):
     """
@@ -89,7 +96,9 @@ def clear_embeddings(db_path: str, model_name: str = None, language: str = None,
             (model_name,)
         )
 
+    bump_generation(conn)
     conn.commit()
+    write_index_manifest(conn, db_path, 'clear_embeddings.py')
 
     # Verify deletion
     cursor.execute("SELECT COUNT(*) FROM section_embeddings")
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Python client for the Athens HDL MCP embedding server.
+
+Lets scripts reuse the already-warm embedding server instead of loading their
+own copy of the model:
+- Persistent keep-alive HTTP connections (pooled, thread-safe)
+- Automatic client-side batching: concurrent encode() calls are coalesced
+  into a single /encode_batch request
+- Binary float32 transport when the server supports it, JSON otherwise
+- Bounded retries with exponential backoff
+- Sync (EmbeddingClient) and async (AsyncEmbeddingClient) APIs
+- Optional fallback to in-process encoding when the server is unreachable
+  (request errors reported by the server are raised, not papered over)
+
+Only the standard library and numpy are required unless the in-process
+fallback is used.
+
+Usage:
+    from client import EmbeddingClient
+
+    with EmbeddingClient(port=8765, fallback=True) as client:
+        vector = client.encode("blocking vs non-blocking assignments")
+        matrix = client.encode_many(["always block", "generate loop"])
+        hits = client.search_batch(["always block", {"query": "entity", "language": "vhdl"}])
+"""
+
+import asyncio
+import http.client
+import json
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Union
+
+import numpy as np
+
+
+class EmbeddingServerError(Exception):
+    """Raised when the embedding server cannot produce embeddings"""
+
+
+class EmbeddingServerUnavailable(EmbeddingServerError):
+    """Raised when the embedding server cannot be reached or stays unavailable after all retries"""
+
+
+# Errors worth retrying besides connection problems: rate limiting and server/proxy
+# unavailability. A 500 is usually a deterministic error in the request and is not retried.
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+class EmbeddingClient:
+    """Thread-safe, batching client for the embedding server"""
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 8765,
+        model_name: str = 'Qwen/Qwen3-Embedding-0.6B',
+        pool_size: int = 4,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff: float = 0.2,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        binary: bool = True,
+        fallback: bool = False
+    ):
+        """
+        Args:
+            host: Embedding server host
+            port: Embedding server port
+            model_name: Model used by the in-process fallback
+            pool_size: Maximum number of idle keep-alive connections kept
+            timeout: Socket timeout per request (seconds)
+            max_retries: Retries after the first failed attempt
+            backoff: Base delay for exponential backoff (seconds)
+            max_batch_size: Most queries coalesced into one request
+            max_wait_ms: How long the batcher waits for more queries
+            binary: Request raw float32 responses when the server supports them
+            fallback: Encode in-process if the server stays unreachable
+        """
+        self.host = host
+        self.port = port
+        self.model_name = model_name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.binary = binary
+        self.fallback = fallback
+
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._pending = queue.Queue()
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
+        self._closed = False
+        self._local_model = None
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+
+    def encode(self, text: str) -> np.ndarray:
+        """Encode one query (coalesced with concurrent calls into batches)"""
+        return self.submit(text).result()
+
+    def submit(self, text: str) -> Future:
+        """Queue one query for batched encoding; resolves to its embedding"""
+        if self._closed:
+            raise EmbeddingServerError('Client is closed')
+
+        self._ensure_batcher()
+        future = Future()
+        self._pending.put((text, future))
+        return future
+
+    def encode_many(self, texts: List[str]) -> np.ndarray:
+        """Encode a list of queries directly (one request per max_batch_size chunk)"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        parts = [self._encode_batch(texts[i:i + self.max_batch_size])
+                 for i in range(0, len(texts), self.max_batch_size)]
+        return np.vstack(parts)
+
+    def health(self) -> dict:
+        """Get the server's /health response"""
+        status, headers, body = self._request('GET', '/health')
+        return json.loads(body)
+
+    def search_batch(
+        self,
+        queries: List[Union[str, dict]],
+        kind: str = 'sections',
+        language: Union[str, List[str]] = 'all',
+        max_results: int = 10
+    ) -> List[dict]:
+        """
+        Run several searches in one /search_batch request (server started with --db).
+
+        Args:
+            queries: Query strings, or dicts with "query" and optional "language"/"max_results"
+            kind: 'sections', 'code' or 'tables'
+            language: Default language(s) for queries that do not set one ('all' = every language)
+            max_results: Default results per query
+
+        Returns:
+            One {"query", "language", "results"} dict per query, in request order
+        """
+        body = json.dumps({
+            'queries': queries,
+            'kind': kind,
+            'language': language,
+            'max_results': max_results
+        }).encode('utf-8')
+        status, headers, data = self._request('POST', '/search_batch', body, {'Content-Type': 'application/json'})
+
+        result = json.loads(data)
+        if 'error' in result:
+            raise EmbeddingServerError(f"Embedding server error: {result['error']}")
+        return result['results']
+
+    def close(self):
+        """Stop the batcher and close pooled connections"""
+        self._closed = True
+        if self._batcher:
+            self._pending.put(None)
+            self._batcher.join(timeout=self.timeout)
+            self._batcher = None
+
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self) -> 'EmbeddingClient':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------------------------------------------------------
+    # Batching
+    # -------------------------------------------------------------------------
+
+    def _ensure_batcher(self):
+        with self._batcher_lock:
+            if self._batcher is None:
+                self._batcher = threading.Thread(target=self._batch_loop, daemon=True)
+                self._batcher.start()
+
+    def _batch_loop(self):
+        """Collect queued queries for up to max_wait_ms and send them together"""
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)  # Let the outer loop see the shutdown
+                    break
+                batch.append(item)
+
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = self._encode_batch(texts)
+                for (_, future), embedding in zip(batch, embeddings):
+                    future.set_result(embedding)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    # -------------------------------------------------------------------------
+    # Transport
+    # -------------------------------------------------------------------------
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts via the server, falling back to in-process encoding if enabled.
+
+        Only an unreachable or unavailable server triggers the fallback; errors
+        the server reports for the request itself are raised.
+        """
+        try:
+            return self._encode_remote(texts)
+        except EmbeddingServerUnavailable:
+            if not self.fallback:
+                raise
+            return self._encode_local(texts)
+
+    def _encode_remote(self, texts: List[str]) -> np.ndarray:
+        headers = {'Content-Type': 'application/json'}
+        if self.binary:
+            headers['Accept'] = 'application/octet-stream, application/json'
+
+        status, response_headers, body = self._request(
+            'POST', '/encode_batch', json.dumps({'queries': texts}).encode('utf-8'), headers)
+
+        if response_headers.get('content-type', '').startswith('application/octet-stream'):
+            dimension = int(response_headers['x-embedding-dimension'])
+            return np.frombuffer(body, dtype='<f4').reshape(-1, dimension)
+
+        result = json.loads(body)
+        if 'error' in result:
+            raise EmbeddingServerError(f"Embedding server error: {result['error']}")
+        return np.asarray(result['embeddings'], dtype=np.float32)
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None, headers: Optional[dict] = None):
+        """
+        Send a request over a pooled keep-alive connection with bounded retries.
+
+        Returns:
+            Tuple of (status, lower-cased headers, body bytes)
+        """
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Exponential backoff with jitter
+                time.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random()))
+
+            conn = self._get_connection()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+                response_headers = {k.lower(): v for k, v in response.getheaders()}
+            except (OSError, http.client.HTTPException) as e:
+                # Stale keep-alive socket or server down - drop the connection and retry
+                conn.close()
+                last_error = e
+                continue
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release_connection(conn)
+
+            if response.status in RETRYABLE_STATUS:
+                last_error = EmbeddingServerError(f"HTTP {response.status}")
+                continue
+            if response.status >= 400:
+                raise EmbeddingServerError(f"Embedding server returned error: HTTP {response.status}: "
+                                           f"{data[:200].decode('utf-8', 'replace')}")
+
+            return response.status, response_headers, data
+
+        raise EmbeddingServerUnavailable(
+            f"Embedding server at {self.host}:{self.port} unavailable after "
+            f"{self.max_retries + 1} attempts: {last_error}")
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _release_connection(self, conn: http.client.HTTPConnection):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    # -------------------------------------------------------------------------
+    # In-process fallback
+    # -------------------------------------------------------------------------
+
+    def _encode_local(self, texts: List[str]) -> np.ndarray:
+        """Encode in this process (loads the model on first use)"""
+        if self._local_model is None:
+            # Imported lazily: pulls in torch and sentence-transformers
+            from encode_query import get_model
+            self._local_model = get_model(self.model_name)
+
+        from utils.gpu_utils import autocast_context
+        import torch
+
+        model = self._local_model
+        with torch.no_grad(), autocast_context(str(model.device.type), model.inference_dtype):
+            embeddings = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True,
+                                      show_progress_bar=False)
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class AsyncEmbeddingClient:
+    """asyncio wrapper around EmbeddingClient (shares its pool and batcher)"""
+
+    def __init__(self, **kwargs):
+        """Accepts the same keyword arguments as EmbeddingClient"""
+        self._client = EmbeddingClient(**kwargs)
+
+    async def encode(self, text: str) -> np.ndarray:
+        """Encode one query; concurrent awaits are coalesced into batches"""
+        return await asyncio.wrap_future(self._client.submit(text))
+
+    async def encode_many(self, texts: List[str]) -> np.ndarray:
+        """Encode a list of queries without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._client.encode_many, texts)
+
+    async def health(self) -> dict:
+        """Get the server's /health response"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._client.health)
+
+    async def search_batch(self, queries: List[Union[str, dict]], **kwargs) -> List[dict]:
+        """Run several searches in one request (see EmbeddingClient.search_batch)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self._client.search_batch(queries, **kwargs))
+
+    async def close(self):
+        """Stop the batcher and close pooled connections"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._client.close)
+
+    async def __aenter__(self) -> 'AsyncEmbeddingClient':
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
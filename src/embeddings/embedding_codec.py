@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Binary embedding encoding for the HDL LRM database.
+
+Embeddings are stored in the embedding_blob column as a small header followed
+by the raw little-endian vector:
+
+    offset  size  field
+    0       2     magic b'EV'
+    2       1     format version (1)
+    3       1     dtype code (1 = float32, 2 = float16)
+    4       4     dimension (uint32, little-endian)
+    8       ...   dimension * itemsize bytes of vector data
+
+The 8-byte header keeps the payload aligned, so decode_embedding() is a
+zero-copy np.frombuffer() view. The legacy embedding_json column is still
+read and written during the transition (see migrate_embeddings.py).
+"""
+
+import json
+import sqlite3
+import struct
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+
+MAGIC = b'EV'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<2sBBI')
+HEADER_SIZE = HEADER.size
+
+# dtype code stored in the header -> little-endian numpy dtype
+DTYPES = {
+    1: np.dtype('<f4'),
+    2: np.dtype('<f2'),
+}
+DTYPE_CODES = {'float32': 1, 'float16': 2}
+
+# Storage formats accepted by writers: binary only, legacy JSON only, or both
+STORAGE_FORMATS = ('blob', 'json', 'both')
+
+
+def encode_embedding(embedding: Union[Sequence[float], np.ndarray], dtype: str = 'float32') -> bytes:
+    """
+    Encode an embedding as a header plus raw little-endian vector.
+
+    Args:
+        embedding: 1-D vector
+        dtype: 'float32' or 'float16'
+
+    Returns:
+        Bytes for the embedding_blob column
+    """
+    code = DTYPE_CODES[dtype]
+    vector = np.asarray(embedding, dtype=DTYPES[code]).ravel()
+    return HEADER.pack(MAGIC, FORMAT_VERSION, code, len(vector)) + vector.tobytes()
+
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    """
+    Decode an embedding_blob value.
+
+    Returns:
+        Read-only view of the vector in its stored dtype (no copy)
+
+    Raises:
+        ValueError: If the blob header is malformed
+    """
+    if len(blob) < HEADER_SIZE:
+        raise ValueError(f"Embedding blob too short: {len(blob)} bytes")
+
+    magic, version, code, dimension = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != FORMAT_VERSION or code not in DTYPES:
+        raise ValueError(f"Unrecognized embedding blob header: {bytes(blob[:HEADER_SIZE])!r}")
+
+    dtype = DTYPES[code]
+    if len(blob) != HEADER_SIZE + dimension * dtype.itemsize:
+        raise ValueError(f"Embedding blob size does not match header ({dimension} x {dtype})")
+
+    return np.frombuffer(blob, dtype=dtype, count=dimension, offset=HEADER_SIZE)
+
+
+def decode_row(blob: Optional[bytes], embedding_json: Optional[str]) -> np.ndarray:
+    """Decode a stored embedding, preferring the binary column over legacy JSON"""
+    if blob is not None:
+        return decode_embedding(blob)
+    return np.asarray(json.loads(embedding_json), dtype=np.float32)
+
+
+def has_blob_column(conn: sqlite3.Connection, table: str) -> bool:
+    """Whether an embedding table has been migrated to the embedding_blob schema"""
+    return any(row[1] == 'embedding_blob' for row in conn.execute(f"PRAGMA table_info({table})"))
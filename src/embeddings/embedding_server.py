@@ -7,24 +7,51 @@ Performance improvement: 100x+ faster than spawning new process per query
 - First query: 10-30s (model loading)
 - Subsequent queries: 0.1-0.5s
 
+With --db, the server also serves top-k vector search over section, code
+example and table embeddings (see generate_embeddings.py) - for one language
+or several at once - loaded once into memory or memory-mapped from .npy files
+written by export_embeddings.py. /search_batch answers many queries with one
+forward pass and one matrix-matrix product. /search_sections can also run a
+hybrid FTS5 BM25 + vector search fused by reciprocal rank (see hybrid_search.py).
+Complete search responses are cached until the index generation changes
+(result_cache.py; hit rates at /cache_stats). Changed embeddings are picked
+up without a restart as delta segments and tombstones, merged by background
+compaction (segment sizes at /index_stats). When a tool rewrites the
+database's index manifest, a replacement store is loaded in the background
+and swapped in; in-flight requests finish on the store they started with
+(index_reloader.py).
+
 Usage:
     python embedding_server.py --port 8765 --model Qwen/Qwen3-Embedding-0.6B
+    python embedding_server.py --port 8765 --db data/hdl-lrm.db
+    python embedding_server.py --db data/hdl-lrm.db --embeddings-dir data/embeddings
+    python embedding_server.py --db data/hdl-lrm.db --index ivf --nprobe 16
+    python embedding_server.py --db data/hdl-lrm.db --manifest-poll 0  # No hot reload
 """
 
 import argparse
 import json
 import sys
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
-    from flask import Flask, request, jsonify
+    from flask import Flask, Response, request, jsonify
+    import numpy as np
     from sentence_transformers import SentenceTransformer
     import torch
-    from utils.gpu_utils import detect_device, get_optimal_dtype
+    from utils.gpu_utils import detect_device, get_optimal_dtype, get_model_kwargs, autocast_context
+    from ann_index import INDEX_TYPES
+    from hybrid_search import DEFAULT_CANDIDATES, hybrid_search
+    from index_reloader import MANIFEST_POLL_INTERVAL_S, IndexReloader
+    from result_cache import ResultCache
+    from utils.index_manifest import manifest_path
+    from vector_store import EMBEDDING_TABLES, MANIFEST_NAME, VectorStore
 except ImportError as e:
     print(json.dumps({"error": f"Missing dependency: {e}"}))
     sys.exit(1)
@@ -40,26 +67,33 @@ logger = logging.getLogger(__name__)
 model = None
 model_name = None
 device = None
+dtype = None
+store = None  # VectorStore over the database, when --db is given (swapped by the reloader)
+reloader = None  # IndexReloader watching the database's manifest
+MAX_BATCH_QUERIES = 256  # Most queries accepted by one /search_batch request
+fts_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='fts')  # Full-text side of hybrid searches
+result_cache = ResultCache()  # Complete search responses (sized by --result-cache-size)
 
 app = Flask(__name__)
 
-def load_model(name: str) -> SentenceTransformer:
+def load_model(name: str, cpu_bf16: bool = False) -> SentenceTransformer:
     """Load embedding model into memory"""
-    global model, model_name, device
+    global model, model_name, device, dtype
 
     logger.info(f"Loading embedding model: {name}")
 
     # Auto-detect device
     device = detect_device(verbose=True)
-    dtype = get_optimal_dtype(device)
+    dtype = get_optimal_dtype(device, cpu_bf16=cpu_bf16)
 
     logger.info(f"Using device: {device}, dtype: {dtype}")
 
-    # Load model
+    # Load model with the chosen precision applied to the weights
     model = SentenceTransformer(
         name,
         device=device,
-        trust_remote_code=True
+        trust_remote_code=True,
+        model_kwargs=get_model_kwargs(device, dtype)
     )
     model_name = name
 
@@ -82,9 +116,20 @@ def health():
         'status': 'ready',
         'model': model_name,
         'device': str(device),
-        'dimension': model.get_sentence_embedding_dimension()
+        'dtype': str(dtype),
+        'dimension': model.get_sentence_embedding_dimension(),
+        'binary': True  # /encode_batch can return raw float32 (see client.py)
     })
 
+def encode_text(text):
+    """Encode text (or a list of texts) to normalized embedding(s)"""
+    with torch.no_grad(), autocast_context(device, dtype):
+        return model.encode(
+            text,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+
 @app.route('/encode', methods=['POST'])
 def encode():
     """Encode query text to embedding vector"""
@@ -104,11 +149,7 @@ def encode():
         query = data['query']
 
         # Encode query
-        embedding = model.encode(
-            query,
-            convert_to_numpy=True,
-            normalize_embeddings=True
-        )
+        embedding = encode_text(query)
 
         return jsonify({
             'embedding': embedding.tolist(),
@@ -123,6 +164,417 @@ def encode():
             'error': str(e)
         }), 500
 
+@app.route('/encode_batch', methods=['POST'])
+def encode_batch():
+    """
+    Encode many queries in one forward pass.
+
+    Returns JSON embeddings, or raw little-endian float32 rows when the client
+    sends Accept: application/octet-stream (dimension/count in X-Embedding-* headers).
+    """
+    if model is None:
+        return jsonify({
+            'error': 'Model not loaded'
+        }), 503
+
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('queries'), list):
+            return jsonify({
+                'error': 'Missing "queries" list in request body'
+            }), 400
+
+        queries = data['queries']
+        if not queries:
+            return jsonify({
+                'error': '"queries" must contain at least one query'
+            }), 400
+        if not all(isinstance(query, str) for query in queries):
+            return jsonify({
+                'error': 'Every entry in "queries" must be a string'
+            }), 400
+
+        embeddings = np.asarray(encode_text(queries), dtype='<f4').reshape(len(queries), -1)
+
+        if 'application/octet-stream' in request.headers.get('Accept', ''):
+            return Response(
+                embeddings.tobytes(),
+                mimetype='application/octet-stream',
+                headers={
+                    'X-Embedding-Count': str(embeddings.shape[0]),
+                    'X-Embedding-Dimension': str(embeddings.shape[1]),
+                    'X-Embedding-Model': model_name
+                }
+            )
+
+        return jsonify({
+            'embeddings': embeddings.tolist(),
+            'model': model_name,
+            'dimension': embeddings.shape[1],
+            'device': str(device)
+        })
+
+    except Exception as e:
+        logger.error(f"Encoding error: {e}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+def search_items(kind: str):
+    """
+    Encode a query and return the top-k items of a kind.
+
+    "language" is one language, "all", or a list of languages. Several
+    languages are searched with one encode and one matrix product; the
+    response then has a merged "results" ranking plus "by_language" top-k.
+
+    Responses (including empty ones) are cached per request and index
+    generation; cached responses carry "cached": true.
+
+    For sections, "mode" may be "hybrid" (BM25 and vector rankings fused) or
+    "prefilter" (vector scan over the BM25 hits only); default "vector".
+
+    Optional "filters" ({"section": "9", "max_depth": 2, "page_from": 100,
+    ...}) restrict the search to matching sections before scoring; filtered
+    responses have a merged "results" ranking and the number of rows "scanned".
+    """
+    if model is None:
+        return jsonify({
+            'error': 'Model not loaded'
+        }), 503
+
+    # The reloader may swap the global store; this request keeps the one it started with
+    current = store
+    if current is None:
+        return jsonify({
+            'error': 'No database configured (start the server with --db)'
+        }), 503
+
+    try:
+        data = request.get_json()
+
+        if not data or 'query' not in data or 'language' not in data:
+            return jsonify({
+                'error': 'Missing "query" or "language" field in request body'
+            }), 400
+
+        max_results = parse_max_results(data.get('max_results', 10))
+
+        language = data['language']
+        languages = None if language == 'all' else [language] if isinstance(language, str) else list(language)
+        mode = data.get('mode', 'vector')
+        filters = parse_filters(data.get('filters'))
+
+        if mode not in ('vector', 'hybrid', 'prefilter'):
+            return jsonify({
+                'error': f'Invalid mode: {mode} (expected vector, hybrid or prefilter)'
+            }), 400
+
+        if mode != 'vector' and kind != 'sections':
+            return jsonify({
+                'error': 'Hybrid search is only available for sections'
+            }), 400
+
+        # Popular requests are answered without encoding or scanning
+        cache_key = result_cache.make_key(current.check_generation(), kind, {
+            'query': data['query'],
+            'language': language,
+            'max_results': max_results,
+            'mode': mode,
+            'filters': filters,
+            'candidates': data.get('candidates')
+        })
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(dict(cached, cached=True))
+
+        response = run_search(current, kind, data, language, languages, mode, filters, max_results)
+        result_cache.put(cache_key, response, negative=not response['results'])
+        return jsonify(response)
+
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+
+    except Exception as e:
+        logger.error(f"Search error: {e}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+def run_search(store: VectorStore, kind: str, data: dict, language, languages, mode: str, filters: dict,
+               max_results: int) -> dict:
+    """Run one validated search request against a store and build its response"""
+    if mode != 'vector':
+        rows = store.filter_rows(kind, languages, filters) if filters else None
+        return hybrid_response(store, data, languages, max_results, prefilter=(mode == 'prefilter'), rows=rows)
+
+    if filters:
+        rows = store.filter_rows(kind, languages, filters)
+        embedding = encode_text(data['query'])
+        hits = store.get_multi_matrix(kind).search_rows(embedding, rows, max_results)
+
+        return {
+            'results': store.fetch_items(kind, [(item_id, similarity) for _, item_id, similarity in hits]),
+            'model': model_name,
+            'indexed': len(store.get_multi_matrix(kind)),
+            'scanned': len(rows)
+        }
+
+    embedding = encode_text(data['query'])
+
+    if isinstance(language, str) and language != 'all':
+        hits = store.search(kind, language, embedding, max_results)
+
+        return {
+            'results': store.fetch_items(kind, hits),
+            'model': model_name,
+            'indexed': len(store.get_matrix(kind, language))
+        }
+
+    found = store.search_languages(kind, embedding, max_results, languages)
+
+    # One hydration query for the merged and per-language hits (ids are unique across languages)
+    all_hits = {item_id: similarity for hits in found['by_language'].values() for item_id, similarity in hits}
+    items = {item['id']: item for item in store.fetch_items(kind, list(all_hits.items()))}
+
+    return {
+        'results': [items[item_id] for _, item_id, _ in found['merged'] if item_id in items],
+        'by_language': {
+            lang: [items[item_id] for item_id, _ in hits if item_id in items]
+            for lang, hits in found['by_language'].items()
+        },
+        'model': model_name,
+        'indexed': len(store.get_multi_matrix(kind))
+    }
+
+def parse_filters(raw) -> dict:
+    """Section filters from a request body (section is a string, the rest are integers)"""
+    if not raw:
+        return {}
+    if not isinstance(raw, dict):
+        raise ValueError('"filters" must be an object')
+    return {name: str(value) if name == 'section' else int(value)
+            for name, value in raw.items() if value is not None}
+
+def hybrid_response(store: VectorStore, data: dict, languages, max_results: int, prefilter: bool,
+                    rows=None) -> dict:
+    """Run a hybrid section search and hydrate its hits"""
+    found = hybrid_search(
+        store, data['query'], encode_text, max_results,
+        languages=languages,
+        prefilter=prefilter,
+        candidates=int(data.get('candidates', DEFAULT_CANDIDATES)),
+        executor=fts_executor,
+        rows=rows
+    )
+
+    hits = found['hits']
+    items = {item['id']: item for item in store.fetch_items(
+        'sections', [(hit['id'], hit['similarity']) for hit in hits])}
+
+    response = {
+        'results': [dict(items[hit['id']], score=hit['score'], bm25_rank=hit['bm25_rank'],
+                         vector_rank=hit['vector_rank'])
+                    for hit in hits if hit['id'] in items],
+        'model': model_name,
+        'indexed': len(store.get_multi_matrix('sections')),
+        'timing_ms': found['timing_ms']
+    }
+    if rows is not None:
+        response['scanned'] = len(rows)
+    return response
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """Search result cache entries and hit rates"""
+    return jsonify(result_cache.stats())
+
+@app.route('/index_stats', methods=['GET'])
+def index_stats():
+    """Main/delta segment sizes and tombstones of the loaded embedding sets, and hot reloads"""
+    current = store
+    if current is None:
+        return jsonify({
+            'error': 'No database configured (start the server with --db)'
+        }), 503
+
+    return jsonify({
+        'generation': current.generation,
+        'segments': current.segment_stats(),
+        'reloader': reloader.stats() if reloader else None
+    })
+
+def parse_max_results(value) -> int:
+    """
+    Validate a "max_results" value, capping it at 100.
+
+    Raises:
+        ValueError: If the value is not an integer of at least 1
+    """
+    if isinstance(value, bool):
+        raise ValueError('"max_results" must be an integer')
+    try:
+        max_results = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('"max_results" must be an integer')
+    if max_results != value and not isinstance(value, str):
+        raise ValueError('"max_results" must be an integer')
+    if max_results < 1:
+        raise ValueError('"max_results" must be at least 1')
+    return min(max_results, 100)
+
+def parse_batch_queries(data: dict) -> tuple:
+    """
+    Validate the queries of a /search_batch body.
+
+    Each query is a string or a dict with "query" and optional "language" and
+    "max_results"; missing values default to the body's own.
+
+    Returns:
+        Tuple of (texts, max_results per query, language per query)
+
+    Raises:
+        ValueError: If a query is malformed
+    """
+    texts, ks, languages = [], [], []
+    for position, raw in enumerate(data['queries']):
+        spec = raw if isinstance(raw, dict) else {'query': raw}
+
+        text = spec.get('query')
+        if not isinstance(text, str) or not text:
+            raise ValueError(f'Query {position}: "query" must be a non-empty string')
+
+        language = spec.get('language', data.get('language', 'all'))
+        if not isinstance(language, str) and not (
+                isinstance(language, list) and all(isinstance(lang, str) for lang in language)):
+            raise ValueError(f'Query {position}: "language" must be a string or a list of strings')
+
+        try:
+            k = parse_max_results(spec.get('max_results', data.get('max_results', 10)))
+        except ValueError as e:
+            raise ValueError(f'Query {position}: {e}')
+
+        texts.append(text)
+        ks.append(k)
+        languages.append(language)
+
+    return texts, ks, languages
+
+@app.route('/search_batch', methods=['POST'])
+def search_batch():
+    """
+    Answer many searches at once.
+
+    Body: {"queries": [...], "kind": "sections", "language": "all", "max_results": 10}
+    where each query is a string or {"query", "language", "max_results"}
+    overriding the defaults. All queries are encoded in one forward pass and
+    scored with one matrix-matrix product; results come back in request order.
+    """
+    if model is None:
+        return jsonify({
+            'error': 'Model not loaded'
+        }), 503
+
+    current = store  # Kept for the whole request (see search_items)
+    if current is None:
+        return jsonify({
+            'error': 'No database configured (start the server with --db)'
+        }), 503
+
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('queries'), list):
+            return jsonify({
+                'error': 'Missing "queries" list in request body'
+            }), 400
+
+        kind = data.get('kind', 'sections')
+        if kind not in EMBEDDING_TABLES:
+            return jsonify({
+                'error': f"Invalid kind: {kind} (expected {', '.join(EMBEDDING_TABLES)})"
+            }), 400
+
+        if not data['queries']:
+            return jsonify({
+                'error': '"queries" must contain at least one query'
+            }), 400
+        if len(data['queries']) > MAX_BATCH_QUERIES:
+            return jsonify({
+                'error': f'Too many queries (max {MAX_BATCH_QUERIES})'
+            }), 400
+
+        texts, ks, languages = parse_batch_queries(data)
+        selections = [None if lang == 'all' else [lang] if isinstance(lang, str) else list(lang)
+                      for lang in languages]
+
+        current.check_generation()  # Apply embeddings the tools have changed since the last request
+
+        start = time.perf_counter()
+        embeddings = np.asarray(encode_text(texts), dtype=np.float32).reshape(len(texts), -1)
+        encoded = time.perf_counter()
+        found = current.search_batch(kind, embeddings, ks, selections)
+        searched = time.perf_counter()
+
+        # One hydration query for every hit of every query
+        all_hits = {item_id: similarity for hits in found for _, item_id, similarity in hits}
+        items = {item['id']: item for item in current.fetch_items(kind, list(all_hits.items()))}
+        fetched = time.perf_counter()
+
+        results = []
+        for text, language, hits in zip(texts, languages, found):
+            results.append({
+                'query': text,
+                'language': language,
+                'results': [dict(items[item_id], similarity=similarity)
+                            for _, item_id, similarity in hits if item_id in items]
+            })
+
+        return jsonify({
+            'results': results,
+            'model': model_name,
+            'indexed': len(current.get_multi_matrix(kind)),
+            'timing_ms': {
+                'encode': round((encoded - start) * 1000, 2),
+                'search': round((searched - encoded) * 1000, 2),
+                'fetch': round((fetched - searched) * 1000, 2)
+            }
+        })
+
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+
+    except Exception as e:
+        logger.error(f"Search error: {e}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/search_sections', methods=['POST'])
+def search_sections():
+    """Semantic top-k search over section embeddings"""
+    return search_items('sections')
+
+@app.route('/search_code', methods=['POST'])
+def search_code():
+    """Semantic top-k search over code example embeddings"""
+    return search_items('code')
+
+@app.route('/search_tables', methods=['POST'])
+def search_tables():
+    """Semantic top-k search over table embeddings"""
+    return search_items('tables')
+
+def swap_store(new_store: VectorStore):
+    """Publish a reloaded store (one reference assignment, so requests see the old or the new one)"""
+    global store
+    store = new_store
+
 def main():
     parser = argparse.ArgumentParser(
         description='Persistent embedding server for Athens HDL MCP'
@@ -143,12 +595,105 @@ def main():
         default='Qwen/Qwen3-Embedding-0.6B',
         help='Embedding model to use'
     )
+    parser.add_argument(
+        '--db',
+        default=None,
+        help='SQLite database to serve vector search from (enables /search_code and /search_tables)'
+    )
+    parser.add_argument(
+        '--embeddings-dir',
+        default=None,
+        help='Directory of exported .npy embeddings to memory-map (default: embeddings/ next to --db)'
+    )
+    parser.add_argument(
+        '--index',
+        choices=list(INDEX_TYPES),
+        default='exact',
+        help='Vector index: exact scan, approximate (ivf), int8-quantized (int8) '
+             'or binary Hamming prefilter (binary) (default: exact)'
+    )
+    parser.add_argument(
+        '--nlist',
+        type=int,
+        default=None,
+        help='IVF clusters when the index is built at startup (default: 4 * sqrt(N))'
+    )
+    parser.add_argument(
+        '--nprobe',
+        type=int,
+        default=None,
+        help='IVF clusters scanned per query (default: 8)'
+    )
+    parser.add_argument(
+        '--rescore',
+        type=int,
+        default=None,
+        help='int8 candidates rescored at full precision per query (default: 100)'
+    )
+    parser.add_argument(
+        '--candidates',
+        type=int,
+        default=None,
+        help='binary Hamming candidates reranked by exact cosine per query (default: 200)'
+    )
+    parser.add_argument(
+        '--result-cache-size',
+        type=int,
+        default=1024,
+        help='Search responses kept in the result cache (0 disables; default: 1024)'
+    )
+    parser.add_argument(
+        '--manifest-poll',
+        type=float,
+        default=MANIFEST_POLL_INTERVAL_S,
+        help='Seconds between checks of the database manifest for hot reloads '
+             f'(0 disables; default: {MANIFEST_POLL_INTERVAL_S})'
+    )
+    parser.add_argument(
+        '--cpu-bf16',
+        action='store_true',
+        help='Run CPU inference under bfloat16 autocast (requires native AVX512-BF16/AMX)'
+    )
 
     args = parser.parse_args()
 
+    # Build/search options that only one index type understands
+    for option, index_type in (('nlist', 'ivf'), ('nprobe', 'ivf'), ('rescore', 'int8'), ('candidates', 'binary')):
+        if getattr(args, option) is not None and args.index != index_type:
+            parser.error(f"--{option} only applies to --index {index_type}")
+
+    global store, reloader
+
+    result_cache.max_entries = args.result_cache_size
+
     # Load model at startup
     try:
-        load_model(args.model)
+        load_model(args.model, cpu_bf16=args.cpu_bf16)
+        if args.db:
+            store = VectorStore(
+                args.db, args.model,
+                export_dir=args.embeddings_dir,
+                index_type=args.index,
+                index_params={'n_lists': args.nlist} if args.index == 'ivf' and args.nlist else None,
+                search_params={name: value for name, value in (
+                    ('nprobe', args.nprobe),
+                    ('rescore', args.rescore),
+                    ('candidates', args.candidates)
+                ) if value is not None},
+                # With a manifest, the reloader replaces the store instead of it refreshing inline
+                refresh_on_generation=not (args.manifest_poll > 0 and manifest_path(args.db).exists())
+            )
+            logger.info(f"Serving vector search from {args.db}")
+            if (store.export_dir / MANIFEST_NAME).exists():
+                logger.info(f"Memory-mapping exported embeddings from {store.export_dir}")
+            if args.manifest_poll > 0:
+                reloader = IndexReloader(
+                    store, swap_store,
+                    dimension=model.get_sentence_embedding_dimension(),
+                    interval=args.manifest_poll
+                )
+                reloader.start()
+                logger.info(f"Watching {reloader.path} for index changes")
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
         sys.exit(1)
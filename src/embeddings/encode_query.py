@@ -3,15 +3,24 @@
 Generate embedding for a single query text.
 Called by MCP server to encode search queries.
 
+Batch mode loads the model once and streams embeddings for many queries,
+read as plain lines or NDJSON ({"id": ..., "query": ...}) from stdin or a file.
+Queries are grouped into token-bucketed batches (similar lengths together) to
+minimize padding, and output is written as each window completes.
+
 Usage:
     python encode_query.py "your search query here"
     python encode_query.py "your search query" --model Qwen/Qwen3-Embedding-0.6B
+    python encode_query.py --batch queries.txt > embeddings.ndjson
+    cat queries.ndjson | python encode_query.py --batch --output-format f32 > embeddings.f32
 """
 
 import argparse
 import json
 import sys
+import time
 from pathlib import Path
+from typing import Any, Iterator, List, Tuple
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -19,7 +28,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 try:
     from sentence_transformers import SentenceTransformer
     import torch
-    from utils.gpu_utils import detect_device, get_optimal_dtype
+    from utils.gpu_utils import detect_device, get_optimal_dtype, get_model_kwargs, autocast_context
 except ImportError:
     print(json.dumps({"error": "sentence-transformers or torch not installed"}))
     sys.exit(1)
@@ -27,40 +36,215 @@ except ImportError:
 # Cache model globally for faster repeated calls
 _model_cache = {}
 
-def get_model(model_name: str) -> SentenceTransformer:
+def get_model(model_name: str, cpu_bf16: bool = False) -> SentenceTransformer:
     """Get or load model from cache"""
     if model_name not in _model_cache:
         # Auto-detect device (GPU if available, else CPU)
         device = detect_device(verbose=False)
-        dtype = get_optimal_dtype(device)
+        dtype = get_optimal_dtype(device, cpu_bf16=cpu_bf16)
 
-        # Load model with trust_remote_code for Qwen models
+        # Load model with trust_remote_code for Qwen models, applying the chosen precision
         _model_cache[model_name] = SentenceTransformer(
             model_name,
             device=device,
-            trust_remote_code=True
+            trust_remote_code=True,
+            model_kwargs=get_model_kwargs(device, dtype)
         )
+        _model_cache[model_name].inference_dtype = dtype
     return _model_cache[model_name]
 
-def encode_query(text: str, model_name: str = 'Qwen/Qwen3-Embedding-0.6B') -> list:
+def encode_query(text: str, model_name: str = 'Qwen/Qwen3-Embedding-0.6B', cpu_bf16: bool = False) -> list:
     """Encode query text to embedding vector"""
-    model = get_model(model_name)
+    model = get_model(model_name, cpu_bf16=cpu_bf16)
     # normalize_embeddings=True for consistent similarity search
-    embedding = model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+    with torch.no_grad(), autocast_context(str(model.device.type), model.inference_dtype):
+        embedding = model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
     return embedding.tolist()
 
+def read_queries(stream, input_format: str = 'auto') -> Iterator[Tuple[Any, str]]:
+    """
+    Read queries from a text stream.
+
+    Args:
+        stream: File-like object with one query per line
+        input_format: 'text', 'ndjson' or 'auto' (lines starting with '{' are NDJSON)
+
+    Yields:
+        (id, query) pairs; id is the NDJSON "id" field or the 0-based line number
+
+    Raises:
+        ValueError: If an NDJSON line is not an object with a non-empty string "query"
+    """
+    for line_no, line in enumerate(stream):
+        line = line.rstrip('\n')
+        if not line.strip():
+            continue
+
+        if input_format == 'ndjson' or (input_format == 'auto' and line.lstrip().startswith('{')):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f'Line {line_no + 1}: invalid JSON ({e})')
+            if not isinstance(record, dict) or not isinstance(record.get('query'), str) or not record['query']:
+                raise ValueError(f'Line {line_no + 1}: expected an object with a non-empty string "query"')
+            yield record.get('id', line_no), record['query']
+        else:
+            yield line_no, line
+
+def token_buckets(lengths: List[int], max_batch_tokens: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Group texts into batches of similar token length.
+
+    Texts are sorted by length and packed while (batch size x longest text)
+    stays within max_batch_tokens, so padding per batch is minimal.
+
+    Returns:
+        List of batches, each a list of indices into lengths
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    buckets = []
+    current = []
+    current_max = 0
+    for i in order:
+        new_max = max(current_max, lengths[i])
+        if current and (new_max * (len(current) + 1) > max_batch_tokens or len(current) >= max_batch_size):
+            buckets.append(current)
+            current = []
+            new_max = lengths[i]
+        current.append(i)
+        current_max = new_max
+
+    if current:
+        buckets.append(current)
+    return buckets
+
+def encode_stream(
+    stream,
+    out,
+    model_name: str = 'Qwen/Qwen3-Embedding-0.6B',
+    input_format: str = 'auto',
+    output_format: str = 'ndjson',
+    window: int = 1024,
+    max_batch_tokens: int = 16384,
+    max_batch_size: int = 128,
+    cpu_bf16: bool = False
+) -> dict:
+    """
+    Encode a stream of queries with one model load.
+
+    Queries are read in windows; each window is token-bucketed, encoded and
+    written in input order before the next window is read.
+
+    Args:
+        stream: Input text stream (lines or NDJSON)
+        out: Binary output stream
+        output_format: 'ndjson' ({"id", "embedding"} per line) or 'f32'
+                       (raw little-endian float32 rows in input order)
+
+    Returns:
+        Throughput statistics
+    """
+    model = get_model(model_name, cpu_bf16=cpu_bf16)
+    device = str(model.device.type)
+
+    stats = {'queries': 0, 'tokens': 0, 'batches': 0, 'dimension': model.get_sentence_embedding_dimension()}
+    start = time.perf_counter()
+
+    def flush(records: List[Tuple[Any, str]]):
+        texts = [text for _, text in records]
+        lengths = [len(ids) for ids in model.tokenizer(
+            texts, truncation=True, max_length=model.max_seq_length)['input_ids']]
+
+        embeddings = [None] * len(texts)
+        for bucket in token_buckets(lengths, max_batch_tokens, max_batch_size):
+            with torch.no_grad(), autocast_context(device, model.inference_dtype):
+                encoded = model.encode([texts[i] for i in bucket], batch_size=len(bucket),
+                                       convert_to_numpy=True, normalize_embeddings=True,
+                                       show_progress_bar=False)
+            for i, embedding in zip(bucket, encoded):
+                embeddings[i] = embedding
+            stats['batches'] += 1
+
+        for (query_id, _), embedding in zip(records, embeddings):
+            if output_format == 'f32':
+                out.write(embedding.astype('<f4').tobytes())
+            else:
+                out.write((json.dumps({'id': query_id, 'embedding': embedding.tolist()}) + '\n').encode('utf-8'))
+        out.flush()
+
+        stats['queries'] += len(records)
+        stats['tokens'] += sum(lengths)
+
+    pending = []
+    for record in read_queries(stream, input_format):
+        pending.append(record)
+        if len(pending) >= window:
+            flush(pending)
+            pending = []
+    if pending:
+        flush(pending)
+
+    duration = time.perf_counter() - start
+    stats['duration_s'] = round(duration, 3)
+    stats['queries_per_s'] = round(stats['queries'] / duration, 1) if duration > 0 else None
+    stats['tokens_per_s'] = round(stats['tokens'] / duration, 1) if duration > 0 else None
+    stats['device'] = device
+    return stats
+
 def main():
     parser = argparse.ArgumentParser(description='Encode query text to embedding')
-    parser.add_argument('query', help='Query text to encode')
+    parser.add_argument('query', nargs='?', help='Query text to encode')
     parser.add_argument('--model', default='Qwen/Qwen3-Embedding-0.6B', help='Model name')
+    parser.add_argument('--cpu-bf16', action='store_true',
+                        help='Run CPU inference under bfloat16 autocast (requires native AVX512-BF16/AMX)')
+    parser.add_argument('--batch', nargs='?', const='-', default=None, metavar='FILE',
+                        help='Batch mode: read one query per line (or NDJSON) from FILE or stdin')
+    parser.add_argument('--input-format', choices=['auto', 'text', 'ndjson'], default='auto',
+                        help='Batch input format (default: auto-detect NDJSON lines)')
+    parser.add_argument('--output-format', choices=['ndjson', 'f32'], default='ndjson',
+                        help='Batch output: NDJSON lines or raw float32 rows (default: ndjson)')
+    parser.add_argument('--max-batch-tokens', type=int, default=16384,
+                        help='Token budget per batch (batch size x longest query, default: 16384)')
+    parser.add_argument('--window', type=int, default=1024,
+                        help='Queries read before each bucket/encode/write cycle (default: 1024)')
 
     args = parser.parse_args()
 
+    if args.batch is not None:
+        try:
+            stream = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+            try:
+                stats = encode_stream(
+                    stream,
+                    sys.stdout.buffer,
+                    model_name=args.model,
+                    input_format=args.input_format,
+                    output_format=args.output_format,
+                    window=args.window,
+                    max_batch_tokens=args.max_batch_tokens,
+                    cpu_bf16=args.cpu_bf16
+                )
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+
+            # Throughput report goes to stderr so stdout stays pure output
+            print(json.dumps(stats), file=sys.stderr)
+
+        except Exception as e:
+            print(json.dumps({'error': str(e)}), file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if args.query is None:
+        parser.error('a query is required unless --batch is given')
+
     try:
         # Detect device for debugging info
         device = detect_device(verbose=False)
 
-        embedding = encode_query(args.query, args.model)
+        embedding = encode_query(args.query, args.model, cpu_bf16=args.cpu_bf16)
 
         # Output as JSON for easy parsing by TypeScript
         result = {
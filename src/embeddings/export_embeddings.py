@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Export embeddings to memory-mappable .npy files.
+
+Loading embeddings from SQLite row by row at every server start is slow, and
+each serving process ends up with its own copy. This script writes each
+(kind, language) embedding set of a model as a contiguous, L2-normalized
+matrix plus an id array:
+
+    <output dir>/<model>/sections-verilog.vectors.npy   (N x dim, float32/float16)
+    <output dir>/<model>/sections-verilog.ids.npy       (N, int64)
+    <output dir>/<model>/manifest.json
+
+vector_store.VectorStore (and so embedding_server.py) memory-maps these with
+np.load(mmap_mode='r'), making startup O(1) and sharing the OS page cache
+between processes. Each set records the largest embedding row id it holds
+(max_row_id); embeddings added or removed after the export are applied on
+top as a delta segment and tombstones, so re-exporting is only needed to
+keep that delta small.
+
+Usage:
+    python export_embeddings.py
+    python export_embeddings.py --dtype float16  # Half the size and page-cache footprint
+    python export_embeddings.py --model Qwen/Qwen3-Embedding-0.6B --output-dir data/embeddings
+    python export_embeddings.py --index ivf  # Also build and save an IVF index per set
+    python export_embeddings.py --index ivf,int8
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ann_index import INDEX_TYPES, build_index
+from utils.index_manifest import write_index_manifest
+from vector_store import EMBEDDING_TABLES, MANIFEST_NAME, EmbeddingMatrix, max_row_id, model_export_dir
+
+
+def save_npy(path: Path, array: np.ndarray):
+    """Write an .npy file atomically (readers never see a partial file)"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def export(
+    db_path: str,
+    output_dir: Optional[str] = None,
+    model_name: str = 'Qwen/Qwen3-Embedding-0.6B',
+    kinds: Optional[List[str]] = None,
+    dtype: str = 'float32',
+    index_types: Optional[List[str]] = None,
+    index_params: Optional[dict] = None
+) -> int:
+    """
+    Export all embedding sets of a model.
+
+    Args:
+        db_path: Path to SQLite database
+        output_dir: Base export directory (default: embeddings/ next to the database)
+        model_name: Embedding model to export
+        kinds: Kinds to export (default: sections, code, tables)
+        dtype: Stored precision ('float32' or 'float16')
+        index_types: Also build and save these ann_index types for every set
+        index_params: Build parameters per index type, e.g. {'ivf': {'n_lists': 256}}
+    """
+    db = Path(db_path)
+    if not db.exists():
+        print(f"Error: Database not found at {db_path}")
+        return 1
+
+    target = model_export_dir(Path(output_dir) if output_dir else db.parent / 'embeddings', model_name)
+    target.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(f"file:{db}?mode=ro", uri=True)
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    print(f"Exporting {model_name} embeddings from {db} to {target} ({dtype})...")
+    start_time = time.time()
+    sets = {}
+    dimension = None
+
+    try:
+        for kind in kinds or list(EMBEDDING_TABLES):
+            table, _ = EMBEDDING_TABLES[kind]
+            if table not in existing:
+                continue
+
+            high_water = max_row_id(conn, table)
+            languages = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT language FROM {table} WHERE embedding_model = ? ORDER BY language",
+                (model_name,)
+            )]
+
+            for language in languages:
+                matrix = EmbeddingMatrix.from_db(conn, kind, language, model_name, max_row_id=high_water)
+                dimension = matrix.matrix.shape[1]
+                name = f"{kind}-{language}"
+
+                save_npy(target / f"{name}.vectors.npy", np.ascontiguousarray(matrix.matrix, dtype=dtype))
+                save_npy(target / f"{name}.ids.npy", matrix.ids)
+
+                sets[f"{kind}/{language}"] = {
+                    'vectors': f"{name}.vectors.npy",
+                    'ids': f"{name}.ids.npy",
+                    'count': len(matrix),
+                    'max_row_id': high_water
+                }
+                print(f"  ✓ {kind}/{language}: {len(matrix)} x {dimension}")
+
+                indexes = {}
+                for index_type in index_types or []:
+                    index_start = time.time()
+                    index = build_index(index_type, matrix.matrix, **(index_params or {}).get(index_type, {}))
+                    index.save(target / f"{name}.{index_type}")
+                    indexes[index_type] = f"{name}.{index_type}"
+                    print(f"    {index_type} index built in {time.time() - index_start:.1f}s")
+                if indexes:
+                    sets[f"{kind}/{language}"]['indexes'] = indexes
+    finally:
+        conn.close()
+
+    if not sets:
+        print(f"No embeddings found for model {model_name}")
+        return 1
+
+    # Manifest goes last, so readers only ever see complete sets
+    manifest = {
+        'model': model_name,
+        'dimension': dimension,
+        'dtype': dtype,
+        'normalized': True,
+        'created_at': int(time.time()),
+        'source_db': str(db),
+        'sets': sets
+    }
+    manifest_path = target / MANIFEST_NAME
+    tmp_path = manifest_path.with_name(MANIFEST_NAME + '.tmp')
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, manifest_path)
+
+    # Running servers reload onto the new export when the database's manifest changes
+    conn = sqlite3.connect(f"file:{db}?mode=ro", uri=True)
+    try:
+        write_index_manifest(conn, db, 'export_embeddings.py')
+    finally:
+        conn.close()
+
+    total_bytes = sum((target / entry['vectors']).stat().st_size for entry in sets.values())
+    print(f"\n✓ Exported {len(sets)} sets ({total_bytes / 1024 / 1024:.1f} MB) "
+          f"in {time.time() - start_time:.1f}s")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Export embeddings to memory-mappable .npy files'
+    )
+    parser.add_argument(
+        '--db',
+        default='data/hdl-lrm.db',
+        help='Path to SQLite database (default: data/hdl-lrm.db)'
+    )
+    parser.add_argument(
+        '--output-dir',
+        default=None,
+        help='Base export directory (default: embeddings/ next to the database)'
+    )
+    parser.add_argument(
+        '--model',
+        default='Qwen/Qwen3-Embedding-0.6B',
+        help='Embedding model to export (default: Qwen/Qwen3-Embedding-0.6B)'
+    )
+    parser.add_argument(
+        '--kinds',
+        default='sections,code,tables',
+        help='Comma-separated kinds to export: sections, code, tables (default: all)'
+    )
+    parser.add_argument(
+        '--dtype',
+        choices=['float32', 'float16'],
+        default='float32',
+        help='Stored precision (default: float32)'
+    )
+
+    parser.add_argument(
+        '--index',
+        default=None,
+        help='Comma-separated indexes to build and save for each set: '
+             f"{', '.join(name for name in INDEX_TYPES if name != 'exact')} (see ann_index.py)"
+    )
+    parser.add_argument(
+        '--nlist',
+        type=int,
+        default=None,
+        help='Number of IVF clusters (default: 4 * sqrt(N))'
+    )
+
+    args = parser.parse_args()
+
+    kinds = args.kinds.split(',')
+    invalid = [kind for kind in kinds if kind not in EMBEDDING_TABLES]
+    if invalid:
+        parser.error(f"invalid --kinds value(s): {', '.join(invalid)}")
+
+    index_types = args.index.split(',') if args.index else []
+    invalid = [name for name in index_types if name not in INDEX_TYPES or name == 'exact']
+    if invalid:
+        parser.error(f"invalid --index value(s): {', '.join(invalid)}")
+
+    index_params = {'ivf': {'n_lists': args.nlist}} if args.nlist else {}
+    return export(args.db, args.output_dir, args.model, kinds, args.dtype, index_types, index_params)
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -2,19 +2,34 @@
 """
 Generate semantic embeddings for HDL LRM sections using sentence-transformers.
 
-This script generates embeddings for all sections in the database that don't
-already have embeddings for the specified model. Large sections (>6000 chars)
+This script generates embeddings for all sections (and code examples and
+tables) in the database that don't already have embeddings for the specified
+model. Large sections (>6000 chars)
 are automatically chunked with 10% overlap, and chunk embeddings are averaged.
+Identical chunks (repeated syntax boxes, notes, shared subsections) are only
+encoded once per run, or once ever with --chunk-cache.
 
 Usage:
     python generate_embeddings.py --language verilog
     python generate_embeddings.py --language systemverilog --model Qwen/Qwen3-Embedding-0.6B
     python generate_embeddings.py  # Process all languages
+    python generate_embeddings.py --kinds code,tables  # Only code examples and tables
+    python generate_embeddings.py --chunk-cache data/chunk-cache.db
+    python generate_embeddings.py --benchmark --benchmark-output bench.json
+    python generate_embeddings.py --parity --cpu-bf16  # bf16 vs float32 parity report
+    python generate_embeddings.py --estimate  # Token counts, ETA and memory without loading weights
+    python generate_embeddings.py --storage-format both  # Binary blob plus legacy JSON
 """
 
 import argparse
+import contextlib
 import sqlite3
 import json
+import os
+import platform
+import random
+import socket
+import subprocess
 import time
 import sys
 import numpy as np
@@ -33,16 +48,33 @@ try:
         get_gpu_info,
         get_optimal_dtype,
         get_optimal_batch_size,
+        get_model_kwargs,
+        autocast_context,
         print_device_info,
         get_gpu_memory_info,
         clear_gpu_cache
     )
 except ImportError as e:
     print(f"Error: Required package not installed: {e}")
-    print("Install with: pip install sentence-transformers>=2.2.0 torch")
+    print("Install with: pip install sentence-transformers>=2.3.0 torch")
     print("Or run: npm run setup:gpu")
     sys.exit(1)
 
+from chunk_cache import ChunkEmbeddingCache, chunk_hash
+from utils.index_generation import bump_generation
+from utils.index_manifest import write_index_manifest
+from vector_store import EMBEDDING_TABLES
+from embedding_codec import STORAGE_FORMATS, encode_embedding, has_blob_column
+
+SCHEMA_PATH = Path(__file__).parent.parent / 'storage' / 'schema.sql'
+
+# Human-readable names for each embedding kind
+ITEM_LABELS = {
+    'sections': 'sections',
+    'code': 'code examples',
+    'tables': 'tables',
+}
+
 
 def chunk_text(text: str, chunk_size: int = 6000, overlap: int = 600) -> List[str]:
     """
@@ -79,27 +111,138 @@ def chunk_text(text: str, chunk_size: int = 6000, overlap: int = 600) -> List[st
     return chunks
 
 
+def read_rss_mb(field: str = 'VmRSS') -> Optional[float]:
+    """
+    Read a memory field of this process from /proc/self/status.
+
+    Args:
+        field: 'VmRSS' (current resident set size) or 'VmHWM' (its peak)
+
+    Returns:
+        Size in MB, or None if unavailable (no /proc, e.g. macOS or Windows)
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset this process's peak RSS (VmHWM) to its current RSS.
+
+    ru_maxrss cannot be reset and only grows over a whole benchmark sweep; the
+    kernel's high-water mark can, so each configuration gets its own peak.
+
+    Returns:
+        True if the peak was reset (Linux 4.0+)
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        return False
+    return read_rss_mb('VmHWM') is not None
+
+
+def get_git_commit() -> Optional[str]:
+    """Get the current git commit of the repository, if available"""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=str(Path(__file__).parent),
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def read_max_seq_length(model_name: str) -> Optional[int]:
+    """
+    Read the sequence limit SentenceTransformer truncates to (max_seq_length in
+    the model's sentence_bert_config.json) without loading the model.
+
+    Returns:
+        The limit, or None if the model has no (readable) sentence_bert_config.json
+    """
+    config_path = Path(model_name) / 'sentence_bert_config.json'
+    try:
+        if not config_path.exists():
+            from huggingface_hub import hf_hub_download
+            config_path = Path(hf_hub_download(model_name, 'sentence_bert_config.json'))
+        return json.loads(config_path.read_text()).get('max_seq_length')
+    except Exception:
+        return None
+
+
+def throughput_profile_key(model_name: str, device: str) -> str:
+    """Key for a host's measured throughput in the throughput profile"""
+    return f"{model_name}|{device}|{socket.gethostname()}"
+
+
+def load_throughput_profile(profile_path: Path) -> dict:
+    """Load stored throughput measurements (empty if none recorded yet)"""
+    if not profile_path.exists():
+        return {}
+    try:
+        return json.loads(profile_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_throughput_profile(profile_path: Path, key: str, entry: dict):
+    """Record the best measured throughput for a model/device/host"""
+    profile = load_throughput_profile(profile_path)
+    profile[key] = entry
+    profile_path.write_text(json.dumps(profile, indent=2))
+
+
 class EmbeddingGenerator:
     """Generate and store embeddings for LRM sections"""
 
-    def __init__(self, db_path: str, model_name: str = 'Qwen/Qwen3-Embedding-0.6B', device: Optional[str] = None):
+    def __init__(self, db_path: str, model_name: str = 'Qwen/Qwen3-Embedding-0.6B', device: Optional[str] = None,
+                 cpu_bf16: bool = False, chunk_cache_path: Optional[str] = None,
+                 storage_format: str = 'blob', blob_dtype: str = 'float32'):
         self.db_path = Path(db_path)
         self.model_name = model_name
         self.model = None
         self.conn = None
 
+        # Embedding storage: binary blob, legacy JSON, or both during the transition.
+        # Tables not yet migrated to embedding_blob always get JSON.
+        self.storage_format = storage_format
+        self.blob_dtype = blob_dtype
+        self.blob_tables = set()
+
+        # Chunk deduplication: identical chunks are encoded once per run,
+        # and optionally once ever via a persistent cache file
+        self.chunk_cache_path = chunk_cache_path
+        self.chunk_cache = None
+        self.run_chunk_embeddings = {}
+        self.dedup_stats = {'chunks': 0, 'encoded': 0, 'deduplicated': 0, 'cache_hits': 0}
+
         # Auto-detect device or use override
         self.device = device if device else detect_device(verbose=False)
-        self.dtype = get_optimal_dtype(self.device)
+        self.dtype = get_optimal_dtype(self.device, cpu_bf16=cpu_bf16)
 
         if not self.db_path.exists():
             raise FileNotFoundError(f"Database not found: {db_path}")
+
+        # Measured tokens/s per model/device/host, written by --benchmark and read by --estimate
+        self.throughput_profile_path = self.db_path.parent / 'embedding-throughput.json'
     
     def load_model(self):
         """Load the sentence transformer model"""
         print(f"Loading model: {self.model_name}...")
         print(f"  Device: {self.device.upper()}")
-        print(f"  Precision: {self.dtype}")
+        print(f"  Precision: {self.dtype}{' (autocast)' if self.device == 'cpu' and self.dtype != torch.float32 else ''}")
 
         if self.device == 'cuda':
             gpu_info = get_gpu_info()
@@ -107,22 +250,44 @@ class EmbeddingGenerator:
 
         start_time = time.time()
 
-        # Load model with trust_remote_code for Qwen models
+        # Load model with trust_remote_code for Qwen models, applying the chosen precision
         self.model = SentenceTransformer(
             self.model_name,
             device=self.device,
-            trust_remote_code=True
+            trust_remote_code=True,
+            model_kwargs=get_model_kwargs(self.device, self.dtype)
         )
 
         duration = time.time() - start_time
         print(f"✓ Model loaded in {duration:.1f}s")
         print(f"  Embedding dimension: {self.model.get_sentence_embedding_dimension()}")
     
-    def connect_db(self):
-        """Connect to SQLite database"""
+    def connect_db(self, read_only: bool = False):
+        """Connect to SQLite database (read_only: never modify it, e.g. for estimates)"""
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            return
         self.conn = sqlite3.connect(str(self.db_path))
         self.conn.execute("PRAGMA foreign_keys = ON")
+
+    def ensure_schema(self):
+        """Create embedding tables missing from databases built with an older schema"""
+        # schema.sql is idempotent (CREATE ... IF NOT EXISTS throughout)
+        self.conn.executescript(SCHEMA_PATH.read_text())
+
+        self.blob_tables = {table for table, _ in EMBEDDING_TABLES.values()
+                            if has_blob_column(self.conn, table)}
+        if self.storage_format != 'json' and len(self.blob_tables) < len(EMBEDDING_TABLES):
+            print("  Note: some embedding tables predate embedding_blob; writing JSON there "
+                  "(run migrate_embeddings.py to convert)")
     
+    def _embedding_rows(self, kind: str) -> str:
+        """Source of a kind's embedding rows for queries (empty if its table does not exist yet)"""
+        table, fk = EMBEDDING_TABLES[kind]
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+            return table
+        return f"(SELECT NULL AS id, NULL AS {fk}, NULL AS embedding_model WHERE 0)"
+
     def close_db(self):
         """Close database connection"""
         if self.conn:
@@ -134,10 +299,10 @@ class EmbeddingGenerator:
         cursor = self.conn.cursor()
         
         # Find sections without embeddings for this model
-        query = """
+        query = f"""
             SELECT s.id, s.section_number, s.title, s.content, s.language
             FROM sections s
-            LEFT JOIN section_embeddings e 
+            LEFT JOIN {self._embedding_rows('sections')} e 
                 ON s.id = e.section_id 
                 AND e.embedding_model = ?
             WHERE e.id IS NULL
@@ -153,42 +318,237 @@ class EmbeddingGenerator:
         cursor.execute(query, params)
         return cursor.fetchall()
     
+    def get_items_without_embeddings(self, kind: str, language: Optional[str] = None) -> List[Tuple[int, str, str]]:
+        """
+        Get items of a kind that don't have embeddings yet.
+
+        Returns:
+            List of (item_id, language, text_to_embed)
+        """
+        if kind == 'sections':
+            return [(section_id, lang, f"{title}\n\n{content}")
+                    for section_id, section_num, title, content, lang
+                    in self.get_sections_without_embeddings(language)]
+
+        fk = EMBEDDING_TABLES[kind][1]
+        cursor = self.conn.cursor()
+
+        # Prefix each item with its section title so snippets carry their context
+        if kind == 'code':
+            query = f"""
+                SELECT ce.id, ce.language, s.title, ce.description, ce.code
+                FROM code_examples ce
+                JOIN sections s ON ce.section_id = s.id
+                LEFT JOIN {self._embedding_rows(kind)} e
+                    ON ce.id = e.{fk}
+                    AND e.embedding_model = ?
+                WHERE e.id IS NULL
+            """
+            lang_column = 'ce.language'
+        else:
+            query = f"""
+                SELECT t.id, t.language, s.title, t.caption, t.markdown
+                FROM tables t
+                JOIN sections s ON t.section_id = s.id
+                LEFT JOIN {self._embedding_rows(kind)} e
+                    ON t.id = e.{fk}
+                    AND e.embedding_model = ?
+                WHERE e.id IS NULL
+            """
+            lang_column = 't.language'
+        params = [self.model_name]
+
+        if language:
+            query += f" AND {lang_column} = ?"
+            params.append(language)
+
+        query += f" ORDER BY {lang_column}, 1"
+
+        cursor.execute(query, params)
+        return [(item_id, lang, '\n\n'.join(part for part in (title, caption, body) if part))
+                for item_id, lang, title, caption, body in cursor.fetchall()]
+
+    def sample_sections(self, sample_size: int, language: Optional[str] = None, seed: int = 0) -> List[Tuple]:
+        """Get a reproducible random sample of sections (read-only, ignores existing embeddings)"""
+        cursor = self.conn.cursor()
+
+        query = "SELECT id, section_number, title, content, language FROM sections"
+        params = []
+
+        if language:
+            query += " WHERE language = ?"
+            params.append(language)
+
+        query += " ORDER BY id"
+
+        cursor.execute(query, params)
+        sections = cursor.fetchall()
+
+        if len(sections) <= sample_size:
+            return sections
+
+        return random.Random(seed).sample(sections, sample_size)
+
+    def section_chunks(self, title: str, content: str) -> List[str]:
+        """Build the text chunks that are encoded for a section"""
+        # Combine title and content for embedding (use full content, no truncation)
+        # Qwen3-Embedding-0.6B supports up to 8192 tokens (~6000 chars)
+        text = f"{title}\n\n{content}"
+
+        # Chunk text if it's too large
+        return chunk_text(text, chunk_size=6000, overlap=600)
+
+    def set_precision(self, dtype: torch.dtype):
+        """Switch the loaded model to another precision (CPU bfloat16 uses autocast over float32 weights)"""
+        self.dtype = dtype
+        if self.device == 'cpu' and dtype == torch.bfloat16:
+            self.model.to(torch.float32)
+        else:
+            self.model.to(dtype)
+
+    @property
+    def precision(self) -> str:
+        """Inference precision as keyed in the chunk caches, e.g. 'float32' or 'bfloat16-autocast'"""
+        name = str(self.dtype).replace('torch.', '')
+        return f"{name}-autocast" if self.device == 'cpu' and self.dtype != torch.float32 else name
+
+    def encode_chunks(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Encode texts to normalized embeddings at the configured precision"""
+        # Use torch.no_grad() to prevent gradient graph building (inference best practice)
+        with torch.no_grad(), autocast_context(self.device, self.dtype):
+            # normalize_embeddings=True improves retrieval performance
+            return self.model.encode(
+                texts,
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                normalize_embeddings=True
+            )
+
+    def embed_chunk_groups(self, chunk_groups: List[List[str]]) -> List[np.ndarray]:
+        """
+        Embed groups of chunks, encoding each distinct chunk only once.
+
+        Chunks are keyed by hash(model, text). Chunks already seen in this run
+        or present in the persistent chunk cache are not re-encoded; the
+        results are fanned back out and averaged per group.
+
+        Args:
+            chunk_groups: One list of chunks per item (e.g. per section)
+
+        Returns:
+            One averaged embedding per group
+        """
+        group_hashes = []
+        pending = {}  # hash -> chunk text still to resolve (dict keeps first-seen order)
+
+        for chunks in chunk_groups:
+            hashes = []
+            for chunk in chunks:
+                h = chunk_hash(self.model_name, chunk, self.precision)
+                hashes.append(h)
+                self.dedup_stats['chunks'] += 1
+
+                if h in self.run_chunk_embeddings or h in pending:
+                    self.dedup_stats['deduplicated'] += 1
+                else:
+                    pending[h] = chunk
+            group_hashes.append(hashes)
+
+        # Resolve from the persistent cache before encoding
+        if pending and self.chunk_cache:
+            cached = self.chunk_cache.get_many(pending.keys())
+            for h, embedding in cached.items():
+                self.run_chunk_embeddings[h] = embedding
+                del pending[h]
+            self.dedup_stats['cache_hits'] += len(cached)
+
+        if pending:
+            embeddings = self.encode_chunks(list(pending.values()))
+            new_items = list(zip(pending.keys(), embeddings))
+            self.run_chunk_embeddings.update(new_items)
+            self.dedup_stats['encoded'] += len(new_items)
+
+            if self.chunk_cache:
+                self.chunk_cache.put_many(self.model_name, new_items)
+
+        return [np.mean([self.run_chunk_embeddings[h] for h in hashes], axis=0)
+                for hashes in group_hashes]
+
+    def print_dedup_stats(self):
+        """Print chunk deduplication statistics for this run"""
+        stats = self.dedup_stats
+        if stats['chunks'] == 0:
+            return
+
+        print(f"  Chunks: {stats['chunks']} total, {stats['encoded']} encoded, "
+              f"{stats['deduplicated']} deduplicated "
+              f"({stats['deduplicated'] / stats['chunks'] * 100:.1f}%)")
+        if self.chunk_cache:
+            print(f"  Chunk cache: {stats['cache_hits']} hits ({self.chunk_cache.count()} cached chunks)")
+
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for a text"""
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        with torch.no_grad(), autocast_context(self.device, self.dtype):
+            embedding = self.model.encode(text, convert_to_numpy=True)
         return embedding.tolist()
     
     def store_embedding(self, section_id: int, language: str, embedding: List[float]):
         """Store embedding in database"""
+        self.store_item_embedding('sections', section_id, language, embedding)
+
+    def store_item_embedding(self, kind: str, item_id: int, language: str, embedding: List[float]):
+        """Store embedding for a section, code example or table"""
+        table, fk = EMBEDDING_TABLES[kind]
         cursor = self.conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO section_embeddings 
-            (section_id, language, embedding_model, embedding_json, created_at)
-            VALUES (?, ?, ?, ?, ?)
+
+        if table not in self.blob_tables:
+            cursor.execute(f"""
+                INSERT INTO {table}
+                ({fk}, language, embedding_model, embedding_json, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                item_id,
+                language,
+                self.model_name,
+                json.dumps(np.asarray(embedding).tolist()),
+                int(time.time())
+            ))
+            return
+
+        cursor.execute(f"""
+            INSERT INTO {table}
+            ({fk}, language, embedding_model, embedding_json, embedding_blob, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
         """, (
-            section_id,
+            item_id,
             language,
             self.model_name,
-            json.dumps(embedding),
+            json.dumps(np.asarray(embedding).tolist()) if self.storage_format != 'blob' else None,
+            encode_embedding(embedding, self.blob_dtype) if self.storage_format != 'json' else None,
             int(time.time())
         ))
     
     def process_sections(self, language: Optional[str] = None, batch_size: Optional[int] = None):
         """Process all sections and generate embeddings"""
-        sections = self.get_sections_without_embeddings(language)
+        return self.process_items('sections', language, batch_size)
+
+    def process_items(self, kind: str, language: Optional[str] = None, batch_size: Optional[int] = None):
+        """Generate embeddings for all items of a kind (sections, code, tables) that lack them"""
+        items = self.get_items_without_embeddings(kind, language)
+        label = ITEM_LABELS[kind]
 
-        if not sections:
+        if not items:
             lang_str = f"for {language}" if language else ""
-            print(f"No sections need embeddings {lang_str}")
+            print(f"No {label} need embeddings {lang_str}")
             return 0
 
         # Auto-adjust batch size based on device if not specified
         if batch_size is None:
             batch_size = get_optimal_batch_size(32, self.device)
 
-        total = len(sections)
-        print(f"\nGenerating embeddings for {total} sections...")
+        total = len(items)
+        print(f"\nGenerating embeddings for {total} {label}...")
         if language:
             print(f"Language: {language}")
         print(f"Model: {self.model_name}")
@@ -199,7 +559,7 @@ class EmbeddingGenerator:
         
         # Process in batches for efficiency
         for i in range(0, total, batch_size):
-            batch = sections[i:i + batch_size]
+            batch = items[i:i + batch_size]
             batch_start = time.time()
 
             # Show GPU memory before batch (if using GPU)
@@ -207,65 +567,21 @@ class EmbeddingGenerator:
                 used_before, total_mem = get_gpu_memory_info()
 
             # Prepare texts for batch encoding with chunking support
-            # Track chunks and which section they belong to
-            all_chunks = []
-            chunk_to_section_map = []  # Maps chunk index to section index in batch
-
-            for section_idx, (section_id, section_num, title, content, lang) in enumerate(batch):
-                # Combine title and content for embedding (use full content, no truncation)
-                # Qwen3-Embedding-0.6B supports up to 8192 tokens (~6000 chars)
-                text = f"{title}\n\n{content}"
-
-                # Chunk text if it's too large
-                chunks = chunk_text(text, chunk_size=6000, overlap=600)
-
-                # Add all chunks and track which section they belong to
-                for chunk in chunks:
-                    all_chunks.append(chunk)
-                    chunk_to_section_map.append(section_idx)
-
-            # Generate embeddings for all chunks in batch
-            # Use torch.no_grad() to prevent gradient graph building (inference best practice)
-            with torch.no_grad():
-                # normalize_embeddings=True improves retrieval performance
-                chunk_embeddings = self.model.encode(
-                    all_chunks,
-                    convert_to_numpy=True,
-                    show_progress_bar=False,
-                    normalize_embeddings=True
-                )
-
-            # Group chunks by section and average to get one embedding per section
-            section_embeddings = []
-            current_section_idx = 0
-            chunks_for_current_section = []
-
-            for chunk_idx, section_idx in enumerate(chunk_to_section_map):
-                if section_idx != current_section_idx:
-                    # New section encountered - average the previous section's chunks
-                    avg_embedding = np.mean(chunks_for_current_section, axis=0)
-                    section_embeddings.append(avg_embedding)
-                    chunks_for_current_section = []
-                    current_section_idx = section_idx
-
-                chunks_for_current_section.append(chunk_embeddings[chunk_idx])
-
-            # Don't forget the last section
-            if chunks_for_current_section:
-                avg_embedding = np.mean(chunks_for_current_section, axis=0)
-                section_embeddings.append(avg_embedding)
+            chunk_groups = [chunk_text(text, chunk_size=6000, overlap=600)
+                            for item_id, lang, text in batch]
+
+            # Encode distinct chunks and average to get one embedding per item
+            item_embeddings = self.embed_chunk_groups(chunk_groups)
 
             # Store embeddings and free memory immediately
-            for j, (section_id, section_num, title, content, lang) in enumerate(batch):
-                embedding = section_embeddings[j].tolist()
-                self.store_embedding(section_id, lang, embedding)
+            for j, (item_id, lang, text) in enumerate(batch):
+                self.store_item_embedding(kind, item_id, lang, item_embeddings[j])
                 processed += 1
 
-            # Explicitly delete tensors to free GPU memory immediately
+            # Explicitly delete batch data to free memory immediately
             # Don't rely on Python's garbage collector for GPU memory
-            del chunk_embeddings
-            del all_chunks
-            del section_embeddings
+            del chunk_groups
+            del item_embeddings
 
             # Commit batch
             self.conn.commit()
@@ -283,7 +599,7 @@ class EmbeddingGenerator:
             remaining = (total - processed) / rate if rate > 0 else 0
 
             progress_msg = (f"Progress: {processed}/{total} ({processed/total*100:.1f}%) | "
-                           f"Batch: {batch_rate:.1f} sections/s | "
+                           f"Batch: {batch_rate:.1f} {label}/s | "
                            f"ETA: {remaining:.0f}s")
 
             # Add GPU memory info (shows reserved memory including PyTorch cache)
@@ -292,12 +608,12 @@ class EmbeddingGenerator:
                 progress_msg += f" | GPU: {used_after:.1f}GB/{total_mem:.1f}GB"
 
             print(progress_msg)
-        
+
         total_duration = time.time() - start_time
         avg_rate = processed / total_duration
 
-        print(f"\n✓ Generated {processed} embeddings in {total_duration:.1f}s")
-        print(f"  Average rate: {avg_rate:.1f} sections/s")
+        print(f"\n✓ Generated {processed} embeddings for {label} in {total_duration:.1f}s")
+        print(f"  Average rate: {avg_rate:.1f} {label}/s")
 
         # Show GPU speedup estimate
         if self.device == 'cuda':
@@ -308,6 +624,418 @@ class EmbeddingGenerator:
 
         return processed
     
+    def _count_tokens(self, texts: List[str]) -> Tuple[int, int]:
+        """
+        Count real and padded tokens for a batch as the model would see it.
+
+        Returns:
+            Tuple of (real_tokens, padded_tokens)
+        """
+        features = self.model.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.model.max_seq_length,
+            return_tensors='np'
+        )
+        mask = features['attention_mask']
+        return int(mask.sum()), int(mask.size)
+
+    def benchmark_config(self, sections: List[Tuple], batch_size: int, warmup_batches: int = 1) -> dict:
+        """
+        Time encoding of the sampled sections with the currently loaded model.
+
+        Nothing is written to the database. Each batch is encoded with a
+        single encode() call so per-batch latency can be measured.
+
+        Peak RSS/GPU memory cover this configuration only (not earlier ones
+        in the sweep); rss_increase_mb is the growth over the RSS it started at.
+
+        Returns:
+            Dictionary with throughput, padding, latency and memory statistics
+        """
+        batches = []
+        for i in range(0, len(sections), batch_size):
+            chunks = []
+            for section_id, section_num, title, content, lang in sections[i:i + batch_size]:
+                chunks.extend(self.section_chunks(title, content))
+            batches.append((len(sections[i:i + batch_size]), chunks))
+
+        # Warm up kernels/allocator so the first timed batch is representative
+        for _, chunks in batches[:warmup_batches]:
+            self.encode_chunks(chunks, batch_size=len(chunks))
+
+        if self.device == 'cuda':
+            torch.cuda.reset_peak_memory_stats()
+        rss_tracked = reset_peak_rss()
+        rss_before = read_rss_mb()
+
+        batch_times = []
+        real_tokens = 0
+        padded_tokens = 0
+        num_chunks = 0
+
+        for _, chunks in batches:
+            real, padded = self._count_tokens(chunks)
+            real_tokens += real
+            padded_tokens += padded
+            num_chunks += len(chunks)
+
+            if self.device == 'cuda':
+                torch.cuda.synchronize()
+            batch_start = time.perf_counter()
+
+            self.encode_chunks(chunks, batch_size=len(chunks))
+
+            if self.device == 'cuda':
+                torch.cuda.synchronize()
+            batch_times.append(time.perf_counter() - batch_start)
+
+        total_time = sum(batch_times)
+        times_ms = np.array(batch_times) * 1000
+
+        result = {
+            'sections': len(sections),
+            'chunks': num_chunks,
+            'batches': len(batches),
+            'total_time_s': round(total_time, 4),
+            'sections_per_s': round(len(sections) / total_time, 2) if total_time > 0 else None,
+            'tokens_per_s': round(real_tokens / total_time, 1) if total_time > 0 else None,
+            'real_tokens': real_tokens,
+            'padded_tokens': padded_tokens,
+            'padding_ratio': round(1 - real_tokens / padded_tokens, 4) if padded_tokens else 0.0,
+            'batch_ms_p50': round(float(np.percentile(times_ms, 50)), 2),
+            'batch_ms_p95': round(float(np.percentile(times_ms, 95)), 2),
+            'peak_rss_mb': None,
+            'rss_increase_mb': None
+        }
+
+        if rss_tracked:
+            peak_rss = read_rss_mb('VmHWM')
+            result['peak_rss_mb'] = round(peak_rss, 1)
+            result['rss_increase_mb'] = round(peak_rss - rss_before, 1)
+
+        if self.device == 'cuda':
+            result['peak_gpu_mb'] = round(torch.cuda.max_memory_allocated() / (1024 ** 2), 1)
+
+        return result
+
+    def run_benchmark(
+        self,
+        language: Optional[str] = None,
+        sample_size: int = 256,
+        batch_sizes: Optional[List[int]] = None,
+        thread_counts: Optional[List[int]] = None,
+        dtypes: Optional[List[str]] = None,
+        output_path: Optional[str] = None,
+        seed: int = 0
+    ) -> dict:
+        """
+        Sweep batch sizes, thread counts and dtypes over a sample of sections.
+
+        Emits a JSON report so runs can be compared across machines and commits.
+        Progress goes to stderr so the JSON on stdout stays machine readable.
+        """
+        batch_sizes = batch_sizes or [8, 16, 32, 64]
+        dtypes = dtypes or [str(self.dtype).replace('torch.', '')]
+
+        # Thread counts only matter for CPU inference
+        if self.device == 'cpu':
+            thread_counts = thread_counts or [torch.get_num_threads()]
+        else:
+            thread_counts = [torch.get_num_threads()]
+
+        try:
+            self.connect_db()
+            sections = self.sample_sections(sample_size, language, seed)
+            if not sections:
+                raise ValueError(f"No sections found{' for ' + language if language else ''}")
+
+            print(f"Benchmarking {len(sections)} sampled sections "
+                  f"(batch sizes {batch_sizes}, threads {thread_counts}, dtypes {dtypes})",
+                  file=sys.stderr)
+
+            # Keep model loading chatter off stdout so the JSON report stays parseable
+            with contextlib.redirect_stdout(sys.stderr):
+                self.load_model()
+            original_threads = torch.get_num_threads()
+
+            runs = []
+            for dtype_name in dtypes:
+                self.set_precision(getattr(torch, dtype_name))
+
+                for threads in thread_counts:
+                    torch.set_num_threads(threads)
+
+                    for batch_size in batch_sizes:
+                        stats = self.benchmark_config(sections, batch_size)
+                        stats.update({'dtype': dtype_name, 'threads': threads, 'batch_size': batch_size})
+                        runs.append(stats)
+
+                        print(f"  dtype={dtype_name} threads={threads} batch={batch_size}: "
+                              f"{stats['sections_per_s']} sections/s | {stats['tokens_per_s']} tokens/s | "
+                              f"p50 {stats['batch_ms_p50']}ms p95 {stats['batch_ms_p95']}ms | "
+                              f"padding {stats['padding_ratio']:.1%}",
+                              file=sys.stderr)
+
+            torch.set_num_threads(original_threads)
+        finally:
+            self.close_db()
+
+        report = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': get_git_commit(),
+            'model': self.model_name,
+            'language': language or 'all',
+            'sample_size': len(sections),
+            'seed': seed,
+            'host': {
+                'platform': platform.platform(),
+                'python': platform.python_version(),
+                'torch': torch.__version__,
+                'cpu_count': os.cpu_count(),
+                'device': self.device,
+                'gpu': get_gpu_info()['name']
+            },
+            'runs': runs
+        }
+
+        # Remember the fastest configuration so --estimate can use it later
+        measured = [run for run in runs if run['tokens_per_s']]
+        if measured:
+            best = max(measured, key=lambda run: run['tokens_per_s'])
+            save_throughput_profile(self.throughput_profile_path, throughput_profile_key(self.model_name, self.device), {
+                'tokens_per_s': best['tokens_per_s'],
+                'batch_size': best['batch_size'],
+                'threads': best['threads'],
+                'dtype': best['dtype'],
+                'peak_rss_mb': best['peak_rss_mb'],
+                'rss_increase_mb': best['rss_increase_mb'],
+                'peak_gpu_mb': best.get('peak_gpu_mb'),
+                'measured_at': report['timestamp']
+            })
+
+        report_json = json.dumps(report, indent=2)
+        if output_path:
+            Path(output_path).write_text(report_json)
+            print(f"✓ Benchmark report written to {output_path}", file=sys.stderr)
+        else:
+            print(report_json)
+
+        return report
+
+    def run_parity_report(
+        self,
+        language: Optional[str] = None,
+        sample_size: int = 256,
+        top_k: int = 10,
+        output_path: Optional[str] = None,
+        seed: int = 0
+    ) -> dict:
+        """
+        Compare embeddings at the configured precision against float32.
+
+        Encodes a sample of sections twice (float32 reference, then the
+        configured precision) and reports per-section cosine agreement plus
+        how well top-k neighbour rankings within the sample are preserved.
+        Nothing is written to the database.
+        """
+        target_dtype = self.dtype
+
+        try:
+            self.connect_db()
+            sections = self.sample_sections(sample_size, language, seed)
+            if not sections:
+                raise ValueError(f"No sections found{' for ' + language if language else ''}")
+
+            # Compare one text per section (the first chunk) so rows stay aligned with sections
+            texts = [self.section_chunks(title, content)[0]
+                     for section_id, section_num, title, content, lang in sections]
+
+            self.dtype = torch.float32
+            with contextlib.redirect_stdout(sys.stderr):
+                self.load_model()
+
+            print(f"Encoding {len(texts)} sections in float32 (reference)...", file=sys.stderr)
+            start = time.perf_counter()
+            reference = self.encode_chunks(texts).astype(np.float32)
+            reference_time = time.perf_counter() - start
+
+            self.set_precision(target_dtype)
+            print(f"Encoding {len(texts)} sections in {target_dtype}...", file=sys.stderr)
+            start = time.perf_counter()
+            candidate = self.encode_chunks(texts).astype(np.float32)
+            candidate_time = time.perf_counter() - start
+        finally:
+            self.close_db()
+
+        # Both sets are L2-normalized, so the row-wise dot product is cosine similarity
+        cosines = np.sum(reference * candidate, axis=1)
+
+        # Neighbour ranking agreement within the sample
+        k = min(top_k, len(texts) - 1)
+        overlaps = []
+        if k > 0:
+            ref_sims = reference @ reference.T
+            cand_sims = candidate @ candidate.T
+            np.fill_diagonal(ref_sims, -np.inf)
+            np.fill_diagonal(cand_sims, -np.inf)
+            ref_top = np.argpartition(-ref_sims, k, axis=1)[:, :k]
+            cand_top = np.argpartition(-cand_sims, k, axis=1)[:, :k]
+            overlaps = [len(set(r) & set(c)) / k for r, c in zip(ref_top, cand_top)]
+
+        report = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': get_git_commit(),
+            'model': self.model_name,
+            'device': self.device,
+            'dtype': str(target_dtype).replace('torch.', ''),
+            'autocast': self.device == 'cpu' and target_dtype == torch.bfloat16,
+            'sample_size': len(texts),
+            'cosine_mean': round(float(cosines.mean()), 6),
+            'cosine_min': round(float(cosines.min()), 6),
+            'cosine_p5': round(float(np.percentile(cosines, 5)), 6),
+            'max_abs_diff': round(float(np.abs(reference - candidate).max()), 6),
+            f'top{k}_overlap_mean': round(float(np.mean(overlaps)), 4) if overlaps else None,
+            'float32_time_s': round(reference_time, 3),
+            'dtype_time_s': round(candidate_time, 3),
+            'speedup': round(reference_time / candidate_time, 2) if candidate_time > 0 else None
+        }
+
+        report_json = json.dumps(report, indent=2)
+        if output_path:
+            Path(output_path).write_text(report_json)
+            print(f"✓ Parity report written to {output_path}", file=sys.stderr)
+        else:
+            print(report_json)
+
+        return report
+
+    def estimate_job(
+        self,
+        language: Optional[str] = None,
+        kinds: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        tokens_per_s: Optional[float] = None
+    ) -> dict:
+        """
+        Estimate the cost of an embedding run without loading model weights.
+
+        Tokenizes every pending chunk with the model's tokenizer to get token
+        and chunk counts per language, then combines them with a throughput
+        figure (--tokens-per-s, or the one stored by --benchmark for this
+        model/device/host) for an ETA, and with the model config for a
+        peak-memory estimate.
+        """
+        from transformers import AutoConfig, AutoTokenizer
+
+        kinds = kinds or list(EMBEDDING_TABLES)
+        if batch_size is None:
+            batch_size = get_optimal_batch_size(32, self.device)
+
+        print(f"Loading tokenizer and config for {self.model_name} (no weights)...")
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name, trust_remote_code=True)
+        config = AutoConfig.from_pretrained(self.model_name, trust_remote_code=True)
+        # Chunks are truncated where encoding truncates them, which is usually well
+        # below the position limit in the model config
+        if self.model is not None:
+            max_length = self.model.max_seq_length
+        else:
+            max_length = read_max_seq_length(self.model_name)
+        max_length = max_length or 8192
+
+        per_language = {}
+        seen_hashes = set()
+
+        try:
+            # Read-only: an estimate must not create tables (missing ones count as no embeddings)
+            self.connect_db(read_only=True)
+
+            for kind in kinds:
+                for item_id, lang, text in self.get_items_without_embeddings(kind, language):
+                    stats = per_language.setdefault(lang, {
+                        'items': 0, 'chunks': 0, 'distinct_chunks': 0,
+                        'tokens': 0, 'encoded_tokens': 0, 'max_chunk_tokens': 0
+                    })
+                    stats['items'] += 1
+
+                    chunks = chunk_text(text, chunk_size=6000, overlap=600)
+                    lengths = [len(ids) for ids in tokenizer(
+                        chunks, truncation=True, max_length=max_length)['input_ids']]
+
+                    for chunk, length in zip(chunks, lengths):
+                        stats['chunks'] += 1
+                        stats['tokens'] += length
+                        stats['max_chunk_tokens'] = max(stats['max_chunk_tokens'], length)
+
+                        # Repeated chunks are only encoded once (see embed_chunk_groups)
+                        h = chunk_hash(self.model_name, chunk, self.precision)
+                        if h not in seen_hashes:
+                            seen_hashes.add(h)
+                            stats['distinct_chunks'] += 1
+                            stats['encoded_tokens'] += length
+        finally:
+            self.close_db()
+
+        totals = {key: sum(stats[key] for stats in per_language.values())
+                  for key in ('items', 'chunks', 'distinct_chunks', 'tokens', 'encoded_tokens')}
+        max_chunk_tokens = max((stats['max_chunk_tokens'] for stats in per_language.values()), default=0)
+
+        # Throughput: explicit figure, else stored benchmark measurement for this host
+        stored = load_throughput_profile(self.throughput_profile_path).get(
+            throughput_profile_key(self.model_name, self.device))
+        source = 'command line'
+        if tokens_per_s is None and stored:
+            tokens_per_s = stored['tokens_per_s']
+            source = f"benchmark {stored['measured_at']}"
+
+        eta_s = totals['encoded_tokens'] / tokens_per_s if tokens_per_s else None
+
+        # Peak memory: weights + activations of one layer for the largest batch.
+        # Parameter count approximates attention + gated MLP blocks plus embeddings.
+        hidden = config.hidden_size
+        layers = config.num_hidden_layers
+        intermediate = getattr(config, 'intermediate_size', 4 * hidden)
+        heads = config.num_attention_heads
+        params = config.vocab_size * hidden + layers * (4 * hidden * hidden + 3 * hidden * intermediate)
+
+        dtype_bytes = torch.finfo(self.dtype).bits // 8
+        weight_bytes = params * (4 if self.device == 'cpu' else dtype_bytes)  # CPU keeps float32 weights
+        activation_bytes = batch_size * max_chunk_tokens * (
+            (intermediate + 4 * hidden) + heads * max_chunk_tokens) * dtype_bytes
+        peak_gb = (weight_bytes + activation_bytes) / (1024 ** 3)
+
+        print(f"\nEstimate for {self.model_name} on {self.device.upper()} ({self.dtype}), batch size {batch_size}, "
+              f"max {max_length} tokens per chunk")
+        print(f"  {'Language':<15}{'Items':>8}{'Chunks':>8}{'Distinct':>10}{'Tokens':>12}{'Max/chunk':>11}")
+        for lang, stats in sorted(per_language.items()):
+            print(f"  {lang:<15}{stats['items']:>8}{stats['chunks']:>8}{stats['distinct_chunks']:>10}"
+                  f"{stats['tokens']:>12}{stats['max_chunk_tokens']:>11}")
+        print(f"  {'total':<15}{totals['items']:>8}{totals['chunks']:>8}{totals['distinct_chunks']:>10}"
+              f"{totals['tokens']:>12}{max_chunk_tokens:>11}")
+
+        if eta_s is not None:
+            print(f"\n  Throughput: {tokens_per_s:,.0f} tokens/s ({source})")
+            print(f"  ETA: {eta_s / 60:.1f} minutes for {totals['encoded_tokens']:,} encoded tokens")
+        else:
+            print("\n  ETA: unknown - no throughput recorded for this host. "
+                  "Run --benchmark once or pass --tokens-per-s")
+
+        print(f"  Peak memory (upper-bound estimate): {peak_gb:.1f} GB "
+              f"(weights {weight_bytes / (1024 ** 3):.1f} GB + activations {activation_bytes / (1024 ** 3):.1f} GB)")
+        if stored and stored.get('peak_rss_mb'):
+            print(f"  Peak RSS of the fastest benchmarked configuration: {stored['peak_rss_mb']:.0f} MB"
+                  + (f", GPU: {stored['peak_gpu_mb']:.0f} MB" if stored.get('peak_gpu_mb') else ''))
+
+        return {
+            'per_language': per_language,
+            'totals': totals,
+            'tokens_per_s': tokens_per_s,
+            'eta_s': eta_s,
+            'peak_memory_gb': peak_gb,
+            'max_seq_length': max_length
+        }
+
     def get_embedding_stats(self) -> dict:
         """Get statistics about embeddings in database"""
         cursor = self.conn.cursor()
@@ -341,8 +1069,11 @@ class EmbeddingGenerator:
             'model': self.model_name
         }
     
-    def run(self, language: Optional[str] = None, batch_size: Optional[int] = None):
+    def run(self, language: Optional[str] = None, batch_size: Optional[int] = None,
+            kinds: Optional[List[str]] = None):
         """Main execution"""
+        kinds = kinds or list(EMBEDDING_TABLES)
+
         print("=" * 70)
         print("Athens HDL MCP - Embedding Generator")
         print("=" * 70)
@@ -357,7 +1088,12 @@ class EmbeddingGenerator:
             # Connect to database
             print(f"\nConnecting to database: {self.db_path}")
             self.connect_db()
+            self.ensure_schema()
             print("✓ Connected")
+
+            if self.chunk_cache_path:
+                self.chunk_cache = ChunkEmbeddingCache(self.chunk_cache_path)
+                print(f"✓ Chunk cache: {self.chunk_cache_path} ({self.chunk_cache.count()} cached chunks)")
             
             # Show current stats
             stats = self.get_embedding_stats()
@@ -367,16 +1103,27 @@ class EmbeddingGenerator:
                 for lang, count in stats['by_language'].items():
                     print(f"  {lang}: {count}")
             
-            # Process sections
-            processed = self.process_sections(language, batch_size)
-            
+            # Process sections, code examples and tables
+            processed = {kind: self.process_items(kind, language, batch_size) for kind in kinds}
+            self.print_dedup_stats()
+
+            if any(processed.values()):
+                # Tell running servers (vector store, result cache) the embeddings changed;
+                # the manifest checksums every row, so it is written once per run
+                bump_generation(self.conn)
+                self.conn.commit()
+                write_index_manifest(self.conn, self.db_path, 'generate_embeddings.py')
+
             # Show final stats
-            if processed > 0:
+            if processed.get('sections', 0) > 0:
                 stats = self.get_embedding_stats()
                 print(f"\nFinal embeddings: {stats['total_embeddings']}/{stats['total_sections']} "
                       f"({stats['coverage']:.1f}% coverage)")
                 for lang, count in stats['by_language'].items():
                     print(f"  {lang}: {count}")
+            for kind in kinds:
+                if kind != 'sections' and processed[kind] > 0:
+                    print(f"  {ITEM_LABELS[kind]}: {processed[kind]} new embeddings")
             
             print("\n" + "=" * 70)
             print("✓ Embedding Generation Complete")
@@ -389,6 +1136,9 @@ class EmbeddingGenerator:
             sys.exit(1)
         finally:
             self.close_db()
+            if self.chunk_cache:
+                self.chunk_cache.close()
+                self.chunk_cache = None
 
 
 def main():
@@ -422,11 +1172,116 @@ def main():
         default=None,
         help='Force device (default: auto-detect)'
     )
+    parser.add_argument(
+        '--cpu-bf16',
+        action='store_true',
+        help='Run CPU inference under bfloat16 autocast (requires native AVX512-BF16/AMX)'
+    )
+    parser.add_argument(
+        '--kinds',
+        default='sections,code,tables',
+        help='Comma-separated items to embed: sections, code, tables (default: all)'
+    )
+    parser.add_argument(
+        '--chunk-cache',
+        default=None,
+        help='Persistent chunk-embedding cache file, reused across runs (default: per-run dedup only)'
+    )
+    parser.add_argument(
+        '--storage-format',
+        choices=STORAGE_FORMATS,
+        default='blob',
+        help='How to store embeddings: binary blob, legacy JSON, or both (default: blob)'
+    )
+    parser.add_argument(
+        '--blob-dtype',
+        choices=['float32', 'float16'],
+        default='float32',
+        help='Precision of stored binary embeddings (default: float32)'
+    )
+    parser.add_argument(
+        '--parity',
+        action='store_true',
+        help='Report embedding parity of the selected precision against float32 (no database writes)'
+    )
+    parser.add_argument(
+        '--estimate',
+        action='store_true',
+        help='Dry run: tokenize pending items and print token counts, ETA and peak memory (no model weights)'
+    )
+    parser.add_argument(
+        '--tokens-per-s',
+        type=float,
+        default=None,
+        help='Throughput to use for --estimate (default: last --benchmark result for this host)'
+    )
+    parser.add_argument(
+        '--benchmark',
+        action='store_true',
+        help='Measure encoding throughput on sampled sections without writing to the database'
+    )
+    parser.add_argument(
+        '--benchmark-samples',
+        type=int,
+        default=256,
+        help='Number of sections to sample for --benchmark/--parity (default: 256)'
+    )
+    parser.add_argument(
+        '--benchmark-batch-sizes',
+        default='8,16,32,64',
+        help='Comma-separated batch sizes to sweep (default: 8,16,32,64)'
+    )
+    parser.add_argument(
+        '--benchmark-threads',
+        default=None,
+        help='Comma-separated CPU thread counts to sweep (default: current torch setting)'
+    )
+    parser.add_argument(
+        '--benchmark-dtypes',
+        default=None,
+        help='Comma-separated dtypes to sweep, e.g. float32,bfloat16 (default: optimal for device)'
+    )
+    parser.add_argument(
+        '--benchmark-output',
+        default=None,
+        help='Write the JSON --benchmark/--parity report to this file (default: stdout)'
+    )
 
     args = parser.parse_args()
 
-    generator = EmbeddingGenerator(args.db, args.model, device=args.device)
-    generator.run(args.language, args.batch_size)
+    generator = EmbeddingGenerator(args.db, args.model, device=args.device, cpu_bf16=args.cpu_bf16,
+                                   chunk_cache_path=args.chunk_cache, storage_format=args.storage_format,
+                                   blob_dtype=args.blob_dtype)
+
+    kinds = args.kinds.split(',')
+    invalid = [kind for kind in kinds if kind not in EMBEDDING_TABLES]
+    if invalid:
+        parser.error(f"invalid --kinds value(s): {', '.join(invalid)}")
+
+    if args.estimate:
+        generator.estimate_job(args.language, kinds, args.batch_size, args.tokens_per_s)
+        return
+
+    if args.parity:
+        generator.run_parity_report(
+            language=args.language,
+            sample_size=args.benchmark_samples,
+            output_path=args.benchmark_output
+        )
+        return
+
+    if args.benchmark:
+        generator.run_benchmark(
+            language=args.language,
+            sample_size=args.benchmark_samples,
+            batch_sizes=[int(b) for b in args.benchmark_batch_sizes.split(',')],
+            thread_counts=[int(t) for t in args.benchmark_threads.split(',')] if args.benchmark_threads else None,
+            dtypes=args.benchmark_dtypes.split(',') if args.benchmark_dtypes else None,
+            output_path=args.benchmark_output
+        )
+        return
+
+    generator.run(args.language, args.batch_size, kinds)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Hybrid full-text (BM25) and vector search over LRM sections.
+
+Vector search is weak on exact identifiers such as `$fwrite` or
+`std_logic_vector`, which the sections_fts FTS5 index (see schema.sql) finds
+directly. A hybrid search runs the FTS5 bm25() query in a worker thread while
+the query is encoded and scanned, then fuses the two rankings with
+reciprocal-rank fusion (RRF): score = sum over rankings of 1 / (RRF_K + rank).
+
+With prefilter=True the FTS hits become the candidate set and the vector scan
+only scores those rows; if full-text search finds nothing, the full vector
+scan is used instead. Rows passing section filters (VectorStore.filter_rows)
+restrict both rankings.
+
+Every search reports per-stage timings (encode, fts, vector, fuse, total).
+"""
+
+import re
+import sqlite3
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vector_store import VectorStore, normalize_query
+
+
+# Rank offset of reciprocal-rank fusion (60 is the usual choice; damps the top ranks' dominance)
+RRF_K = 60
+
+# bm25() column weights for sections_fts(section_number, title, content): title matches count most
+BM25_WEIGHTS = (2.0, 4.0, 1.0)
+
+# Hits taken from each ranking before fusion
+DEFAULT_CANDIDATES = 100
+
+
+def fts_match_expression(text: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Each whitespace-separated term becomes a quoted phrase (so `$fwrite`,
+    `std_logic_vector` or `a.b` cannot be parsed as FTS5 syntax), joined with
+    OR; bm25() ranks sections matching more terms higher.
+
+    Returns:
+        The expression, or None if the text has no searchable terms
+    """
+    terms = [term for term in text.split() if re.search(r'\w', term)]
+    if not terms:
+        return None
+    return ' OR '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def bm25_search(
+    conn: sqlite3.Connection,
+    text: str,
+    languages: Optional[List[str]],
+    k: int
+) -> List[Tuple[str, int, float]]:
+    """
+    Full-text search over sections_fts.
+
+    Args:
+        conn: Database connection
+        text: Query text
+        languages: Languages to search (None = all)
+        k: Number of results
+
+    Returns:
+        List of (language, section_id, bm25 score), best first (higher is better)
+    """
+    expression = fts_match_expression(text)
+    if expression is None or (languages is not None and not languages):
+        return []
+
+    language_filter = ''
+    params = [expression]
+    if languages is not None:
+        language_filter = f"AND s.language IN ({','.join('?' * len(languages))})"
+        params.extend(languages)
+    params.append(k)
+
+    rows = conn.execute(f"""
+        SELECT s.language, s.id, bm25(sections_fts, {', '.join(map(str, BM25_WEIGHTS))}) AS rank
+        FROM sections_fts
+        JOIN sections s ON sections_fts.rowid = s.id
+        WHERE sections_fts MATCH ?
+            {language_filter}
+        ORDER BY rank
+        LIMIT ?
+    """, params).fetchall()
+
+    # bm25() is lower-is-better; negate so every score in this module is higher-is-better
+    return [(language, item_id, -rank) for language, item_id, rank in rows]
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = RRF_K) -> List[Tuple[int, float]]:
+    """
+    Fuse several rankings of item ids.
+
+    Returns:
+        List of (item_id, fused score), best first
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def hybrid_search(
+    store: VectorStore,
+    text: str,
+    encode: Callable[[str], np.ndarray],
+    k: int,
+    languages: Optional[List[str]] = None,
+    prefilter: bool = False,
+    candidates: int = DEFAULT_CANDIDATES,
+    executor: Optional[Executor] = None,
+    rows: Optional[np.ndarray] = None
+) -> dict:
+    """
+    Search sections with BM25 and vectors concurrently and fuse the rankings.
+
+    Args:
+        store: Vector store over the database
+        text: Query text
+        encode: Function returning the (normalized) query embedding
+        k: Number of fused results
+        languages: Languages to search (None = all)
+        prefilter: Score only the full-text hits with the vector scan
+        candidates: Hits taken from each ranking before fusion
+        executor: Runs the full-text query (default: a temporary thread)
+        rows: Only these matrix rows may be returned (section filters)
+
+    Returns:
+        Dict with 'hits' ([{id, language, score, similarity, bm25_rank, vector_rank}]
+        best first) and 'timing_ms' per stage
+    """
+    start = time.perf_counter()
+    timing = {}
+
+    def run_fts():
+        fts_start = time.perf_counter()
+        conn = store.connect()
+        try:
+            return bm25_search(conn, text, languages, candidates)
+        finally:
+            conn.close()
+            timing['fts'] = (time.perf_counter() - fts_start) * 1000
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        fts_future = executor.submit(run_fts)
+
+        encode_start = time.perf_counter()
+        query = encode(text)
+        timing['encode'] = (time.perf_counter() - encode_start) * 1000
+
+        multi = store.get_multi_matrix('sections')
+
+        def vector_search():
+            if rows is not None:
+                return multi.search_rows(query, rows, candidates)
+            return multi.search(query, candidates, languages)['merged']
+
+        if not prefilter:
+            # Runs while the full-text query is still in flight
+            vector_start = time.perf_counter()
+            vector_hits = vector_search()
+            timing['vector'] = (time.perf_counter() - vector_start) * 1000
+
+        fts_hits = fts_future.result()
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+
+    if rows is not None:
+        allowed = set(multi.ids[rows].tolist())
+        fts_hits = [hit for hit in fts_hits if hit[1] in allowed]
+
+    if prefilter:
+        vector_start = time.perf_counter()
+        if fts_hits:
+            fts_rows = np.sort(multi.rows_for_ids([item_id for _, item_id, _ in fts_hits]))
+            vector_hits = multi.search_rows(query, fts_rows, len(fts_rows))
+        else:
+            vector_hits = vector_search()
+        timing['vector'] = (time.perf_counter() - vector_start) * 1000
+
+    fuse_start = time.perf_counter()
+    bm25_ranks = {item_id: rank for rank, (_, item_id, _) in enumerate(fts_hits, start=1)}
+    vector_ranks = {item_id: rank for rank, (_, item_id, _) in enumerate(vector_hits, start=1)}
+    similarities = {item_id: similarity for _, item_id, similarity in vector_hits}
+    item_languages = {item_id: language for language, item_id, _ in fts_hits + vector_hits}
+
+    fused = reciprocal_rank_fusion([list(bm25_ranks), list(vector_ranks)])[:k]
+
+    # Full-text-only hits still get a cosine similarity (one small gather)
+    missing = [item_id for item_id, _ in fused if item_id not in similarities]
+    missing_rows = multi.rows_for_ids(missing)
+    if len(missing_rows):
+        scores = multi.matrix[missing_rows] @ normalize_query(query)
+        similarities.update((int(multi.ids[r]), float(score)) for r, score in zip(missing_rows, scores))
+
+    hits = [{
+        'id': item_id,
+        'language': item_languages[item_id],
+        'score': score,
+        'similarity': similarities.get(item_id),
+        'bm25_rank': bm25_ranks.get(item_id),
+        'vector_rank': vector_ranks.get(item_id)
+    } for item_id, score in fused]
+    timing['fuse'] = (time.perf_counter() - fuse_start) * 1000
+    timing['total'] = (time.perf_counter() - start) * 1000
+
+    return {
+        'hits': hits,
+        'timing_ms': {stage: round(ms, 2) for stage, ms in timing.items()}
+    }
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Hot reload of the embedding server's vector store.
+
+IndexReloader polls the database's index manifest (see
+utils/index_manifest.py), which parse_lrm.py and the embedding tools rewrite
+after every change. When it changes, a replacement VectorStore is built in
+the background with VectorStore.reloaded(): loaded sets are caught up with
+the changes and everything in use is warmed. The new store is then handed to
+on_swap, which rebinds one reference. Requests that already hold the old
+store finish against it, new requests use the new one, and the model never
+reloads.
+
+A manifest whose embedding dimension for the served model differs from the
+model's own dimension is refused (the old store keeps serving).
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.index_manifest import manifest_path, read_index_manifest
+from vector_store import VectorStore
+
+
+# Seconds between manifest checks
+MANIFEST_POLL_INTERVAL_S = 1.0
+
+
+class IndexReloader:
+    """Watches a database's manifest and swaps in a freshly loaded VectorStore when it changes"""
+
+    def __init__(
+        self,
+        store: VectorStore,
+        on_swap: Callable[[VectorStore], None],
+        dimension: Optional[int] = None,
+        interval: float = MANIFEST_POLL_INTERVAL_S
+    ):
+        """
+        Args:
+            store: Store currently serving
+            on_swap: Called with each replacement store (must publish it atomically)
+            dimension: Embedding dimension of the served model (checked against the manifest)
+            interval: Seconds between manifest checks
+        """
+        self.store = store
+        self.on_swap = on_swap
+        self.dimension = dimension
+        self.interval = interval
+        self.path = manifest_path(store.db_path)
+        self.manifest = read_index_manifest(store.db_path)
+        self._stamp = self._file_stamp()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.reloads = 0
+        self.last_reload: Optional[dict] = None
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        """Start watching in a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name='index-reloader', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Index reload failed: {e}", file=sys.stderr)
+
+    def _file_stamp(self) -> Optional[tuple]:
+        """Identity of the manifest file as written (it is replaced atomically, never edited)"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def poll(self) -> bool:
+        """
+        Reload if the manifest has been rewritten since the last check.
+
+        Returns:
+            True if a new store was swapped in
+        """
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+
+        manifest = read_index_manifest(self.store.db_path)
+        if manifest is None:
+            return False
+        return self.reload(manifest)
+
+    def check(self, manifest: dict) -> Optional[str]:
+        """Reason a manifest cannot be served, or None"""
+        model = manifest.get('embeddings', {}).get(self.store.model_name)
+        if model is not None and self.dimension and model['dimension'] != self.dimension:
+            return (f"{self.store.model_name} embeddings in the database have dimension {model['dimension']}, "
+                    f"the loaded model produces {self.dimension}")
+        return None
+
+    def reload(self, manifest: dict) -> bool:
+        """
+        Build a store for a manifest in this thread and swap it in.
+
+        Returns:
+            True if a new store was swapped in
+        """
+        problem = self.check(manifest)
+        if problem:
+            self.last_error = problem
+            print(f"Not reloading index ({manifest.get('written_by')}): {problem}", file=sys.stderr)
+            return False
+
+        start = time.perf_counter()
+        old = self.store
+        new = old.reloaded(manifest.get('generation'))
+        loaded = time.perf_counter()
+
+        # Counts differ only if the database changed again after the manifest was written;
+        # the store still holds the newer data, and the next manifest triggers another reload
+        sets = manifest.get('embeddings', {}).get(new.model_name, {}).get('sets', {})
+        stale = [f"{stats['kind']}/{stats['language']}" for stats in new.segment_stats()
+                 if stats['rows'] != sets.get(f"{stats['kind']}/{stats['language']}", {}).get('count', 0)]
+
+        self.store = new
+        self.manifest = manifest
+        self.on_swap(new)
+        old.close()
+
+        self.reloads += 1
+        self.last_error = None
+        self.last_reload = {
+            'generation': new.generation,
+            'written_by': manifest.get('written_by'),
+            'load_ms': round((loaded - start) * 1000, 2),
+            'sets': len(new.segment_stats()),
+            'count_mismatches': stale,
+            'at': time.time()
+        }
+        print(f"Index generation {old.generation} -> {new.generation} ({manifest.get('written_by')}): "
+              f"new store swapped in after {(loaded - start) * 1000:.0f} ms", file=sys.stderr)
+        if stale:
+            print(f"  Database changed again while loading: {', '.join(stale)}", file=sys.stderr)
+        return True
+
+    def stats(self) -> dict:
+        """Reload count, last reload and last error"""
+        return {
+            'manifest': str(self.path),
+            'generation': self.manifest.get('generation') if self.manifest else None,
+            'reloads': self.reloads,
+            'last_reload': self.last_reload,
+            'last_error': self.last_error
+        }
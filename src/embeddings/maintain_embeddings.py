@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Embedding store maintenance: size report, orphan/stale pruning and compaction.
+
+clear_embeddings.py deletes rows but SQLite never gives the space back on its
+own, so the database file grows with every model experiment. This script
+reports how many bytes each model and language occupies, finds embeddings
+whose section/code/table row no longer exists (orphans) or that belong to a
+model other than the one being kept (stale), deletes them in bulk, and then
+reclaims the space with an incremental or full VACUUM, or VACUUM INTO a
+compacted copy.
+
+Usage:
+    python maintain_embeddings.py  # Size report only
+    python maintain_embeddings.py --prune --keep-model Qwen/Qwen3-Embedding-0.6B
+    python maintain_embeddings.py --prune --vacuum incremental
+    python maintain_embeddings.py --vacuum-into data/hdl-lrm.compact.db
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from embedding_codec import has_blob_column
+from utils.index_generation import bump_generation
+from utils.index_manifest import write_index_manifest
+from vector_store import EMBEDDING_TABLES
+
+
+# Source table referenced by each embedding table's foreign key
+SOURCE_TABLES = {
+    'sections': 'sections',
+    'code': 'code_examples',
+    'tables': 'tables',
+}
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count for display"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+
+
+def existing_kinds(conn: sqlite3.Connection) -> List[str]:
+    """Embedding kinds whose table exists in this database"""
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return [kind for kind, (table, _) in EMBEDDING_TABLES.items() if table in tables]
+
+
+def file_stats(conn: sqlite3.Connection, db_path: Path) -> Dict[str, int]:
+    """File size plus free (reclaimable) bytes inside the file"""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {
+        'file_bytes': db_path.stat().st_size,
+        'free_bytes': freelist * page_size,
+        'auto_vacuum': conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    }
+
+
+def size_report(conn: sqlite3.Connection) -> List[Tuple[str, str, str, int, int]]:
+    """
+    Payload bytes per embedding kind, model and language.
+
+    Returns:
+        List of (kind, model, language, rows, payload_bytes)
+    """
+    report = []
+    for kind in existing_kinds(conn):
+        table, _ = EMBEDDING_TABLES[kind]
+        payload_sql = 'LENGTH(embedding_json)'
+        if has_blob_column(conn, table):
+            payload_sql = 'IFNULL(LENGTH(embedding_json), 0) + IFNULL(LENGTH(embedding_blob), 0)'
+
+        rows = conn.execute(f"""
+            SELECT embedding_model, language, COUNT(*), SUM({payload_sql})
+            FROM {table}
+            GROUP BY embedding_model, language
+            ORDER BY embedding_model, language
+        """).fetchall()
+        report.extend((kind, model, language, count, payload or 0) for model, language, count, payload in rows)
+    return report
+
+
+def table_sizes(conn: sqlite3.Connection) -> Optional[Dict[str, int]]:
+    """On-disk bytes per table/index from the dbstat virtual table (None if SQLite lacks dbstat)"""
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC").fetchall()
+    except sqlite3.OperationalError:
+        return None
+    return dict(rows)
+
+
+def find_prunable(conn: sqlite3.Connection, keep_model: Optional[str]) -> Dict[str, Dict[str, int]]:
+    """
+    Count orphaned and stale-model embeddings per kind.
+
+    Orphans reference a section/code/table row that no longer exists (for
+    example after a reparse without foreign keys enabled). Stale rows belong
+    to a model other than keep_model.
+    """
+    counts = {}
+    for kind in existing_kinds(conn):
+        table, fk = EMBEDDING_TABLES[kind]
+        source = SOURCE_TABLES[kind]
+
+        orphans = conn.execute(f"""
+            SELECT COUNT(*) FROM {table} e
+            LEFT JOIN {source} src ON e.{fk} = src.id
+            WHERE src.id IS NULL
+        """).fetchone()[0]
+
+        stale = 0
+        if keep_model:
+            stale = conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE embedding_model != ?", (keep_model,)
+            ).fetchone()[0]
+
+        # Rows can be both orphaned and stale; count each row once for deletion
+        total = orphans
+        if keep_model:
+            total = conn.execute(f"""
+                SELECT COUNT(*) FROM {table}
+                WHERE {fk} NOT IN (SELECT id FROM {source}) OR embedding_model != ?
+            """, (keep_model,)).fetchone()[0]
+
+        counts[kind] = {'orphans': orphans, 'stale': stale, 'total': total}
+    return counts
+
+
+def prune(conn: sqlite3.Connection, keep_model: Optional[str]) -> int:
+    """Delete orphaned and stale-model embeddings in bulk (one statement per table)"""
+    deleted = 0
+    for kind in existing_kinds(conn):
+        table, fk = EMBEDDING_TABLES[kind]
+        source = SOURCE_TABLES[kind]
+
+        cursor = conn.execute(f"""
+            DELETE FROM {table}
+            WHERE {fk} NOT IN (SELECT id FROM {source})
+        """)
+        deleted += cursor.rowcount
+
+        if keep_model:
+            cursor = conn.execute(f"DELETE FROM {table} WHERE embedding_model != ?", (keep_model,))
+            deleted += cursor.rowcount
+
+    if deleted:
+        bump_generation(conn)
+    conn.commit()
+    return deleted
+
+
+def vacuum(conn: sqlite3.Connection, mode: str):
+    """
+    Reclaim free pages.
+
+    Args:
+        mode: 'incremental' (switches the file to auto_vacuum=INCREMENTAL on
+              first use, which needs one full VACUUM) or 'full'
+    """
+    if mode == 'incremental':
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            print("  Enabling auto_vacuum=INCREMENTAL (one-time full VACUUM)...")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            conn.execute("PRAGMA incremental_vacuum")
+    else:
+        conn.execute("VACUUM")
+
+
+def print_report(conn: sqlite3.Connection, db_path: Path):
+    """Print file, per-model/language and per-table sizes"""
+    stats = file_stats(conn, db_path)
+    print(f"Database: {db_path}")
+    print(f"  File size: {format_bytes(stats['file_bytes'])} "
+          f"(free pages: {format_bytes(stats['free_bytes'])}, "
+          f"auto_vacuum: {['none', 'full', 'incremental'][stats['auto_vacuum']]})")
+
+    report = size_report(conn)
+    if report:
+        print(f"\n  {'Kind':<10}{'Model':<32}{'Language':<15}{'Rows':>8}{'Payload':>12}")
+        for kind, model, language, count, payload in report:
+            print(f"  {kind:<10}{model:<32}{language:<15}{count:>8}{format_bytes(payload):>12}")
+    else:
+        print("\n  No embeddings found.")
+
+    sizes = table_sizes(conn)
+    if sizes:
+        print("\n  Largest tables/indexes on disk:")
+        for name, size in list(sizes.items())[:8]:
+            print(f"    {name:<40}{format_bytes(size):>12}")
+
+
+def maintain(
+    db_path: str,
+    do_prune: bool = False,
+    keep_model: Optional[str] = None,
+    vacuum_mode: Optional[str] = None,
+    vacuum_into: Optional[str] = None,
+    assume_yes: bool = False
+) -> int:
+    """
+    Run the maintenance steps that were requested.
+
+    Args:
+        db_path: Path to SQLite database
+        do_prune: Delete orphaned (and, with keep_model, stale-model) embeddings
+        keep_model: Model whose embeddings are kept; others count as stale
+        vacuum_mode: 'incremental' or 'full' to reclaim space in place
+        vacuum_into: Write a compacted copy to this path (VACUUM INTO)
+        assume_yes: Skip the confirmation prompt before deleting
+    """
+    db = Path(db_path)
+    if not db.exists():
+        print(f"Error: Database not found at {db_path}")
+        return 1
+
+    conn = sqlite3.connect(str(db))
+    try:
+        print_report(conn, db)
+        size_before = db.stat().st_size
+
+        prunable = find_prunable(conn, keep_model)
+        total_orphans = sum(c['orphans'] for c in prunable.values())
+        total_stale = sum(c['stale'] for c in prunable.values())
+        print(f"\n  Orphaned embeddings: {total_orphans}")
+        if keep_model:
+            print(f"  Stale-model embeddings (not '{keep_model}'): {total_stale}")
+        for kind, counts in prunable.items():
+            if counts['orphans'] or counts['stale']:
+                print(f"    {kind}: {counts['orphans']} orphaned, {counts['stale']} stale")
+
+        total = sum(c['total'] for c in prunable.values())
+        if do_prune and total:
+            if not assume_yes:
+                response = input(f"\nDelete {total} embeddings? [y/N]: ")
+                if response.lower() != 'y':
+                    print("Cancelled.")
+                    return 0
+
+            deleted = prune(conn, keep_model)
+            print(f"\n✓ Deleted {deleted} embeddings")
+            if deleted:
+                write_index_manifest(conn, db, 'maintain_embeddings.py')
+
+        if vacuum_mode:
+            print(f"\nRunning {vacuum_mode} vacuum...")
+            vacuum(conn, vacuum_mode)
+            print(f"✓ Size: {format_bytes(size_before)} -> {format_bytes(db.stat().st_size)}")
+
+        if vacuum_into:
+            target = Path(vacuum_into)
+            if target.exists():
+                print(f"Error: {vacuum_into} already exists")
+                return 1
+            print(f"\nWriting compacted copy to {target}...")
+            conn.execute("VACUUM INTO ?", (str(target),))
+            print(f"✓ Size: {format_bytes(db.stat().st_size)} -> {format_bytes(target.stat().st_size)}")
+
+    finally:
+        conn.close()
+
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Report, prune and compact embeddings in the database'
+    )
+    parser.add_argument(
+        '--db',
+        default='data/hdl-lrm.db',
+        help='Path to SQLite database (default: data/hdl-lrm.db)'
+    )
+    parser.add_argument(
+        '--prune',
+        action='store_true',
+        help='Delete orphaned embeddings (and stale-model ones when --keep-model is given)'
+    )
+    parser.add_argument(
+        '--keep-model',
+        help='Model to keep; embeddings from any other model are stale (e.g., Qwen/Qwen3-Embedding-0.6B)'
+    )
+    parser.add_argument(
+        '--vacuum',
+        choices=['incremental', 'full'],
+        help='Reclaim free space in place after pruning'
+    )
+    parser.add_argument(
+        '--vacuum-into',
+        metavar='PATH',
+        help='Write a compacted copy of the database to PATH (VACUUM INTO)'
+    )
+    parser.add_argument(
+        '--yes',
+        action='store_true',
+        help='Do not ask for confirmation before deleting'
+    )
+
+    args = parser.parse_args()
+
+    return maintain(args.db, args.prune, args.keep_model, args.vacuum, args.vacuum_into, args.yes)
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Migrate stored embeddings from JSON text to the binary embedding_blob column.
+
+Each embedding table created before embedding_blob existed is rebuilt with the
+current schema.sql definition. Rows are copied and converted in bulk with a
+single INSERT ... SELECT per table (the JSON -> blob conversion runs as a SQL
+function), all in one transaction. Tables already on the new schema just have
+any JSON-only rows converted in place.
+
+By default the JSON text is dropped after conversion (about 4x smaller);
+--keep-json keeps both representations for readers that have not been
+updated yet.
+
+Usage:
+    python migrate_embeddings.py
+    python migrate_embeddings.py --keep-json
+    python migrate_embeddings.py --dtype float16
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from embedding_codec import DTYPE_CODES, encode_embedding, has_blob_column
+from utils.index_generation import bump_generation
+from utils.index_manifest import write_index_manifest
+from vector_store import EMBEDDING_TABLES
+
+
+SCHEMA_PATH = Path(__file__).parent.parent / 'storage' / 'schema.sql'
+
+
+def schema_statements(table: str) -> List[str]:
+    """CREATE TABLE/INDEX statements for one table from schema.sql"""
+    statements = []
+    current = ''
+    for line in SCHEMA_PATH.read_text().splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statement = current.strip()
+            current = ''
+            if (f"CREATE TABLE IF NOT EXISTS {table} (" in statement
+                    or f" ON {table}(" in statement):
+                statements.append(statement)
+    return statements
+
+
+def migrate_table(conn: sqlite3.Connection, table: str, fk: str, keep_json: bool) -> int:
+    """
+    Convert one embedding table to the blob schema.
+
+    Returns:
+        Number of rows converted
+    """
+    json_value = 'embedding_json' if keep_json else 'NULL'
+
+    if has_blob_column(conn, table):
+        # Already on the new schema: convert rows that only have JSON
+        cursor = conn.execute(f"""
+            UPDATE {table}
+            SET embedding_blob = json_to_embedding_blob(embedding_json),
+                embedding_json = {json_value}
+            WHERE embedding_blob IS NULL
+        """)
+        return cursor.rowcount
+
+    # Old schema (embedding_json NOT NULL, no blob column): rebuild the table.
+    # Its indexes keep their names across a rename, so drop them first.
+    indexes = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    ).fetchall()
+    for (name,) in indexes:
+        conn.execute(f"DROP INDEX {name}")
+
+    conn.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+    for statement in schema_statements(table):
+        conn.execute(statement)
+
+    cursor = conn.execute(f"""
+        INSERT INTO {table}
+        (id, {fk}, language, embedding_model, embedding_json, embedding_blob, created_at)
+        SELECT id, {fk}, language, embedding_model, {json_value},
+               json_to_embedding_blob(embedding_json), created_at
+        FROM {table}_legacy
+    """)
+    conn.execute(f"DROP TABLE {table}_legacy")
+    return cursor.rowcount
+
+
+def migrate(db_path: str, keep_json: bool = False, dtype: str = 'float32') -> int:
+    """
+    Migrate all embedding tables in a database.
+
+    Args:
+        db_path: Path to SQLite database
+        keep_json: Keep the legacy JSON text alongside the blob
+        dtype: Stored precision of the blob ('float32' or 'float16')
+    """
+    db = Path(db_path)
+    if not db.exists():
+        print(f"Error: Database not found at {db_path}")
+        return 1
+
+    size_before = db.stat().st_size
+    conn = sqlite3.connect(str(db), isolation_level=None)
+    conn.create_function(
+        'json_to_embedding_blob', 1,
+        lambda text: encode_embedding(json.loads(text), dtype) if text is not None else None,
+        deterministic=True
+    )
+
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    print(f"Migrating embeddings in {db} to binary {dtype} "
+          f"({'keeping' if keep_json else 'dropping'} JSON)...")
+    total = 0
+    try:
+        conn.execute("BEGIN")
+        for kind, (table, fk) in EMBEDDING_TABLES.items():
+            if table not in existing:
+                continue
+            converted = migrate_table(conn, table, fk, keep_json)
+            total += converted
+            print(f"  {table}: {converted} rows converted")
+        if total:
+            bump_generation(conn)
+        conn.execute("COMMIT")
+    except Exception as e:
+        conn.execute("ROLLBACK")
+        conn.close()
+        print(f"\n✗ Migration failed, database unchanged: {e}")
+        return 1
+
+    try:
+        # Running servers reload onto the converted tables when the manifest changes
+        if total:
+            write_index_manifest(conn, db, 'migrate_embeddings.py')
+
+        if not keep_json:
+            print("\nReclaiming space (VACUUM)...")
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    print(f"\n✓ Migration complete: {size_before / 1024 / 1024:.1f} MB -> "
+          f"{db.stat().st_size / 1024 / 1024:.1f} MB")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert JSON embeddings to the binary embedding_blob column'
+    )
+    parser.add_argument(
+        '--db',
+        default='data/hdl-lrm.db',
+        help='Path to SQLite database (default: data/hdl-lrm.db)'
+    )
+    parser.add_argument(
+        '--keep-json',
+        action='store_true',
+        help='Keep embedding_json populated for readers that still need it'
+    )
+    parser.add_argument(
+        '--dtype',
+        choices=list(DTYPE_CODES),
+        default='float32',
+        help='Stored precision of the binary embeddings (default: float32)'
+    )
+
+    args = parser.parse_args()
+
+    return migrate(args.db, args.keep_json, args.dtype)
+
+
+if __name__ == '__main__':
+    exit(main())
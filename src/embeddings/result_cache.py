@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Bounded cache of complete search responses for the embedding server.
+
+A popular (query, language, k, filters, mode) request is answered from the
+cache without encoding the query or scanning the index. Keys include the
+database's index generation (see utils/index_generation.py), so entries
+computed before parse_lrm.py or generate_embeddings.py changed the data are
+never served; they are dropped as soon as a newer generation is seen.
+
+Empty results are cached too (negative entries): repeated searches for
+terms the LRMs do not contain are as cheap as hits. Hit rates are exposed by
+stats() (the server's /cache_stats endpoint).
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class ResultCache:
+    """Thread-safe LRU cache of search responses keyed by request and index generation"""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Args:
+            max_entries: Most responses kept (0 disables the cache)
+        """
+        self.max_entries = max_entries
+        self.generation: Optional[int] = None
+        self._entries: 'OrderedDict[Tuple, Tuple[dict, bool]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(generation: int, endpoint: str, params: dict) -> Tuple:
+        """Cache key of a request (params are compared as canonical JSON)"""
+        return generation, endpoint, json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+    def get(self, key: Tuple) -> Optional[dict]:
+        """Cached response for a key, or None"""
+        if self.max_entries <= 0:
+            return None
+
+        with self._lock:
+            self._drop_stale(key[0])
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            response, negative = entry
+            if negative:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return response
+
+    def put(self, key: Tuple, response: dict, negative: bool = False):
+        """
+        Store a response.
+
+        Args:
+            key: Key from make_key
+            response: JSON-serializable response (must not be modified afterwards)
+            negative: The response has no results
+        """
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._drop_stale(key[0])
+            if key[0] != self.generation:
+                return  # Computed against an older generation than the cache now holds
+
+            self._entries[key] = (response, negative)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Entry counts and hit rates"""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'negative_entries': sum(1 for _, negative in self._entries.values() if negative),
+                'max_entries': self.max_entries,
+                'generation': self.generation,
+                'lookups': lookups,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0
+            }
+
+    def _drop_stale(self, generation: int):
+        """Forget every entry once a newer index generation is seen (lock held)"""
+        if self.generation is None or generation > self.generation:
+            self._entries.clear()
+            self.generation = generation
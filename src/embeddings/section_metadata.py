@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Section metadata arrays for filtered vector search.
+
+For every row of a MultiLanguageMatrix this keeps the owning section's depth
+and page range as NumPy arrays, plus a per-language permutation of the rows in
+section-number order. Filters are then evaluated before scoring:
+
+    section   - subtree ("9" matches 9, 9.1, 9.1.2, ...): a contiguous range of
+                the section-order permutation, found with two bisects
+    min_depth / max_depth - vectorized mask on depth
+    page_from / page_to   - vectorized mask on page-range overlap
+
+so a filtered search only scores the rows that pass. Code examples and tables
+use the metadata of the section they belong to.
+"""
+
+import bisect
+import sqlite3
+from typing import List, Optional
+
+import numpy as np
+
+
+# Section metadata per item, keyed by kind (item id, section number, depth, pages)
+METADATA_QUERIES = {
+    'sections': """
+        SELECT s.id, s.section_number, s.depth, s.page_start, s.page_end
+        FROM sections s
+    """,
+    'code': """
+        SELECT ce.id, s.section_number, s.depth, s.page_start, s.page_end
+        FROM code_examples ce
+        JOIN sections s ON ce.section_id = s.id
+    """,
+    'tables': """
+        SELECT t.id, s.section_number, s.depth, s.page_start, s.page_end
+        FROM tables t
+        JOIN sections s ON t.section_id = s.id
+    """,
+}
+
+# Filters understood by SectionMetadata.filter_rows
+FILTERS = ('section', 'min_depth', 'max_depth', 'page_from', 'page_to')
+
+# Sorts after every section-number component, so key + (SUBTREE_END,) bounds a subtree
+SUBTREE_END = (2,)
+
+# Key of rows without section metadata (orphaned embeddings): after everything, never in a subtree
+UNKNOWN_KEY = ((3,),)
+
+
+def section_sort_key(section_number: str) -> tuple:
+    """
+    Document-order sort key of a section number.
+
+    '9.10' sorts after '9.2', and annex-style parts ('A.1') after numeric ones.
+    """
+    return tuple((0, int(part)) if part.isdigit() else (1, part)
+                 for part in section_number.strip().split('.'))
+
+
+class SectionMetadata:
+    """Row-aligned section metadata of one MultiLanguageMatrix"""
+
+    def __init__(self, multi, keys: List[tuple], depth: np.ndarray, page_start: np.ndarray,
+                 page_end: np.ndarray, known: np.ndarray):
+        """
+        Args:
+            multi: The MultiLanguageMatrix the arrays are aligned with
+            keys: section_sort_key per row
+            depth: Section depth per row
+            page_start: First page per row
+            page_end: Last page per row
+            known: False for rows whose item has no section metadata
+        """
+        self.multi = multi
+        self.depth = depth
+        self.page_start = page_start
+        self.page_end = page_end
+        self.known = known
+
+        # Per language: rows in section order and their keys (for bisecting subtrees)
+        self.order = {}
+        for language in multi.languages:
+            rows = multi.language_rows(language)
+            ordered = sorted(range(rows.start, rows.stop), key=keys.__getitem__)
+            self.order[language] = ([keys[r] for r in ordered], np.array(ordered, dtype=np.int64))
+
+    @classmethod
+    def from_db(cls, conn: sqlite3.Connection, kind: str, multi) -> 'SectionMetadata':
+        """Load section metadata for every row of a matrix"""
+        rows = {row[0]: row[1:] for row in conn.execute(METADATA_QUERIES[kind])}
+
+        count = len(multi)
+        keys = [UNKNOWN_KEY] * count
+        depth = np.full(count, -1, dtype=np.int32)
+        page_start = np.full(count, -1, dtype=np.int32)
+        page_end = np.full(count, -1, dtype=np.int32)
+        known = np.zeros(count, dtype=bool)
+
+        for i, item_id in enumerate(multi.ids.tolist()):
+            meta = rows.get(item_id)
+            if meta is None:
+                continue
+            section_number, depth[i], page_start[i], page_end[i] = meta
+            keys[i] = section_sort_key(section_number)
+            known[i] = True
+
+        return cls(multi, keys, depth, page_start, page_end, known)
+
+    def subtree_rows(self, language: str, section: str) -> np.ndarray:
+        """Rows of one language inside a section's subtree (a contiguous slice of the section order)"""
+        keys, rows = self.order[language]
+        key = section_sort_key(section)
+        lo = bisect.bisect_left(keys, key)
+        hi = bisect.bisect_left(keys, key + (SUBTREE_END,), lo)
+        return rows[lo:hi]
+
+    def filter_rows(
+        self,
+        languages: List[str],
+        section: Optional[str] = None,
+        min_depth: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        page_from: Optional[int] = None,
+        page_to: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Matrix rows passing all filters.
+
+        Args:
+            languages: Languages to include
+            section: Only this section and its subsections
+            min_depth: Minimum section depth
+            max_depth: Maximum section depth
+            page_from: Only sections ending on or after this page
+            page_to: Only sections starting on or before this page
+
+        Returns:
+            Sorted row indices
+        """
+        parts = []
+        for language in languages:
+            if language not in self.order:
+                continue
+            if section:
+                parts.append(self.subtree_rows(language, section))
+            else:
+                span = self.multi.language_rows(language)
+                parts.append(np.arange(span.start, span.stop, dtype=np.int64))
+
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        rows = np.concatenate(parts)
+
+        # Masks only touch the candidate rows
+        mask = self.known[rows]
+        if min_depth is not None:
+            mask &= self.depth[rows] >= min_depth
+        if max_depth is not None:
+            mask &= self.depth[rows] <= max_depth
+        if page_from is not None:
+            mask &= self.page_end[rows] >= page_from
+        if page_to is not None:
+            mask &= self.page_start[rows] <= page_to
+
+        # Sorted rows gather sequentially (and collapse to a slice when contiguous)
+        return np.sort(rows[mask])
@@ -0,0 +1,109 @@
+"""
+Shared helpers for embedding tests: a small LRM database built from
+schema.sql with seeded random embeddings, and brute-force cosine search to
+compare indexes and stores against.
+"""
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(1, str(Path(__file__).parent.parent.parent))
+from embedding_codec import decode_row, encode_embedding
+from vector_store import EMBEDDING_TABLES
+
+SCHEMA_PATH = Path(__file__).parent.parent.parent / 'storage' / 'schema.sql'
+
+MODEL = 'test/model'
+DIMENSION = 16
+
+
+def create_db(path=':memory:') -> sqlite3.Connection:
+    """Empty database with the full schema"""
+    conn = sqlite3.connect(str(path))
+    conn.executescript(SCHEMA_PATH.read_text())
+    return conn
+
+
+def add_section(conn, language, number, title='', content='', page_start=1, page_end=1):
+    """Insert a section (parent and depth follow from the number) and return its id"""
+    parent = number.rsplit('.', 1)[0] if '.' in number else None
+    return conn.execute("""
+        INSERT INTO sections (language, section_number, parent_section, title, content, page_start, page_end, depth)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (language, number, parent, title or f"Section {number}", content, page_start, page_end,
+          number.count('.'))).lastrowid
+
+
+def add_embedding(conn, kind, item_id, language, vector, model=MODEL):
+    """Store (or re-embed: replace) an item's embedding as the embedding tools do"""
+    table, fk = EMBEDDING_TABLES[kind]
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {table} ({fk}, language, embedding_model, embedding_blob, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (item_id, language, model, encode_embedding(vector), int(time.time())))
+
+
+def delete_embedding(conn, kind, item_id, model=MODEL):
+    table, fk = EMBEDDING_TABLES[kind]
+    conn.execute(f"DELETE FROM {table} WHERE {fk} = ? AND embedding_model = ?", (item_id, model))
+
+
+def random_vectors(rng, count, dimension=DIMENSION):
+    return rng.standard_normal((count, dimension)).astype(np.float32)
+
+
+def populate(conn, rng, counts, kind='sections'):
+    """
+    Add sections with embeddings.
+
+    Args:
+        counts: {language: number of sections}
+
+    Returns:
+        {language: [section ids]}
+    """
+    ids = {}
+    for language, count in counts.items():
+        ids[language] = []
+        existing = conn.execute("SELECT COUNT(*) FROM sections WHERE language = ?", (language,)).fetchone()[0]
+        for i, vector in enumerate(random_vectors(rng, count), start=existing):
+            section_id = add_section(conn, language, f"{i // 5 + 1}.{i % 5 + 1}", page_start=i + 1, page_end=i + 1)
+            add_embedding(conn, kind, section_id, language, vector)
+            ids[language].append(section_id)
+    conn.commit()
+    return ids
+
+
+def brute_force(conn, kind, languages, query, k, model=MODEL):
+    """Exact top-k (item_id, cosine) over the embeddings stored for some languages"""
+    table, fk = EMBEDDING_TABLES[kind]
+    rows = conn.execute(f"""
+        SELECT {fk}, embedding_blob, embedding_json FROM {table}
+        WHERE embedding_model = ? AND language IN ({','.join('?' * len(languages))})
+    """, (model, *languages)).fetchall()
+    if not rows:
+        return []
+
+    ids = np.array([row[0] for row in rows])
+    matrix = np.vstack([decode_row(row[1], row[2]) for row in rows]).astype(np.float64)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    order = np.argsort(-scores)[:k]
+    return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+def assert_same_hits(actual, expected):
+    """Same ids in the same order, scores equal up to float32 rounding"""
+    assert [hit[0] for hit in actual] == [hit[0] for hit in expected]
+    np.testing.assert_allclose([hit[1] for hit in actual], [hit[1] for hit in expected], atol=1e-5)
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
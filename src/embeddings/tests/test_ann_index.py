@@ -0,0 +1,128 @@
+"""
+Unit tests for the approximate indexes: recall@k against the exact scan and
+index size relative to the float32 matrix
+"""
+
+import numpy as np
+import pytest
+
+from ann_index import INDEX_TYPES, build_index, load_index
+from benchmark_index import make_queries, recall_at_k, synthetic_vectors
+
+K = 10
+COUNT = 4000
+DIMENSION = 64
+
+
+@pytest.fixture(scope='module')
+def vectors():
+    return synthetic_vectors(COUNT, DIMENSION, clusters=64)
+
+
+@pytest.fixture(scope='module')
+def queries(vectors):
+    return make_queries(vectors, 50)
+
+
+@pytest.fixture(scope='module')
+def truth(vectors, queries):
+    exact = build_index('exact', vectors)
+    return [exact.search(query, K)[0] for query in queries]
+
+
+@pytest.fixture(scope='module')
+def ivf_index(vectors):
+    return build_index('ivf', vectors)
+
+
+@pytest.fixture(scope='module', params=['dimension', 'vector'])
+def int8_index(request, vectors):
+    return build_index('int8', vectors, scale_mode=request.param)
+
+
+@pytest.fixture(scope='module')
+def binary_index(vectors):
+    return build_index('binary', vectors)
+
+
+def recall(index, queries, truth, **params):
+    return recall_at_k(truth, [index.search(query, K, **params)[0] for query in queries], K)
+
+
+def test_exact_matches_brute_force(vectors, queries):
+    index = build_index('exact', vectors)
+    for query in queries[:10]:
+        rows, scores = index.search(query, K)
+        expected = np.argsort(-(vectors @ query))[:K]
+        assert rows.tolist() == expected.tolist()
+        np.testing.assert_allclose(scores, vectors[expected] @ query, atol=1e-6)
+
+
+class TestIVFIndex:
+    """Test suite for the inverted file index"""
+
+    def test_recall(self, ivf_index, queries, truth):
+        assert ivf_index.n_lists == int(4 * np.sqrt(COUNT))
+        default = recall(ivf_index, queries, truth)
+        assert default >= 0.8
+        assert recall(ivf_index, queries, truth, nprobe=2) < default
+        # Probing every list scans every vector
+        assert recall(ivf_index, queries, truth, nprobe=ivf_index.n_lists) == 1.0
+
+    def test_size(self, ivf_index, vectors):
+        # Centroids plus one int32/int64 list entry per vector; far smaller than the vectors
+        assert ivf_index.nbytes() < 0.15 * vectors.nbytes
+
+    def test_n_lists_capped_by_vectors(self, vectors):
+        assert build_index('ivf', vectors[:5], n_lists=50).n_lists == 5
+
+
+class TestInt8Index:
+    """Test suite for the scalar-quantized index"""
+
+    def test_recall(self, int8_index, queries, truth):
+        assert recall(int8_index, queries, truth, rescore=0) >= 0.9
+        assert recall(int8_index, queries, truth) >= 0.99
+
+    def test_rescored_scores_are_exact(self, int8_index, vectors, queries):
+        for query in queries[:10]:
+            rows, scores = int8_index.search(query, K)
+            np.testing.assert_allclose(scores, vectors[rows] @ query, atol=1e-6)
+
+    def test_size(self, int8_index, vectors):
+        # One byte per value plus per-column or per-row scale and offset
+        assert vectors.size <= int8_index.nbytes() < 0.3 * vectors.nbytes
+
+    def test_invalid_scale_mode(self):
+        with pytest.raises(ValueError):
+            INDEX_TYPES['int8'](scale_mode='row')
+
+
+class TestBinaryIndex:
+    """Test suite for the sign-bit index"""
+
+    def test_recall(self, binary_index, queries, truth):
+        recalls = [recall(binary_index, queries, truth, candidates=candidates) for candidates in (0, 50, 200, 1000)]
+        assert recalls == sorted(recalls)
+        assert recalls[2] >= 0.75
+
+    def test_size(self, binary_index, vectors):
+        # One bit per value (1/32 of float32) plus the centering mean
+        assert binary_index.nbytes() == vectors.nbytes // 32 + DIMENSION * 4
+
+
+@pytest.mark.parametrize('index_type', ['ivf', 'int8', 'binary'])
+def test_save_and_load(tmp_path, vectors, queries, index_type):
+    index = build_index(index_type, vectors)
+    index.save(tmp_path / index_type)
+
+    loaded = load_index(tmp_path / index_type, vectors)
+    assert type(loaded) is type(index)
+    for query in queries[:10]:
+        expected_rows, expected_scores = index.search(query, K)
+        rows, scores = loaded.search(query, K)
+        assert rows.tolist() == expected_rows.tolist()
+        np.testing.assert_allclose(scores, expected_scores)
+
+    with pytest.raises(ValueError):
+        load_index(tmp_path / index_type, vectors[:-1])
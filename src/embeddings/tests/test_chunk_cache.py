@@ -0,0 +1,64 @@
+"""
+Unit tests for chunk hashing and the persistent chunk-embedding cache
+"""
+
+import numpy as np
+import pytest
+
+from chunk_cache import ChunkEmbeddingCache, chunk_hash
+from conftest import MODEL, random_vectors
+
+
+class TestChunkHash:
+    """Test suite for the cache key of a chunk"""
+
+    def test_deterministic(self):
+        assert chunk_hash(MODEL, 'always @(posedge clk)') == chunk_hash(MODEL, 'always @(posedge clk)')
+        assert chunk_hash(MODEL, 'text') == chunk_hash(MODEL, 'text', 'float32')
+
+    @pytest.mark.parametrize('other', [
+        ('other/model', 'text', 'float32'),
+        (MODEL, 'text ', 'float32'),
+        (MODEL, 'text', 'bfloat16-autocast'),
+        (MODEL, 'text', 'float16'),
+    ])
+    def test_key_components(self, other):
+        """Model, exact text and precision each change the key"""
+        assert chunk_hash(*other) != chunk_hash(MODEL, 'text', 'float32')
+
+    def test_no_ambiguous_concatenation(self):
+        assert chunk_hash('a', 'b\0c') != chunk_hash('a\0b', 'c')
+
+
+class TestChunkEmbeddingCache:
+    """Test suite for storing and looking up chunk embeddings"""
+
+    def test_round_trip_across_instances(self, tmp_path, rng):
+        path = tmp_path / 'cache' / 'chunks.db'
+        vectors = random_vectors(rng, 3)
+        hashes = [chunk_hash(MODEL, f"chunk {i}") for i in range(3)]
+
+        cache = ChunkEmbeddingCache(str(path))
+        cache.put_many(MODEL, list(zip(hashes, vectors)))
+        cache.close()
+
+        cache = ChunkEmbeddingCache(str(path))
+        try:
+            assert cache.count() == 3
+            found = cache.get_many(hashes + [chunk_hash(MODEL, 'missing')])
+            assert set(found) == set(hashes)
+            for h, vector in zip(hashes, vectors):
+                assert found[h].dtype == np.float32
+                np.testing.assert_array_equal(found[h], vector)
+        finally:
+            cache.close()
+
+    def test_many_lookups(self, tmp_path, rng):
+        """Lookups larger than one batch of bound parameters"""
+        cache = ChunkEmbeddingCache(str(tmp_path / 'chunks.db'))
+        try:
+            items = [(chunk_hash(MODEL, str(i)), vector) for i, vector in enumerate(random_vectors(rng, 1200, 4))]
+            cache.put_many(MODEL, items)
+            assert len(cache.get_many(h for h, _ in items)) == 1200
+        finally:
+            cache.close()
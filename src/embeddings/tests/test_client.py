@@ -0,0 +1,231 @@
+"""
+Unit tests for the embedding server client against a stub HTTP server
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from client import EmbeddingClient, EmbeddingServerError, EmbeddingServerUnavailable
+
+DIMENSION = 4
+
+
+def embed(text):
+    """Deterministic stand-in embedding of a text"""
+    return np.array([len(text), sum(map(ord, text)) % 97, 1.0, -1.0], dtype=np.float32)
+
+
+class StubServer:
+    """Minimal /encode_batch and /search_batch server recording requests"""
+
+    def __init__(self, binary=True):
+        self.binary = binary
+        self.batches = []  # Query lists received by /encode_batch
+        self.statuses = []  # Error statuses to answer with before succeeding
+        self.error = None  # Error message answered with HTTP 200, as the server reports encoding failures
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.requests += 1
+                if stub.statuses:
+                    self.reply(stub.statuses.pop(0), b'{"error": "stub failure"}', 'application/json')
+                    return
+                if stub.error:
+                    self.reply(200, json.dumps({'error': stub.error}).encode())
+                    return
+
+                if self.path == '/search_batch':
+                    self.reply(200, json.dumps({'results': [{'query': q, 'results': []}
+                                                            for q in body['queries']]}).encode())
+                    return
+
+                stub.batches.append(body['queries'])
+                embeddings = np.stack([embed(q) for q in body['queries']])
+                if stub.binary and 'application/octet-stream' in self.headers.get('Accept', ''):
+                    self.reply(200, embeddings.astype('<f4').tobytes(), 'application/octet-stream',
+                               {'X-Embedding-Dimension': str(DIMENSION)})
+                else:
+                    self.reply(200, json.dumps({'embeddings': embeddings.tolist()}).encode())
+
+            def reply(self, status, data, content_type='application/json', headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(params=[True, False], ids=['binary', 'json'])
+def stub(request):
+    server = StubServer(binary=request.param)
+    yield server
+    server.close()
+
+
+def make_client(port, **kwargs):
+    kwargs.setdefault('backoff', 0.001)
+    return EmbeddingClient(port=port, **kwargs)
+
+
+class TestEmbeddingClient:
+    """Test suite for EmbeddingClient"""
+
+    def test_encode_many_parses_transport(self, stub):
+        """Binary and JSON responses decode to the same float32 matrix"""
+        texts = ['always block', 'entity', 'generate loop']
+        with make_client(stub.port) as client:
+            result = client.encode_many(texts)
+
+        assert result.dtype == np.float32
+        assert result.shape == (3, DIMENSION)
+        np.testing.assert_array_equal(result, np.stack([embed(t) for t in texts]))
+
+    def test_encode_many_splits_by_batch_size(self, stub):
+        with make_client(stub.port, max_batch_size=2) as client:
+            client.encode_many(['a', 'b', 'c', 'd', 'e'])
+        assert [len(batch) for batch in stub.batches] == [2, 2, 1]
+
+    def test_concurrent_submits_are_coalesced(self, stub):
+        """Queries submitted within max_wait_ms share one request and get their own results"""
+        texts = [f"query {i}" for i in range(20)]
+        with make_client(stub.port, max_wait_ms=200) as client:
+            futures = [client.submit(text) for text in texts]
+            results = [future.result(timeout=5) for future in futures]
+
+        assert len(stub.batches) == 1
+        assert stub.batches[0] == texts
+        for text, result in zip(texts, results):
+            np.testing.assert_array_equal(result, embed(text))
+
+    def test_threads_share_batches(self, stub):
+        """encode() from many threads needs fewer requests than queries"""
+        results = {}
+
+        with make_client(stub.port, max_wait_ms=100) as client:
+            def worker(i):
+                results[i] = client.encode(f"q{i}")
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len(results) == 16
+        assert len(stub.batches) < 16
+        assert sum(len(batch) for batch in stub.batches) == 16
+
+    @pytest.mark.parametrize('status', [429, 502, 503, 504])
+    def test_retries_unavailable(self, stub, status):
+        """Rate limiting and unavailability are retried"""
+        stub.statuses = [status, status]
+        with make_client(stub.port, max_retries=3) as client:
+            result = client.encode_many(['x'])
+        np.testing.assert_array_equal(result[0], embed('x'))
+        assert stub.requests == 3
+
+    @pytest.mark.parametrize('status', [400, 500])
+    def test_request_errors_not_retried(self, stub, status):
+        """Errors caused by the request fail on the first attempt"""
+        stub.statuses = [status]
+        with make_client(stub.port, max_retries=3) as client:
+            with pytest.raises(EmbeddingServerError, match=f"HTTP {status}"):
+                client.encode_many(['x'])
+        assert stub.requests == 1
+
+    def test_gives_up_after_max_retries(self, stub):
+        stub.statuses = [503] * 10
+        with make_client(stub.port, max_retries=2) as client:
+            with pytest.raises(EmbeddingServerError, match='after 3 attempts'):
+                client.encode_many(['x'])
+        assert stub.requests == 3
+
+    def test_search_batch(self, stub):
+        with make_client(stub.port) as client:
+            results = client.search_batch(['always block', {'query': 'entity', 'language': 'vhdl'}])
+        assert len(results) == 2
+
+    def test_fallback_when_unreachable(self):
+        """With fallback enabled, an unreachable server is replaced by in-process encoding"""
+        server = StubServer()
+        port = server.port
+        server.close()  # Nothing listens on the port any more
+
+        client = fallback_client(port)
+        with client:
+            np.testing.assert_array_equal(client.encode('offline'), embed('offline'))
+        assert client.local_batches == [['offline']]
+
+    def test_fallback_after_retries_run_out(self, stub):
+        stub.statuses = [503] * 10
+        client = fallback_client(stub.port)
+        with client:
+            np.testing.assert_array_equal(client.encode_many(['busy'])[0], embed('busy'))
+        assert stub.requests == 2
+        assert client.local_batches == [['busy']]
+
+    @pytest.mark.parametrize('status', [400, 500])
+    def test_no_fallback_on_http_errors(self, stub, status):
+        """A request the server rejects is not quietly encoded in-process"""
+        stub.statuses = [status]
+        client = fallback_client(stub.port)
+        with client:
+            with pytest.raises(EmbeddingServerError, match=f"HTTP {status}") as raised:
+                client.encode_many(['bad'])
+        assert not isinstance(raised.value, EmbeddingServerUnavailable)
+        assert client.local_batches == []
+
+    def test_no_fallback_on_error_payload(self, stub):
+        stub.error = 'CUDA out of memory'
+        client = fallback_client(stub.port)
+        with client:
+            with pytest.raises(EmbeddingServerError, match='CUDA out of memory'):
+                client.encode('x')
+        assert client.local_batches == []
+
+    def test_unreachable_without_fallback(self):
+        server = StubServer()
+        port = server.port
+        server.close()
+
+        with make_client(port, max_retries=1) as client:
+            with pytest.raises(EmbeddingServerUnavailable, match='unavailable'):
+                client.encode_many(['x'])
+
+
+def fallback_client(port):
+    """Client with fallback enabled whose in-process encoder records what it was asked to encode"""
+    client = make_client(port, max_retries=1, fallback=True)
+    client.local_batches = []
+
+    def encode_local(texts):
+        client.local_batches.append(list(texts))
+        return np.stack([embed(text) for text in texts])
+
+    client._encode_local = encode_local
+    return client
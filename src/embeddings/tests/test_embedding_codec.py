@@ -0,0 +1,173 @@
+"""
+Unit tests for the binary embedding format and the JSON -> blob migration
+"""
+
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+
+from conftest import create_db, random_vectors
+from embedding_codec import HEADER_SIZE, decode_embedding, decode_row, encode_embedding, has_blob_column
+from migrate_embeddings import migrate
+from utils.index_generation import read_generation
+from utils.index_manifest import read_index_manifest
+
+# section_embeddings/code_embeddings before the embedding_blob column was added
+LEGACY_SCHEMA = """
+    CREATE TABLE section_embeddings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        section_id INTEGER NOT NULL,
+        language TEXT NOT NULL,
+        embedding_model TEXT NOT NULL,
+        embedding_json TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        UNIQUE(section_id, embedding_model)
+    );
+    CREATE INDEX idx_embeddings_language ON section_embeddings(language);
+    CREATE TABLE code_embeddings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        code_id INTEGER NOT NULL,
+        language TEXT NOT NULL,
+        embedding_model TEXT NOT NULL,
+        embedding_json TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        UNIQUE(code_id, embedding_model)
+    );
+"""
+
+
+class TestCodec:
+    """Test suite for the 8-byte header format"""
+
+    @pytest.mark.parametrize('dtype, code, itemsize', [('float32', 1, 4), ('float16', 2, 2)])
+    def test_header_round_trip(self, rng, dtype, code, itemsize):
+        vector = random_vectors(rng, 1, 1024)[0]
+        blob = encode_embedding(vector, dtype)
+
+        assert blob[:HEADER_SIZE] == b'EV' + bytes([1, code]) + (1024).to_bytes(4, 'little')
+        assert len(blob) == HEADER_SIZE + 1024 * itemsize
+
+        decoded = decode_embedding(blob)
+        assert decoded.dtype == np.dtype(dtype)
+        assert not decoded.flags.writeable  # A view of the blob, not a copy
+        np.testing.assert_array_equal(decoded, vector.astype(dtype))
+
+    def test_float32_is_exact_and_float16_close(self, rng):
+        vector = random_vectors(rng, 1)[0]
+        np.testing.assert_array_equal(decode_embedding(encode_embedding(vector)), vector)
+        np.testing.assert_allclose(decode_embedding(encode_embedding(vector, 'float16')), vector, rtol=1e-3)
+
+    def test_list_input(self):
+        decoded = decode_embedding(encode_embedding([0.5, -1.0, 2.0]))
+        assert decoded.tolist() == [0.5, -1.0, 2.0]
+
+    @pytest.mark.parametrize('blob', [
+        b'EV\x01\x01',                                   # Shorter than the header
+        b'XX\x01\x01\x01\x00\x00\x00' + bytes(4),        # Bad magic
+        b'EV\x02\x01\x01\x00\x00\x00' + bytes(4),        # Unknown format version
+        b'EV\x01\x07\x01\x00\x00\x00' + bytes(4),        # Unknown dtype code
+        b'EV\x01\x01\x02\x00\x00\x00' + bytes(4),        # Dimension 2 with one float32
+    ])
+    def test_malformed(self, blob):
+        with pytest.raises(ValueError):
+            decode_embedding(blob)
+
+    def test_decode_row_prefers_blob(self):
+        assert decode_row(encode_embedding([1.0, 2.0]), '[3.0, 4.0]').tolist() == [1.0, 2.0]
+        assert decode_row(None, '[3.0, 4.0]').tolist() == [3.0, 4.0]
+
+
+class TestMigration:
+    """Test suite for migrate_embeddings.migrate()"""
+
+    @pytest.fixture
+    def legacy_db(self, tmp_path, rng):
+        """Database with JSON-only embedding tables; returns (path, {section_id: vector})"""
+        path = tmp_path / 'lrm.db'
+        conn = sqlite3.connect(str(path))
+        conn.executescript(LEGACY_SCHEMA)
+        vectors = {section_id: vector for section_id, vector in enumerate(random_vectors(rng, 5), start=1)}
+        for section_id, vector in vectors.items():
+            conn.execute("""
+                INSERT INTO section_embeddings (section_id, language, embedding_model, embedding_json, created_at)
+                VALUES (?, 'verilog', 'test/model', ?, 0)
+            """, (section_id, json.dumps(vector.tolist())))
+        conn.commit()
+        conn.close()
+        return path, vectors
+
+    @staticmethod
+    def stored(path):
+        conn = sqlite3.connect(str(path))
+        try:
+            return conn.execute(
+                "SELECT id, section_id, embedding_blob, embedding_json FROM section_embeddings ORDER BY id").fetchall()
+        finally:
+            conn.close()
+
+    def test_rebuilds_legacy_tables(self, legacy_db):
+        path, vectors = legacy_db
+        assert migrate(str(path)) == 0
+
+        conn = sqlite3.connect(str(path))
+        assert has_blob_column(conn, 'section_embeddings')
+        assert has_blob_column(conn, 'code_embeddings')
+        indexes = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'section_embeddings'")}
+        assert {'idx_embeddings_section', 'idx_embeddings_language', 'idx_embeddings_model'} <= indexes
+        assert not conn.execute("SELECT name FROM sqlite_master WHERE name LIKE '%_legacy'").fetchall()
+        conn.close()
+
+        rows = self.stored(path)
+        assert len(rows) == len(vectors)
+        for _, section_id, blob, embedding_json in rows:
+            assert embedding_json is None
+            np.testing.assert_array_equal(decode_embedding(blob), vectors[section_id])
+
+    @pytest.mark.parametrize('keep_json', [False, True])
+    def test_idempotent(self, legacy_db, keep_json):
+        path, _ = legacy_db
+        assert migrate(str(path), keep_json=keep_json) == 0
+        first = self.stored(path)
+        assert all((row[3] is not None) == keep_json for row in first)
+
+        assert migrate(str(path), keep_json=keep_json) == 0
+        assert self.stored(path) == first
+
+    def test_bumps_generation_and_writes_manifest(self, legacy_db):
+        """Readers see the converted tables as changed; a run that converts nothing leaves them be"""
+        path, vectors = legacy_db
+        assert migrate(str(path)) == 0
+
+        conn = sqlite3.connect(str(path))
+        assert read_generation(conn) == 1
+        conn.close()
+        manifest = read_index_manifest(path)
+        assert manifest['written_by'] == 'migrate_embeddings.py' and manifest['generation'] == 1
+        assert manifest['embeddings']['test/model']['sets']['sections/verilog']['count'] == len(vectors)
+
+        assert migrate(str(path)) == 0
+        assert read_index_manifest(path)['generation'] == 1
+
+    def test_converts_json_rows_on_current_schema(self, tmp_path, rng):
+        """JSON-only rows written to an already migrated table are converted in place"""
+        path = tmp_path / 'lrm.db'
+        conn = create_db(path)
+        vector = random_vectors(rng, 1)[0]
+        conn.execute("""
+            INSERT INTO section_embeddings (section_id, language, embedding_model, embedding_json, created_at)
+            VALUES (1, 'vhdl', 'test/model', ?, 0)
+        """, (json.dumps(vector.tolist()),))
+        conn.commit()
+        conn.close()
+
+        assert migrate(str(path), dtype='float16') == 0
+        [(_, _, blob, embedding_json)] = self.stored(path)
+        assert embedding_json is None
+        assert decode_embedding(blob).dtype == np.float16
+        np.testing.assert_allclose(decode_embedding(blob), vector, rtol=1e-3)
+
+    def test_missing_database(self, tmp_path):
+        assert migrate(str(tmp_path / 'missing.db')) == 1
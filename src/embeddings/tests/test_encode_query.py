@@ -0,0 +1,147 @@
+"""
+Unit tests for encode_query.py batch mode: reading queries, token bucketing
+and streaming output
+"""
+
+import io
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('sentence_transformers')
+
+import encode_query
+from encode_query import encode_stream, read_queries, token_buckets
+
+DIMENSION = 4
+
+
+def embed(text):
+    """Deterministic unit vector standing in for the model's embedding of a text"""
+    vector = np.array([len(text), sum(map(ord, text)) % 97, 1, 2], dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeModel:
+    """SentenceTransformer stand-in that counts one token per word and records its batches"""
+
+    max_seq_length = 8
+
+    def __init__(self):
+        self.device = SimpleNamespace(type='cpu')
+        self.inference_dtype = torch.float32
+        self.batches = []
+
+    def tokenizer(self, texts, truncation, max_length):
+        return {'input_ids': [text.split()[:max_length] for text in texts]}
+
+    def get_sentence_embedding_dimension(self):
+        return DIMENSION
+
+    def encode(self, texts, batch_size, **kwargs):
+        self.batches.append(list(texts))
+        return np.stack([embed(text) for text in texts])
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = FakeModel()
+    monkeypatch.setitem(encode_query._model_cache, 'fake', fake)
+    return fake
+
+
+def run(model_name, lines, **kwargs):
+    out = io.BytesIO()
+    stats = encode_stream(io.StringIO(''.join(line + '\n' for line in lines)), out, model_name=model_name, **kwargs)
+    return out.getvalue(), stats
+
+
+class TestReadQueries:
+    """Test suite for parsing batch input"""
+
+    def test_text_lines(self):
+        stream = io.StringIO('first query\n\n   \nsecond query\n')
+        assert list(read_queries(stream)) == [(0, 'first query'), (3, 'second query')]
+
+    def test_ndjson(self):
+        stream = io.StringIO('{"id": "a", "query": "always block"}\n{"query": "entity"}\nplain text\n')
+        assert list(read_queries(stream)) == [('a', 'always block'), (1, 'entity'), (2, 'plain text')]
+
+    def test_text_format_keeps_braces(self):
+        assert list(read_queries(io.StringIO('{ begin end }\n'), 'text')) == [(0, '{ begin end }')]
+
+    @pytest.mark.parametrize('line', [
+        '{"query": "unterminated',
+        '{"id": 1}',
+        '{"query": ""}',
+        '{"query": 5}',
+    ])
+    def test_malformed_ndjson(self, line):
+        with pytest.raises(ValueError, match='Line 2'):
+            list(read_queries(io.StringIO('{"query": "ok"}\n' + line + '\n')))
+
+    def test_ndjson_format_rejects_text(self):
+        with pytest.raises(ValueError, match='Line 1'):
+            list(read_queries(io.StringIO('plain text\n'), 'ndjson'))
+
+
+class TestTokenBuckets:
+    """Test suite for grouping texts by token length"""
+
+    def test_sorted_by_length(self):
+        lengths = [9, 1, 5, 2, 8, 1]
+        buckets = token_buckets(lengths, max_batch_tokens=100, max_batch_size=2)
+        assert buckets == [[1, 5], [3, 2], [4, 0]]
+
+    def test_token_budget(self):
+        """Batch size x longest text stays within the budget"""
+        lengths = [3, 3, 3, 10, 4, 4]
+        buckets = token_buckets(lengths, max_batch_tokens=12, max_batch_size=100)
+        assert sorted(i for bucket in buckets for i in bucket) == list(range(len(lengths)))
+        for bucket in buckets:
+            assert len(bucket) == 1 or len(bucket) * max(lengths[i] for i in bucket) <= 12
+        assert buckets == [[0, 1, 2], [4, 5], [3]]
+
+    def test_text_over_budget_gets_its_own_batch(self):
+        assert token_buckets([50, 1], max_batch_tokens=10, max_batch_size=8) == [[1], [0]]
+
+    def test_empty(self):
+        assert token_buckets([], 100, 8) == []
+
+
+class TestEncodeStream:
+    """Test suite for encoding a stream with one model load"""
+
+    QUERIES = ['one two three four', 'a', 'b c', 'five six seven eight nine', 'd']
+
+    def test_output_in_input_order(self, model):
+        output, stats = run('fake', self.QUERIES, max_batch_size=2)
+        records = [json.loads(line) for line in output.decode().splitlines()]
+
+        assert [record['id'] for record in records] == list(range(len(self.QUERIES)))
+        for record, query in zip(records, self.QUERIES):
+            np.testing.assert_allclose(record['embedding'], embed(query), rtol=1e-6)
+
+        # Encoded shortest first, in buckets of similar length
+        assert model.batches == [['a', 'd'], ['b c', 'one two three four'], ['five six seven eight nine']]
+        assert stats['queries'] == 5 and stats['batches'] == 3 and stats['tokens'] == 13
+        assert stats['dimension'] == DIMENSION
+
+    def test_f32_output(self, model):
+        output, _ = run('fake', self.QUERIES, output_format='f32', window=2)
+        rows = np.frombuffer(output, dtype='<f4').reshape(-1, DIMENSION)
+        np.testing.assert_allclose(rows, np.stack([embed(query) for query in self.QUERIES]), rtol=1e-6)
+        # Each window is bucketed on its own
+        assert [len(batch) for batch in model.batches] == [2, 2, 1]
+
+    def test_skips_blank_lines_and_keeps_ndjson_ids(self, model):
+        output, stats = run('fake', ['', '{"id": "q1", "query": "b c"}', '  ', 'a'])
+        assert [json.loads(line)['id'] for line in output.decode().splitlines()] == ['q1', 3]
+        assert stats['queries'] == 2
+
+    def test_malformed_line_raises(self, model):
+        with pytest.raises(ValueError, match='Line 2'):
+            run('fake', ['a', '{"id": 7}'])
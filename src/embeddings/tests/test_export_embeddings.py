@@ -0,0 +1,103 @@
+"""
+Unit tests for exporting embedding sets to .npy files and loading them back
+"""
+
+import numpy as np
+import pytest
+
+from conftest import MODEL, assert_same_hits, brute_force, create_db, delete_embedding, populate, random_vectors
+from export_embeddings import export
+from vector_store import VectorStore, model_export_dir, read_manifest
+
+K = 5
+
+
+@pytest.fixture
+def exported(tmp_path, rng):
+    """Database with exported verilog/vhdl sections; returns (conn, db path, export dir)"""
+    db_path = tmp_path / 'lrm.db'
+    conn = create_db(db_path)
+    populate(conn, rng, {'verilog': 30, 'vhdl': 10})
+    export_dir = tmp_path / 'embeddings'
+    assert export(str(db_path), str(export_dir), MODEL) == 0
+    yield conn, db_path, export_dir
+    conn.close()
+
+
+def open_store(db_path, export_dir):
+    return VectorStore(str(db_path), MODEL, export_dir=str(export_dir), refresh_on_generation=False)
+
+
+def assert_matches_brute_force(store, conn, queries):
+    for query in queries:
+        for language in ('verilog', 'vhdl'):
+            assert_same_hits(store.search('sections', language, query, K),
+                             brute_force(conn, 'sections', [language], query, K))
+
+
+def test_manifest(exported):
+    _, _, export_dir = exported
+    manifest = read_manifest(model_export_dir(export_dir, MODEL))
+    assert manifest['model'] == MODEL and manifest['normalized']
+    assert {name: entry['count'] for name, entry in manifest['sets'].items()} == \
+        {'sections/verilog': 30, 'sections/vhdl': 10}
+
+
+def test_round_trip(exported, rng):
+    """Loaded sets are memory-mapped from the export and search like the database"""
+    conn, db_path, export_dir = exported
+    store = open_store(db_path, export_dir)
+    try:
+        main = store.get_matrix('sections', 'verilog').main
+        assert isinstance(main.matrix, np.memmap)
+        assert len(main) == 30
+        assert_matches_brute_force(store, conn, random_vectors(rng, 5))
+    finally:
+        store.close()
+
+
+def test_catches_up_on_rows_embedded_after_export(exported, rng):
+    conn, db_path, export_dir = exported
+    live = open_store(db_path, export_dir)
+    try:
+        live.get_matrix('sections', 'verilog')  # Loaded before the database changes
+        new_ids = populate(conn, rng, {'verilog': 4})['verilog']
+        removed = live.get_matrix('sections', 'verilog').ids[0]
+        delete_embedding(conn, 'sections', int(removed))
+        conn.commit()
+
+        live.refresh()
+        fresh = open_store(db_path, export_dir)  # Loads the export, then applies the delta
+        try:
+            for store in (live, fresh):
+                segment = store.get_matrix('sections', 'verilog')
+                assert isinstance(segment.main.matrix, np.memmap) and len(segment.main) == 30
+                assert sorted(segment.delta.ids.tolist()) == new_ids
+                assert len(segment) == 33 and removed not in segment.ids
+                assert_matches_brute_force(store, conn, random_vectors(rng, 5))
+        finally:
+            fresh.close()
+    finally:
+        live.close()
+
+
+def test_files_not_matching_manifest_load_from_database(exported, rng):
+    """A set rewritten by an export whose manifest is not the one read is not used"""
+    conn, db_path, export_dir = exported
+    target = model_export_dir(export_dir, MODEL)
+    vectors = np.load(target / 'sections-verilog.vectors.npy')
+    np.save(target / 'sections-verilog.vectors.npy', vectors[:20])
+
+    store = open_store(db_path, export_dir)
+    try:
+        segment = store.get_matrix('sections', 'verilog')
+        assert not isinstance(segment.main.matrix, np.memmap)
+        assert len(segment) == 30
+        assert isinstance(store.get_matrix('sections', 'vhdl').main.matrix, np.memmap)
+        assert_matches_brute_force(store, conn, random_vectors(rng, 5))
+    finally:
+        store.close()
+
+
+def test_missing_database(tmp_path):
+    assert export(str(tmp_path / 'missing.db'), str(tmp_path / 'embeddings'), MODEL) == 1
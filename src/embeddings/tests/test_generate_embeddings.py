@@ -0,0 +1,155 @@
+"""
+Unit tests for generate_embeddings.py helpers that do not need a real model
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('sentence_transformers')
+
+from chunk_cache import ChunkEmbeddingCache
+from conftest import MODEL, add_section, create_db
+from generate_embeddings import EmbeddingGenerator, read_max_seq_length, read_rss_mb, reset_peak_rss
+
+
+@pytest.mark.skipif(read_rss_mb() is None, reason='Needs /proc/self/status')
+def test_reset_peak_rss():
+    """The peak drops back to the current RSS, so each benchmark configuration gets its own"""
+    block = np.ones(64 * 1024 * 1024 // 8)  # 64 MB resident, then released
+    del block
+    assert read_rss_mb('VmHWM') - read_rss_mb() > 48
+
+    assert reset_peak_rss()
+    assert read_rss_mb('VmHWM') - read_rss_mb() < 16
+
+
+def embed(text):
+    """Deterministic unit vector standing in for the model's embedding of a chunk"""
+    vector = np.array([len(text), text.count('a'), text.count('e'), 1], dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def generator(tmp_path):
+    """Generator on CPU at float32 whose encoder records the chunks it is asked to encode"""
+    create_db(tmp_path / 'lrm.db').close()
+    gen = EmbeddingGenerator(str(tmp_path / 'lrm.db'), MODEL, device='cpu',
+                             chunk_cache_path=str(tmp_path / 'chunks.db'))
+    gen.dtype = torch.float32
+    gen.encoded = []
+
+    def encode_chunks(texts, batch_size=32):
+        gen.encoded.extend(texts)
+        return np.stack([embed(text) for text in texts])
+
+    gen.encode_chunks = encode_chunks
+    return gen
+
+
+class TestChunkDeduplication:
+    """Test suite for EmbeddingGenerator.embed_chunk_groups()"""
+
+    def test_identical_chunks_encoded_once(self, generator):
+        groups = [['module', 'endmodule'], ['entity'], ['module', 'entity', 'module']]
+        embeddings = generator.embed_chunk_groups(groups)
+
+        assert generator.encoded == ['module', 'endmodule', 'entity']
+        for group, embedding in zip(groups, embeddings):
+            np.testing.assert_allclose(embedding, np.mean([embed(chunk) for chunk in group], axis=0))
+        assert generator.dedup_stats == {'chunks': 6, 'encoded': 3, 'deduplicated': 3, 'cache_hits': 0}
+
+        # Chunks seen earlier in the run are not encoded again
+        generator.embed_chunk_groups([['entity', 'architecture']])
+        assert generator.encoded[3:] == ['architecture']
+
+    def test_persistent_cache(self, generator):
+        generator.chunk_cache = ChunkEmbeddingCache(generator.chunk_cache_path)
+        generator.embed_chunk_groups([['module', 'entity']])
+        generator.run_chunk_embeddings.clear()  # As a new run starts with only the cache
+        generator.encoded.clear()
+
+        [embedding] = generator.embed_chunk_groups([['entity', 'module']])
+        assert generator.encoded == []
+        assert generator.dedup_stats['cache_hits'] == 2
+        np.testing.assert_allclose(embedding, (embed('module') + embed('entity')) / 2, rtol=1e-6)
+        generator.chunk_cache.close()
+
+    def test_precision_change_reencodes(self, generator):
+        """Embeddings at another precision are keyed apart, so they are never mixed"""
+        generator.embed_chunk_groups([['module']])
+        float32_precision = generator.precision
+
+        generator.dtype = torch.bfloat16
+        assert generator.precision == 'bfloat16-autocast' != float32_precision
+        generator.embed_chunk_groups([['module']])
+        assert generator.encoded == ['module', 'module']
+
+
+class TestEstimateJob:
+    """Test suite for estimating a run from tokenizer counts"""
+
+    MAX_SEQ_LENGTH = 16
+
+    @pytest.fixture
+    def estimator(self, tmp_path, monkeypatch):
+        """
+        Generator over a small database, with a one-token-per-word tokenizer and a
+        config whose position limit is far above the model's max_seq_length
+        """
+        conn = create_db(tmp_path / 'lrm.db')
+        add_section(conn, 'verilog', '1', title='Overview', content='word ' * 40)  # 41 tokens untruncated
+        add_section(conn, 'verilog', '2', title='Scope', content='short text')
+        add_section(conn, 'vhdl', '1', title='Design', content='entity')
+        conn.commit()
+        conn.close()
+
+        def tokenizer(texts, truncation, max_length):
+            return {'input_ids': [text.split()[:max_length] if truncation else text.split() for text in texts]}
+
+        config = SimpleNamespace(max_position_embeddings=32768, hidden_size=8, num_hidden_layers=1,
+                                 intermediate_size=16, num_attention_heads=2, vocab_size=100)
+        transformers = SimpleNamespace(
+            AutoTokenizer=SimpleNamespace(from_pretrained=lambda name, **kwargs: tokenizer),
+            AutoConfig=SimpleNamespace(from_pretrained=lambda name, **kwargs: config))
+        monkeypatch.setitem(sys.modules, 'transformers', transformers)
+
+        model_dir = tmp_path / 'model'
+        model_dir.mkdir()
+        (model_dir / 'sentence_bert_config.json').write_text(
+            json.dumps({'max_seq_length': self.MAX_SEQ_LENGTH, 'do_lower_case': False}))
+
+        gen = EmbeddingGenerator(str(tmp_path / 'lrm.db'), str(model_dir), device='cpu')
+        gen.dtype = torch.float32
+        return gen
+
+    def test_read_max_seq_length(self, estimator, tmp_path):
+        assert read_max_seq_length(estimator.model_name) == self.MAX_SEQ_LENGTH
+        assert read_max_seq_length(str(tmp_path / 'missing-model')) is None
+
+    def test_truncates_at_max_seq_length(self, estimator):
+        estimate = estimator.estimate_job(kinds=['sections'], batch_size=4, tokens_per_s=10)
+
+        assert estimate['max_seq_length'] == self.MAX_SEQ_LENGTH
+        verilog = estimate['per_language']['verilog']
+        assert verilog['max_chunk_tokens'] == self.MAX_SEQ_LENGTH
+        assert verilog['tokens'] == self.MAX_SEQ_LENGTH + 3
+        assert estimate['per_language']['vhdl']['tokens'] == 2
+        assert estimate['totals']['items'] == 3
+        assert estimate['eta_s'] == pytest.approx((self.MAX_SEQ_LENGTH + 5) / 10)
+
+    def test_loaded_model_limit(self, estimator):
+        estimator.model = SimpleNamespace(max_seq_length=4)
+        estimate = estimator.estimate_job(kinds=['sections'], batch_size=4, tokens_per_s=10)
+        assert estimate['per_language']['verilog']['max_chunk_tokens'] == 4
+
+    def test_fallback_without_sentence_config(self, estimator):
+        Path(estimator.model_name, 'sentence_bert_config.json').unlink()
+        estimate = estimator.estimate_job(kinds=['sections'], batch_size=4, tokens_per_s=10)
+        assert estimate['max_seq_length'] == 8192
+        assert estimate['per_language']['verilog']['max_chunk_tokens'] == 41
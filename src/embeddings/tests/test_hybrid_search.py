@@ -0,0 +1,116 @@
+"""
+Unit tests for full-text/vector hybrid search and reciprocal-rank fusion
+"""
+
+import pytest
+
+from conftest import MODEL, add_embedding, add_section, create_db, random_vectors
+from hybrid_search import RRF_K, bm25_search, fts_match_expression, hybrid_search, reciprocal_rank_fusion
+from vector_store import VectorStore
+
+# (language, section number, title, content)
+SECTIONS = [
+    ('verilog', '17.2', 'File output system tasks', 'The $fwrite task writes formatted data to a file.'),
+    ('verilog', '17.1', 'Display system tasks', 'The $display task writes to standard output.'),
+    ('verilog', '9.2', 'Procedures', 'An always block executes repeatedly.'),
+    ('verilog', '9.3', 'Block statements', 'Sequential blocks group statements.'),
+    ('vhdl', '16.3', 'Package TEXTIO', 'The procedure WRITE appends to a line; use std_logic_vector values.'),
+    ('vhdl', '5.3', 'Array types', 'std_logic_vector is an array of std_logic.'),
+]
+
+
+class TestReciprocalRankFusion:
+    """Test suite for RRF with known rank lists"""
+
+    def test_known_rankings(self):
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]])
+        assert [item_id for item_id, _ in fused] == [1, 3, 2, 4]
+        assert dict(fused) == pytest.approx({
+            1: 1 / (RRF_K + 1) + 1 / (RRF_K + 2),
+            3: 1 / (RRF_K + 3) + 1 / (RRF_K + 1),
+            2: 1 / (RRF_K + 2),
+            4: 1 / (RRF_K + 3),
+        })
+
+    def test_agreement_beats_a_single_top_rank(self):
+        # 7 is ranked second by both; 5 and 6 are each first in only one ranking
+        fused = reciprocal_rank_fusion([[5, 7, 8], [6, 7, 9]])
+        assert fused[0][0] == 7
+
+    def test_rank_offset(self):
+        """A small k lets a single top rank outweigh lower ranks in several rankings"""
+        rankings = [[1, 2], [3, 4, 2]]
+        assert reciprocal_rank_fusion(rankings)[0][0] == 2
+        assert reciprocal_rank_fusion(rankings, k=0)[0][0] == 1
+
+    def test_empty(self):
+        assert reciprocal_rank_fusion([[], []]) == []
+        assert reciprocal_rank_fusion([[], [3, 4]]) == [(3, 1 / (RRF_K + 1)), (4, 1 / (RRF_K + 2))]
+
+
+def test_fts_match_expression():
+    assert fts_match_expression('$fwrite std_logic_vector') == '"$fwrite" OR "std_logic_vector"'
+    assert fts_match_expression('say "hi"') == '"say" OR """hi"""'
+    assert fts_match_expression('  * ( ) ') is None
+
+
+@pytest.fixture
+def setup(tmp_path, rng):
+    conn = create_db(tmp_path / 'lrm.db')
+    ids, vectors = {}, {}
+    for (language, number, title, content), vector in zip(SECTIONS, random_vectors(rng, len(SECTIONS))):
+        ids[number] = add_section(conn, language, number, title=title, content=content)
+        vectors[number] = vector
+        add_embedding(conn, 'sections', ids[number], language, vector)
+    conn.commit()
+
+    store = VectorStore(str(tmp_path / 'lrm.db'), MODEL)
+    yield conn, store, ids, vectors
+    store.close()
+    conn.close()
+
+
+def test_bm25_search(setup):
+    conn, _, ids, _ = setup
+    hits = bm25_search(conn, '$fwrite', None, 10)
+    assert [item_id for _, item_id, _ in hits] == [ids['17.2']]
+
+    hits = bm25_search(conn, 'std_logic_vector', ['vhdl'], 10)
+    assert {item_id for _, item_id, _ in hits} == {ids['16.3'], ids['5.3']}
+    assert bm25_search(conn, 'std_logic_vector', ['verilog'], 10) == []
+    assert bm25_search(conn, 'std_logic_vector', [], 10) == []
+
+
+def test_hybrid_scores_follow_ranks(setup):
+    """Fused scores and order are RRF of the reported full-text and vector ranks"""
+    _, store, ids, vectors = setup
+    # The query text matches 17.2 in full text; its embedding is 9.2's vector
+    found = hybrid_search(store, '$fwrite task', lambda text: vectors['9.2'], 10)
+    hits = found['hits']
+
+    by_id = {hit['id']: hit for hit in hits}
+    assert by_id[ids['17.2']]['bm25_rank'] is not None
+    assert by_id[ids['9.2']]['vector_rank'] == 1
+    assert by_id[ids['9.2']]['similarity'] == pytest.approx(1.0, abs=1e-5)
+    assert all(hit['similarity'] is not None for hit in hits)
+
+    for hit in hits:
+        expected = sum(1 / (RRF_K + rank) for rank in (hit['bm25_rank'], hit['vector_rank']) if rank)
+        assert hit['score'] == pytest.approx(expected)
+    assert [hit['score'] for hit in hits] == sorted((hit['score'] for hit in hits), reverse=True)
+    assert set(found['timing_ms']) >= {'encode', 'fts', 'vector', 'fuse', 'total'}
+
+
+def test_prefilter_scores_only_full_text_hits(setup):
+    _, store, ids, vectors = setup
+    found = hybrid_search(store, 'std_logic_vector', lambda text: vectors['9.2'], 10, prefilter=True)
+    assert {hit['id'] for hit in found['hits']} == {ids['16.3'], ids['5.3']}
+    assert all(hit['bm25_rank'] and hit['vector_rank'] for hit in found['hits'])
+
+
+def test_rows_restrict_both_rankings(setup):
+    _, store, ids, vectors = setup
+    rows = store.filter_rows('sections', ['verilog'], {'section': '9'})
+    found = hybrid_search(store, '$fwrite block', lambda text: vectors['17.2'], 10, rows=rows)
+    assert {hit['id'] for hit in found['hits']} == {ids['9.2'], ids['9.3']}
+    assert all(hit['language'] == 'verilog' for hit in found['hits'])
@@ -0,0 +1,72 @@
+"""
+Unit tests for the index generation counter and the readers that follow it
+"""
+
+import sqlite3
+
+import vector_store
+from conftest import MODEL, create_db, populate, random_vectors
+from result_cache import ResultCache
+from utils.index_generation import bump_generation, read_generation
+from vector_store import VectorStore
+
+
+def test_bump_and_read():
+    conn = create_db()
+    assert read_generation(conn) == 0
+    assert bump_generation(conn) == 1
+    assert bump_generation(conn) == 2
+    assert read_generation(conn) == 2
+
+
+def test_database_without_counter():
+    """Databases that predate the counter read as generation 0 and get the table on first bump"""
+    conn = sqlite3.connect(':memory:')
+    assert read_generation(conn) == 0
+    assert bump_generation(conn) == 1
+    assert read_generation(conn) == 1
+
+
+def test_bump_is_part_of_the_callers_transaction(tmp_path):
+    writer = create_db(tmp_path / 'lrm.db')
+    reader = sqlite3.connect(str(tmp_path / 'lrm.db'))
+    bump_generation(writer)
+    assert read_generation(reader) == 0
+    writer.commit()
+    assert read_generation(reader) == 1
+
+
+def test_bump_invalidates_cached_results(tmp_path, rng, monkeypatch):
+    """A bump is seen by the store, which moves the result cache to the new generation"""
+    monkeypatch.setattr(vector_store, 'GENERATION_CHECK_INTERVAL_S', 0)
+    db_path = tmp_path / 'lrm.db'
+    conn = create_db(db_path)
+    populate(conn, rng, {'verilog': 10})
+    bump_generation(conn)
+    conn.commit()
+
+    store = VectorStore(str(db_path), MODEL)
+    cache = ResultCache()
+    params = {'query': 'always block', 'language': 'verilog', 'max_results': 5}
+    try:
+        query = random_vectors(rng, 1)[0]
+        key = ResultCache.make_key(store.check_generation(), 'sections', params)
+        cache.put(key, {'results': store.search('sections', 'verilog', query, 5)})
+        assert cache.get(ResultCache.make_key(store.check_generation(), 'sections', params)) is not None
+
+        new_ids = populate(conn, rng, {'verilog': 3})['verilog']
+        bump_generation(conn)
+        conn.commit()
+
+        generation = store.check_generation()
+        assert generation == 2
+        assert cache.get(ResultCache.make_key(generation, 'sections', params)) is None
+        assert cache.stats()['entries'] == 0
+        assert cache.get(key) is None
+
+        # The store applied the new embeddings when it saw the bump
+        assert len(store.get_matrix('sections', 'verilog')) == 13
+        assert set(new_ids) <= set(store.get_matrix('sections', 'verilog').ids.tolist())
+    finally:
+        store.close()
+        conn.close()
@@ -0,0 +1,121 @@
+"""
+Unit tests for hot reloading the vector store when the index manifest changes
+"""
+
+import threading
+
+import pytest
+
+from conftest import DIMENSION, MODEL, assert_same_hits, brute_force, create_db, populate, random_vectors
+from index_reloader import IndexReloader
+from utils.index_generation import bump_generation
+from utils.index_manifest import write_index_manifest
+from vector_store import VectorStore
+
+K = 5
+
+
+@pytest.fixture
+def setup(tmp_path, rng):
+    db_path = tmp_path / 'lrm.db'
+    conn = create_db(db_path)
+    populate(conn, rng, {'verilog': 20, 'vhdl': 10})
+    bump_generation(conn)
+    conn.commit()
+    write_index_manifest(conn, db_path, 'test')
+
+    store = VectorStore(str(db_path), MODEL, refresh_on_generation=False)
+    closed = []
+    close = store.close
+    store.close = lambda: (closed.append(store), close())
+
+    yield conn, db_path, store, closed
+    close()
+    conn.close()
+
+
+def change_database(conn, db_path, rng, count=5):
+    """Add embeddings and rewrite the manifest, as the embedding tools do"""
+    new_ids = populate(conn, rng, {'verilog': count})['verilog']
+    bump_generation(conn)
+    conn.commit()
+    write_index_manifest(conn, db_path, 'generate_embeddings.py')
+    return new_ids
+
+
+def test_unchanged_manifest_does_not_reload(setup):
+    _, _, store, _ = setup
+    swapped = []
+    reloader = IndexReloader(store, swapped.append, dimension=DIMENSION)
+    assert not reloader.poll()
+    assert not swapped
+    assert reloader.stats()['generation'] == 1
+
+
+def test_swap_on_manifest_change(setup, rng):
+    conn, db_path, store, closed = setup
+    query = random_vectors(rng, 1)[0]
+    store.search('sections', 'verilog', query, K)  # Loaded sets are carried over warm
+    swapped = []
+    reloader = IndexReloader(store, swapped.append, dimension=DIMENSION)
+
+    new_ids = change_database(conn, db_path, rng)
+    assert reloader.poll()
+
+    [new] = swapped
+    assert new is not store and reloader.store is new
+    assert closed == [store]
+    assert new.generation == 2
+    assert set(new_ids) <= set(new.get_matrix('sections', 'verilog').ids.tolist())
+    assert_same_hits(new.search('sections', 'verilog', query, K),
+                     brute_force(conn, 'sections', ['verilog'], query, K))
+
+    stats = reloader.stats()
+    assert stats['reloads'] == 1 and stats['generation'] == 2 and stats['last_error'] is None
+    assert stats['last_reload']['count_mismatches'] == []
+
+    # The same manifest is not reloaded twice
+    assert not reloader.poll()
+
+
+def test_in_flight_query_finishes_on_old_store(setup, rng):
+    """A request holding the old store completes against it after the swap"""
+    conn, db_path, store, closed = setup
+    query = random_vectors(rng, 1)[0]
+    expected = store.search('sections', 'verilog', query, K)
+
+    current = [store]
+    reloader = IndexReloader(store, lambda new: current.__setitem__(0, new), dimension=DIMENSION)
+    started, swapped, results = threading.Event(), threading.Event(), []
+
+    def request():
+        held = current[0]  # As the server binds the store once per request
+        started.set()
+        swapped.wait(5)
+        results.append(held.search('sections', 'verilog', query, K))
+
+    thread = threading.Thread(target=request)
+    thread.start()
+    started.wait(5)
+
+    change_database(conn, db_path, rng)
+    assert reloader.poll()
+    swapped.set()
+    thread.join(5)
+
+    assert closed == [store] and current[0] is not store
+    assert_same_hits(results[0], expected)
+    assert len(store.get_matrix('sections', 'verilog')) == 20
+    assert len(current[0].get_matrix('sections', 'verilog')) == 25
+
+
+def test_dimension_mismatch_keeps_old_store(setup, rng):
+    conn, db_path, store, closed = setup
+    swapped = []
+    reloader = IndexReloader(store, swapped.append, dimension=DIMENSION * 2)
+
+    change_database(conn, db_path, rng)
+    assert not reloader.poll()
+    assert not swapped and not closed
+    assert reloader.store is store
+    assert 'dimension' in reloader.stats()['last_error']
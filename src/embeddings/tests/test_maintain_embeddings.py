@@ -0,0 +1,140 @@
+"""
+Unit tests for pruning orphaned/stale embeddings and compacting the database
+"""
+
+import sqlite3
+
+import pytest
+
+from conftest import MODEL, add_embedding, create_db, populate, random_vectors
+from maintain_embeddings import find_prunable, maintain
+from utils.index_generation import read_generation
+from utils.index_manifest import read_index_manifest
+from vector_store import EMBEDDING_TABLES
+
+OTHER_MODEL = 'other/model'
+
+
+@pytest.fixture
+def db(tmp_path, rng):
+    """
+    Database with 10 verilog and 5 vhdl sections embedded by MODEL, 3 of them
+    also by OTHER_MODEL, and 2 deleted sections whose embeddings remain.
+
+    Returns:
+        (path, {'kept': section ids whose MODEL rows survive pruning, 'orphans': deleted section ids})
+    """
+    path = tmp_path / 'lrm.db'
+    conn = create_db(path)
+    ids = populate(conn, rng, {'verilog': 10, 'vhdl': 5})
+    section_ids = ids['verilog'] + ids['vhdl']
+    for section_id, vector in zip(section_ids[:3], random_vectors(rng, 3)):
+        add_embedding(conn, 'sections', section_id, 'verilog', vector, model=OTHER_MODEL)
+    orphans = [ids['verilog'][-1], ids['vhdl'][-1]]
+    conn.execute(f"DELETE FROM sections WHERE id IN ({orphans[0]}, {orphans[1]})")
+    add_embedding(conn, 'code', 999, 'verilog', random_vectors(rng, 1)[0])  # No code example 999
+    conn.commit()
+    conn.close()
+    return path, {'kept': [i for i in section_ids if i not in orphans], 'orphans': orphans}
+
+
+def embeddings(path, kind='sections'):
+    """{(item id, model)} stored for a kind"""
+    table, fk = EMBEDDING_TABLES[kind]
+    conn = sqlite3.connect(str(path))
+    try:
+        return set(conn.execute(f"SELECT {fk}, embedding_model FROM {table}").fetchall())
+    finally:
+        conn.close()
+
+
+def generation(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return read_generation(conn)
+    finally:
+        conn.close()
+
+
+def test_find_prunable(db):
+    path, _ = db
+    conn = sqlite3.connect(str(path))
+    counts = find_prunable(conn, MODEL)
+    conn.close()
+    assert counts['sections'] == {'orphans': 2, 'stale': 3, 'total': 5}
+    assert counts['code'] == {'orphans': 1, 'stale': 0, 'total': 1}
+
+
+def test_prune_removes_only_orphaned_and_stale_rows(db):
+    path, sections = db
+    assert maintain(str(path), do_prune=True, keep_model=MODEL, assume_yes=True) == 0
+
+    assert embeddings(path) == {(section_id, MODEL) for section_id in sections['kept']}
+    assert embeddings(path, 'code') == set()
+    assert generation(path) == 1
+
+    manifest = read_index_manifest(path)
+    assert manifest['written_by'] == 'maintain_embeddings.py'
+    assert manifest['generation'] == 1
+    assert list(manifest['embeddings']) == [MODEL]
+    assert manifest['embeddings'][MODEL]['sets']['sections/verilog']['count'] == 9
+
+
+def test_prune_without_keep_model_keeps_other_models(db):
+    path, sections = db
+    before = embeddings(path)
+    assert maintain(str(path), do_prune=True, assume_yes=True) == 0
+
+    remaining = embeddings(path)
+    assert {section_id for section_id, _ in before - remaining} == set(sections['orphans'])
+    assert sum(model == OTHER_MODEL for _, model in remaining) == 3
+
+
+def test_nothing_to_prune(db):
+    path, _ = db
+    assert maintain(str(path), do_prune=True, keep_model=MODEL, assume_yes=True) == 0
+    assert maintain(str(path), do_prune=True, keep_model=MODEL, assume_yes=True) == 0
+    assert generation(path) == 1
+    assert read_index_manifest(path)['generation'] == 1
+
+
+def test_cancelled_prune(db, monkeypatch):
+    path, _ = db
+    before = embeddings(path)
+    monkeypatch.setattr('builtins.input', lambda prompt: 'n')
+    assert maintain(str(path), do_prune=True, keep_model=MODEL) == 0
+    assert embeddings(path) == before
+    assert generation(path) == 0 and read_index_manifest(path) is None
+
+
+def test_vacuum_into(db, tmp_path):
+    path, _ = db
+    target = tmp_path / 'compact.db'
+    assert maintain(str(path), do_prune=True, keep_model=MODEL, vacuum_into=str(target), assume_yes=True) == 0
+
+    copy = sqlite3.connect(f"file:{target}?mode=ro", uri=True)
+    try:
+        assert copy.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+        assert copy.execute("SELECT COUNT(*) FROM sections").fetchone()[0] == 13
+    finally:
+        copy.close()
+    assert embeddings(target) == embeddings(path)
+    assert target.stat().st_size <= path.stat().st_size
+
+    # An existing file is never overwritten
+    assert maintain(str(path), vacuum_into=str(target)) == 1
+
+
+def test_incremental_vacuum(db):
+    path, _ = db
+    assert maintain(str(path), do_prune=True, keep_model=MODEL, vacuum_mode='incremental', assume_yes=True) == 0
+    conn = sqlite3.connect(str(path))
+    try:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_missing_database(tmp_path):
+    assert maintain(str(tmp_path / 'missing.db')) == 1
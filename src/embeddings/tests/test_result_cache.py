@@ -0,0 +1,105 @@
+"""
+Unit tests for the search result cache
+"""
+
+import pytest
+
+from result_cache import ResultCache
+
+PARAMS = {'query': 'always block', 'language': 'verilog', 'max_results': 10, 'mode': 'vector', 'filters': {}}
+
+
+def response(*ids):
+    return {'results': [{'id': item_id} for item_id in ids]}
+
+
+class TestKeys:
+    """Test suite for cache keys"""
+
+    def test_param_order_is_irrelevant(self):
+        reordered = dict(reversed(list(PARAMS.items())))
+        assert ResultCache.make_key(1, 'sections', PARAMS) == ResultCache.make_key(1, 'sections', reordered)
+
+    @pytest.mark.parametrize('change', [
+        {'language': 'vhdl'},
+        {'language': ['verilog', 'vhdl']},
+        {'max_results': 5},
+        {'query': 'always blocks'},
+        {'mode': 'hybrid'},
+        {'filters': {'page_from': 3}},
+    ])
+    def test_params_separate_keys(self, change):
+        assert ResultCache.make_key(1, 'sections', PARAMS) != ResultCache.make_key(1, 'sections', dict(PARAMS, **change))
+
+    def test_kind_and_generation_separate_keys(self):
+        keys = {ResultCache.make_key(generation, kind, PARAMS)
+                for generation in (1, 2) for kind in ('sections', 'code', 'tables')}
+        assert len(keys) == 6
+
+    def test_entries_do_not_leak_between_keys(self):
+        cache = ResultCache()
+        cache.put(ResultCache.make_key(1, 'sections', PARAMS), response(1))
+        cache.put(ResultCache.make_key(1, 'code', PARAMS), response(2))
+        cache.put(ResultCache.make_key(1, 'sections', dict(PARAMS, max_results=5)), response(3))
+
+        assert cache.get(ResultCache.make_key(1, 'sections', PARAMS)) == response(1)
+        assert cache.get(ResultCache.make_key(1, 'code', PARAMS)) == response(2)
+        assert cache.get(ResultCache.make_key(1, 'sections', dict(PARAMS, max_results=5))) == response(3)
+        assert cache.get(ResultCache.make_key(1, 'tables', PARAMS)) is None
+        assert cache.get(ResultCache.make_key(1, 'sections', dict(PARAMS, language='vhdl'))) is None
+
+
+class TestResultCache:
+    """Test suite for lookups, eviction and generation changes"""
+
+    def test_hits_and_negative_hits(self):
+        cache = ResultCache()
+        found, empty = ResultCache.make_key(1, 'sections', PARAMS), ResultCache.make_key(1, 'code', PARAMS)
+        assert cache.get(found) is None
+        cache.put(found, response(1))
+        cache.put(empty, response(), negative=True)
+
+        assert cache.get(found) == response(1)
+        assert cache.get(empty) == response()
+        stats = cache.stats()
+        assert (stats['hits'], stats['negative_hits'], stats['misses']) == (1, 1, 1)
+        assert (stats['entries'], stats['negative_entries']) == (2, 1)
+        assert stats['hit_rate'] == pytest.approx(2 / 3, abs=1e-4)
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        keys = [ResultCache.make_key(1, 'sections', dict(PARAMS, max_results=k)) for k in (1, 2, 3)]
+        cache.put(keys[0], response(1))
+        cache.put(keys[1], response(2))
+        cache.get(keys[0])  # keys[1] is now least recently used
+        cache.put(keys[2], response(3))
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == response(1)
+        assert cache.get(keys[2]) == response(3)
+        assert cache.stats()['evictions'] == 1
+
+    def test_newer_generation_invalidates(self):
+        cache = ResultCache()
+        old = ResultCache.make_key(1, 'sections', PARAMS)
+        cache.put(old, response(1))
+
+        # The first lookup at a newer generation drops everything cached before it
+        assert cache.get(ResultCache.make_key(2, 'sections', PARAMS)) is None
+        assert cache.stats()['entries'] == 0
+        assert cache.stats()['generation'] == 2
+        assert cache.get(old) is None
+
+    def test_stale_put_is_ignored(self):
+        """A response computed before the generation changed is not stored"""
+        cache = ResultCache()
+        cache.get(ResultCache.make_key(2, 'sections', PARAMS))
+        cache.put(ResultCache.make_key(1, 'sections', PARAMS), response(1))
+        assert cache.stats()['entries'] == 0
+
+    def test_disabled(self):
+        cache = ResultCache(max_entries=0)
+        key = ResultCache.make_key(1, 'sections', PARAMS)
+        cache.put(key, response(1))
+        assert cache.get(key) is None
+        assert cache.stats()['lookups'] == 0
@@ -0,0 +1,111 @@
+"""
+Unit tests for section filters (subtree, depth and page range) on the all-languages matrix
+"""
+
+import numpy as np
+import pytest
+
+from conftest import MODEL, add_embedding, add_section, assert_same_hits, brute_force, create_db, random_vectors
+from section_metadata import section_sort_key
+from vector_store import VectorStore
+
+# (language, section number, first page, last page)
+SECTIONS = [
+    ('verilog', '1', 1, 1),
+    ('verilog', '9', 10, 20),
+    ('verilog', '9.1', 10, 12),
+    ('verilog', '9.1.2', 12, 13),
+    ('verilog', '9.2', 13, 15),
+    ('verilog', '9.10', 18, 20),
+    ('verilog', '10', 21, 25),
+    ('verilog', 'A.1', 30, 31),
+    ('vhdl', '9', 5, 8),
+    ('vhdl', '9.1', 5, 6),
+]
+
+ORPHAN_ID = 999  # Embedding whose section no longer exists
+
+
+@pytest.fixture
+def setup(tmp_path, rng):
+    conn = create_db(tmp_path / 'lrm.db')
+    ids = {}
+    for (language, number, page_start, page_end), vector in zip(SECTIONS, random_vectors(rng, len(SECTIONS))):
+        ids[language, number] = add_section(conn, language, number, page_start=page_start, page_end=page_end)
+        add_embedding(conn, 'sections', ids[language, number], language, vector)
+    add_embedding(conn, 'sections', ORPHAN_ID, 'verilog', random_vectors(rng, 1)[0])
+    conn.commit()
+
+    store = VectorStore(str(tmp_path / 'lrm.db'), MODEL)
+    yield conn, store, ids
+    store.close()
+    conn.close()
+
+
+def filtered(store, ids, languages=None, **filters):
+    """Section numbers ('language:number') of the rows passing the filters"""
+    names = {section_id: f"{language}:{number}" for (language, number), section_id in ids.items()}
+    rows = store.filter_rows('sections', languages, filters)
+    assert np.all(np.diff(rows) > 0)
+    return {names[item_id] for item_id in store.get_multi_matrix('sections').ids[rows].tolist()}
+
+
+def test_section_sort_key():
+    numbers = ['A.1', '10', '9.10', '9.2', '9', '9.1.2', '9.1', '1']
+    assert sorted(numbers, key=section_sort_key) == ['1', '9', '9.1', '9.1.2', '9.2', '9.10', '10', 'A.1']
+
+
+def test_no_filters_skip_orphans(setup):
+    _, store, ids = setup
+    assert len(store.get_multi_matrix('sections')) == len(SECTIONS) + 1
+    assert filtered(store, ids) == {f"{language}:{number}" for language, number, _, _ in SECTIONS}
+
+
+def test_within_section(setup):
+    _, store, ids = setup
+    assert filtered(store, ids, ['verilog'], section='9') == \
+        {'verilog:9', 'verilog:9.1', 'verilog:9.1.2', 'verilog:9.2', 'verilog:9.10'}
+    # '9.1' is a prefix of '9.10' as a string but not as a section number
+    assert filtered(store, ids, ['verilog'], section='9.1') == {'verilog:9.1', 'verilog:9.1.2'}
+    assert filtered(store, ids, ['verilog'], section='A') == {'verilog:A.1'}
+    assert filtered(store, ids, ['verilog'], section='11') == set()
+    assert filtered(store, ids, section='9.1') == {'verilog:9.1', 'verilog:9.1.2', 'vhdl:9.1'}
+
+
+def test_depth(setup):
+    _, store, ids = setup
+    assert filtered(store, ids, ['verilog'], section='9', max_depth=1) == \
+        {'verilog:9', 'verilog:9.1', 'verilog:9.2', 'verilog:9.10'}
+    assert filtered(store, ids, ['verilog'], max_depth=0) == {'verilog:1', 'verilog:9', 'verilog:10'}
+    assert filtered(store, ids, min_depth=2) == {'verilog:9.1.2'}
+    assert filtered(store, ids, ['vhdl'], min_depth=1, max_depth=1) == {'vhdl:9.1'}
+
+
+def test_page_range(setup):
+    _, store, ids = setup
+    # Sections overlapping the range are included; both bounds are inclusive
+    assert filtered(store, ids, ['verilog'], page_from=13, page_to=13) == \
+        {'verilog:9', 'verilog:9.1.2', 'verilog:9.2'}
+    assert filtered(store, ids, ['verilog'], page_from=21) == {'verilog:10', 'verilog:A.1'}
+    assert filtered(store, ids, ['verilog'], page_to=12) == \
+        {'verilog:1', 'verilog:9', 'verilog:9.1', 'verilog:9.1.2'}
+    assert filtered(store, ids, ['verilog'], page_from=26, page_to=29) == set()
+    assert filtered(store, ids, ['verilog'], section='9', page_from=16, max_depth=1) == \
+        {'verilog:9', 'verilog:9.10'}
+
+
+def test_unknown_filter(setup):
+    _, store, ids = setup
+    with pytest.raises(ValueError):
+        store.filter_rows('sections', None, {'chapter': '9'})
+
+
+def test_search_filtered_matches_brute_force(setup, rng):
+    conn, store, ids = setup
+    subtree = [ids['verilog', number] for number in ('9', '9.1', '9.1.2', '9.2', '9.10')]
+    for query in random_vectors(rng, 5):
+        hits, scanned = store.search_filtered('sections', query, 3, ['verilog'], {'section': '9'})
+        assert scanned == len(subtree)
+        expected = [hit for hit in brute_force(conn, 'sections', ['verilog'], query, len(SECTIONS) + 1)
+                    if hit[0] in subtree][:3]
+        assert_same_hits([(item_id, score) for _, item_id, score in hits], expected)
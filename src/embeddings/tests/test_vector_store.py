@@ -0,0 +1,253 @@
+"""
+Unit tests for segmented embedding sets and the all-languages matrix
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+import vector_store
+from conftest import (
+    MODEL, add_embedding, assert_same_hits, brute_force, create_db, delete_embedding, populate, random_vectors
+)
+from utils.index_generation import bump_generation
+from vector_store import EmbeddingMatrix, MultiLanguageMatrix, SegmentedMatrix, VectorStore, max_row_id
+
+K = 5
+
+
+def load_segment(conn, language='verilog', index_type='exact', **index_params):
+    """A set loaded as VectorStore.get_matrix() loads it from the database"""
+    high_water = max_row_id(conn, 'section_embeddings')
+    main = EmbeddingMatrix.from_db(conn, 'sections', language, MODEL, max_row_id=high_water)
+    if index_type != 'exact':
+        main.index = vector_store.build_index(index_type, main.matrix, **index_params)
+    return SegmentedMatrix(main, high_water)
+
+
+def assert_matches_brute_force(segment, conn, queries, language='verilog', **params):
+    for query in queries:
+        assert_same_hits(segment.search(query, K, **params), brute_force(conn, 'sections', [language], query, K))
+
+
+class TestSegmentedMatrix:
+    """Test suite for delta segments, tombstones and merging"""
+
+    @pytest.fixture
+    def db(self, rng):
+        conn = create_db()
+        populate(conn, rng, {'verilog': 60, 'vhdl': 20})
+        yield conn
+        conn.close()
+
+    def test_clean_set_matches_brute_force(self, db, rng):
+        segment = load_segment(db)
+        assert len(segment) == 60
+        assert not segment.dirty
+        assert_matches_brute_force(segment, db, random_vectors(rng, 10))
+
+    def test_new_embeddings_go_to_delta(self, db, rng):
+        """Rows added after loading are read into the delta and searched with the main segment"""
+        segment = load_segment(db)
+        new_ids = populate(db, rng, {'verilog': 8})['verilog']
+
+        assert segment.apply_changes(db, 'sections', 'verilog', MODEL)
+        assert len(segment.main) == 60
+        assert sorted(segment.delta.ids.tolist()) == new_ids
+        assert len(segment) == 68
+        assert segment.high_water == max_row_id(db, 'section_embeddings')
+
+        # A query equal to a new row must find it first
+        queries = list(random_vectors(rng, 10)) + [segment.delta.matrix[0]]
+        assert_matches_brute_force(segment, db, queries)
+        assert segment.search(segment.delta.matrix[0], 1)[0][0] == int(segment.delta.ids[0])
+
+    def test_no_changes(self, db):
+        segment = load_segment(db)
+        assert not segment.apply_changes(db, 'sections', 'verilog', MODEL)
+        assert segment.version == 0
+
+    def test_delete_and_reembed_become_tombstones(self, db, rng):
+        """Deleted items vanish; re-embedded items are found with their new vector only"""
+        segment = load_segment(db)
+        deleted, reembedded = segment.main.ids[:3].tolist(), segment.main.ids[3:6].tolist()
+        for item_id in deleted:
+            delete_embedding(db, 'sections', item_id)
+        new_vectors = random_vectors(rng, len(reembedded))
+        for item_id, vector in zip(reembedded, new_vectors):
+            add_embedding(db, 'sections', item_id, 'verilog', vector)
+        db.commit()
+
+        assert segment.apply_changes(db, 'sections', 'verilog', MODEL)
+        assert segment.dead == 6
+        assert sorted(segment.delta.ids.tolist()) == sorted(reembedded)
+        assert len(segment) == 57
+        assert not set(deleted) & set(segment.ids.tolist())
+
+        assert_matches_brute_force(segment, db, list(random_vectors(rng, 10)) + list(new_vectors))
+        hits = segment.search(new_vectors[0], len(segment))
+        assert [item_id for item_id, _ in hits].count(reembedded[0]) == 1
+
+    def test_delta_rows_can_be_deleted_again(self, db, rng):
+        segment = load_segment(db)
+        new_ids = populate(db, rng, {'verilog': 4})['verilog']
+        segment.apply_changes(db, 'sections', 'verilog', MODEL)
+
+        delete_embedding(db, 'sections', new_ids[0])
+        db.commit()
+        assert segment.apply_changes(db, 'sections', 'verilog', MODEL)
+        assert new_ids[0] not in segment.delta.ids.tolist()
+        assert_matches_brute_force(segment, db, random_vectors(rng, 5))
+
+    def test_merge_matches_segments(self, db, rng):
+        """Compaction folds delta and tombstones into a clean main segment with the same results"""
+        segment = load_segment(db)
+        populate(db, rng, {'verilog': 10})
+        for item_id in segment.main.ids[:4].tolist():
+            delete_embedding(db, 'sections', item_id)
+        db.commit()
+        segment.apply_changes(db, 'sections', 'verilog', MODEL)
+
+        queries = random_vectors(rng, 10)
+        before = [segment.search(query, K) for query in queries]
+        merged = SegmentedMatrix.merge(segment.snapshot())
+
+        assert not merged.dirty
+        assert len(merged) == len(segment) == 66
+        assert np.all(np.diff(merged.main.ids) > 0)
+        assert merged.high_water == segment.high_water
+        for query, hits in zip(queries, before):
+            assert_same_hits(merged.search(query, K), hits)
+        assert_matches_brute_force(merged, db, queries)
+
+    def test_ivf_main_over_fetches_past_tombstones(self, db, rng):
+        """With an index on the main segment, tombstoned rows are skipped and k live rows returned"""
+        segment = load_segment(db, index_type='ivf', n_lists=4)
+        for item_id in segment.main.ids[::2].tolist():
+            delete_embedding(db, 'sections', item_id)
+        db.commit()
+        segment.apply_changes(db, 'sections', 'verilog', MODEL)
+
+        # Probing every list makes IVF exact, so results must equal brute force
+        assert_matches_brute_force(segment, db, random_vectors(rng, 10), nprobe=4)
+        merged = SegmentedMatrix.merge(segment.snapshot(), 'ivf', {'n_lists': 4})
+        assert merged.index is not None
+        assert_matches_brute_force(merged, db, random_vectors(rng, 10), nprobe=4)
+
+    def test_needs_compaction(self, db, rng, monkeypatch):
+        monkeypatch.setattr(vector_store, 'COMPACT_MIN_ROWS', 5)
+        segment = load_segment(db)
+        populate(db, rng, {'verilog': 5})
+        segment.apply_changes(db, 'sections', 'verilog', MODEL)
+        assert not segment.needs_compaction()  # 5 pending rows, not more than 5 or 10% of 60
+
+        populate(db, rng, {'verilog': 2})
+        segment.apply_changes(db, 'sections', 'verilog', MODEL)
+        assert segment.needs_compaction()
+
+
+class TestVectorStoreCompaction:
+    """Test suite for change application and background compaction in VectorStore"""
+
+    def test_refresh_then_background_compaction(self, tmp_path, rng, monkeypatch):
+        monkeypatch.setattr(vector_store, 'COMPACT_MIN_ROWS', 3)
+        db_path = tmp_path / 'lrm.db'
+        conn = create_db(db_path)
+        populate(conn, rng, {'verilog': 30, 'vhdl': 10})
+
+        store = VectorStore(str(db_path), MODEL)
+        try:
+            queries = random_vectors(rng, 8)
+            for query in queries:
+                assert_same_hits(store.search('sections', 'verilog', query, K),
+                                 brute_force(conn, 'sections', ['verilog'], query, K))
+
+            populate(conn, rng, {'verilog': 6})
+            for item_id in store.get_matrix('sections', 'verilog').main.ids[:3].tolist():
+                delete_embedding(conn, 'sections', item_id)
+            bump_generation(conn)
+            conn.commit()
+
+            assert store.refresh() == 1
+
+            deadline = time.monotonic() + 10
+            while True:
+                stats = next(s for s in store.segment_stats() if s['language'] == 'verilog')
+                if not stats['compacting'] and stats['delta_rows'] == 0 and stats['tombstones'] == 0:
+                    break
+                assert time.monotonic() < deadline, f"Compaction did not finish: {stats}"
+                time.sleep(0.01)
+
+            assert stats['rows'] == stats['main_rows'] == 33
+            for query in queries:
+                assert_same_hits(store.search('sections', 'verilog', query, K),
+                                 brute_force(conn, 'sections', ['verilog'], query, K))
+        finally:
+            store.close()
+            conn.close()
+
+
+class TestMultiLanguageMatrix:
+    """Test suite for the all-languages matrix and its offsets"""
+
+    @pytest.fixture
+    def setup(self, rng):
+        conn = create_db()
+        populate(conn, rng, {'verilog': 25, 'systemverilog': 15, 'vhdl': 10})
+        matrices = {language: EmbeddingMatrix.from_db(conn, 'sections', language, MODEL)
+                    for language in ('verilog', 'systemverilog', 'vhdl')}
+        yield conn, MultiLanguageMatrix.from_matrices(matrices)
+        conn.close()
+
+    def test_offsets(self, setup):
+        conn, multi = setup
+        assert multi.languages == ['systemverilog', 'verilog', 'vhdl']
+        assert multi.offsets.tolist() == [0, 15, 40, 50]
+        assert multi.row_languages(np.array([0, 14, 15, 39, 40, 49])) == \
+            ['systemverilog', 'systemverilog', 'verilog', 'verilog', 'vhdl', 'vhdl']
+
+        for language in multi.languages:
+            language_ids = {row[0] for row in conn.execute(
+                "SELECT section_id FROM section_embeddings WHERE language = ?", (language,))}
+            assert set(multi.ids[multi.language_rows(language)].tolist()) == language_ids
+
+    def test_rows_for_ids(self, setup):
+        _, multi = setup
+        rows = multi.rows_for_ids([int(multi.ids[7]), 10 ** 6, int(multi.ids[42])])
+        assert rows.tolist() == [7, 42]
+
+    def test_search_per_language_and_merged(self, setup, rng):
+        conn, multi = setup
+        for query in random_vectors(rng, 5):
+            result = multi.search(query, K, ['vhdl', 'verilog'])
+            assert set(result['by_language']) == {'vhdl', 'verilog'}
+            for language, hits in result['by_language'].items():
+                assert_same_hits(hits, brute_force(conn, 'sections', [language], query, K))
+            merged = [(item_id, score) for _, item_id, score in result['merged']]
+            assert_same_hits(merged, brute_force(conn, 'sections', ['vhdl', 'verilog'], query, K))
+
+    def test_search_batch_matches_single_queries(self, setup, rng):
+        """One Q @ E.T with per-query languages and k equals brute force per query"""
+        conn, multi = setup
+        languages = [None, ['vhdl'], ['verilog', 'vhdl'], ['systemverilog'], ['vhdl'], ['missing']]
+        ks = [3, 5, 7, 1, 4, 3]
+        queries = random_vectors(rng, len(languages))
+
+        results = multi.search_batch(queries, ks, languages)
+        assert len(results) == len(queries)
+        for query, k, langs, hits in zip(queries, ks, languages, results):
+            searched = [lang for lang in (langs or multi.languages) if lang in multi.languages]
+            expected = brute_force(conn, 'sections', searched, query, k) if searched else []
+            assert_same_hits([(item_id, score) for _, item_id, score in hits], expected)
+
+            # Each hit carries the language owning its row
+            for language, item_id, _ in hits:
+                assert language in searched
+                assert item_id in multi.ids[multi.language_rows(language)]
+
+    def test_empty(self):
+        multi = MultiLanguageMatrix.from_matrices({})
+        assert len(multi) == 0
+        assert multi.search(np.ones(4), K) == {'by_language': {}, 'merged': []}
+        assert multi.search_batch(np.ones((2, 4)), [1, 1], [None, None]) == [[], []]
@@ -0,0 +1,989 @@
+#!/usr/bin/env python3
+"""
+In-memory vector search over embeddings stored in the HDL LRM database.
+
+Embeddings for each (kind, language, model) are loaded once into a contiguous,
+L2-normalized float32 matrix. A query is scored with a single matrix-vector
+product and the top-k rows are selected with argpartition, replacing per-row
+cosine loops and LIKE scans.
+
+Kinds:
+    sections - section_embeddings (LRM sections)
+    code     - code_embeddings (code_examples rows)
+    tables   - table_embeddings (tables rows)
+
+If export_embeddings.py has written contiguous .npy files for the model, they
+are memory-mapped instead (O(1) startup, page cache shared between
+processes); the database is used for sets that are missing.
+
+By default each query is an exact scan. With index_type='ivf' (see
+ann_index.py) an approximate index is loaded from the export or built at load
+time, trading a little recall for sub-linear search on large sets.
+
+For searches across several languages, all languages of a kind are held in
+one MultiLanguageMatrix with an offset table: one query encode and one
+matrix product give both per-language top-k and a merged ranking. A batch of
+queries (each with its own languages and k) is scored with a single
+matrix-matrix product, Q @ E.T, and per-row argpartition. Subtree, depth and
+page-range filters are evaluated on precomputed section metadata arrays (see
+section_metadata.py) before scoring, so filtered searches only score the
+rows that pass.
+
+Each loaded set is a SegmentedMatrix: an immutable main segment (matrix and
+index) plus a small, exactly scanned delta segment. check_generation()
+compares the database's index generation counter (see
+utils/index_generation.py) with the last one seen; when parse_lrm.py or
+generate_embeddings.py has changed the data, only the embedding rows added
+since the segments were loaded are read into the delta, and deleted or
+re-embedded items become tombstones. Once enough changes accumulate, a
+background compaction merges the segments into a new main segment (and
+index) and swaps it in. reloaded() builds a complete, warm replacement store
+off the serving path instead (see index_reloader.py).
+"""
+
+import copy
+import json
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ann_index import VectorIndex, build_index, load_index, top_k_indices, top_k_indices_rows
+from embedding_codec import decode_row, has_blob_column
+from section_metadata import FILTERS, SectionMetadata
+from utils.embedding_tables import EMBEDDING_TABLES
+from utils.index_generation import read_generation
+
+
+# Queries used to hydrate search hits into response rows, keyed by kind
+ITEM_QUERIES = {
+    'sections': """
+        SELECT s.id, s.language, s.section_number, s.title, s.content, s.page_start, s.page_end
+        FROM sections s
+        WHERE s.id IN ({ids})
+    """,
+    'code': """
+        SELECT ce.id, ce.language, ce.code, ce.description, s.section_number, s.title AS section_title,
+               s.page_start, s.page_end
+        FROM code_examples ce
+        JOIN sections s ON ce.section_id = s.id
+        WHERE ce.id IN ({ids})
+    """,
+    'tables': """
+        SELECT t.id, t.language, t.caption, t.markdown, s.section_number, s.title AS section_title,
+               s.page_start, s.page_end
+        FROM tables t
+        JOIN sections s ON t.section_id = s.id
+        WHERE t.id IN ({ids})
+    """,
+}
+
+
+# Most often the database's index generation is read (seconds)
+GENERATION_CHECK_INTERVAL_S = 1.0
+
+# Compact a segmented set once its delta rows plus tombstones exceed both of these
+COMPACT_MIN_ROWS = 1000
+COMPACT_FRACTION = 0.1  # Of the main segment's rows
+
+# Exported embedding sets: <export dir>/<model slug>/manifest.json (see export_embeddings.py)
+MANIFEST_NAME = 'manifest.json'
+
+
+def model_export_dir(base_dir: Path, model_name: str) -> Path:
+    """Directory holding a model's exported embedding files"""
+    return Path(base_dir) / model_name.replace('/', '--')
+
+
+def read_manifest(export_dir: Path) -> Optional[dict]:
+    """Load an export manifest, or None if there is no (readable) export"""
+    try:
+        return json.loads((Path(export_dir) / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def max_row_id(conn: sqlite3.Connection, table: str) -> int:
+    """Largest embedding row id in a table (row ids only increase: AUTOINCREMENT)"""
+    return conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row in place (zero rows are left as zeros)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def normalize_query(query: np.ndarray) -> np.ndarray:
+    """Query embedding as a unit-length float32 vector"""
+    query = np.asarray(query, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    return query / norm if norm > 0 else query
+
+
+class EmbeddingMatrix:
+    """Contiguous normalized embedding matrix with its item ids"""
+
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray, index: Optional[VectorIndex] = None):
+        self.ids = ids
+        self.matrix = matrix
+        self.index = index  # Approximate index over matrix (None = exact scan)
+
+    @classmethod
+    def from_db(
+        cls,
+        conn: sqlite3.Connection,
+        kind: str,
+        language: str,
+        model_name: str,
+        max_row_id: Optional[int] = None
+    ) -> 'EmbeddingMatrix':
+        """Load all embeddings of a kind for one language and model (up to an embedding row id)"""
+        table, fk = EMBEDDING_TABLES[kind]
+        # Databases not yet migrated by migrate_embeddings.py only have JSON
+        blob_column = 'embedding_blob' if has_blob_column(conn, table) else 'NULL'
+
+        rows = conn.execute(f"""
+            SELECT {fk}, {blob_column}, embedding_json
+            FROM {table}
+            WHERE language = ? AND embedding_model = ? AND id <= ?
+            ORDER BY {fk}
+        """, (language, model_name, max_row_id if max_row_id is not None else 2 ** 63 - 1)).fetchall()
+
+        if not rows:
+            return cls(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32))
+
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        matrix = np.vstack([decode_row(r[1], r[2]) for r in rows]).astype(np.float32, copy=False)
+        return cls(ids, normalize_rows(matrix))
+
+    @classmethod
+    def from_npy(cls, vectors_path: Path, ids_path: Path) -> 'EmbeddingMatrix':
+        """Memory-map an exported (already normalized) matrix and its ids"""
+        return cls(np.load(ids_path), np.load(vectors_path, mmap_mode='r'))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: np.ndarray, k: int, **params) -> List[Tuple[int, float]]:
+        """
+        Find the k most similar items to a query embedding.
+
+        Args:
+            query: Query embedding (normalized here)
+            k: Number of results
+            **params: Index search parameters (e.g. nprobe for ivf)
+
+        Returns:
+            List of (item_id, cosine_similarity), best first
+        """
+        if len(self) == 0:
+            return []
+
+        query = normalize_query(query)
+
+        if self.index is not None:
+            idx, scores = self.index.search(query, k, **params)
+            return [(int(self.ids[i]), float(score)) for i, score in zip(idx, scores)]
+
+        scores = self.matrix @ query
+        idx = top_k_indices(scores, k)
+        return [(int(self.ids[i]), float(scores[i])) for i in idx]
+
+
+class SegmentedMatrix:
+    """
+    One embedding set as an immutable main segment plus an append-only delta.
+
+    Embeddings added after the main segment was loaded go into the small,
+    exactly scanned delta segment; deleted or re-embedded items become
+    tombstones on the main segment, so neither the matrix nor its index is
+    rebuilt. merge() folds everything into a new main segment.
+    """
+
+    def __init__(self, main: EmbeddingMatrix, high_water: int):
+        """
+        Args:
+            main: Main segment (with its index, if any)
+            high_water: Largest embedding row id reflected in the segments
+        """
+        self.main = main
+        self.delta = EmbeddingMatrix(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32))
+        self.tombstones = np.zeros(len(main), dtype=bool)
+        self.dead = 0
+        self.high_water = high_water
+        self.version = 0  # Increases on every change (compaction only swaps in an unchanged set)
+        self._live = None
+
+    @property
+    def index(self) -> Optional[VectorIndex]:
+        return self.main.index
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are delta rows or tombstones"""
+        return self.dead > 0 or len(self.delta) > 0
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Ids of the live rows (main minus tombstones, then delta)"""
+        return self._live_arrays()[0]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Live rows as one matrix (a copy only while the set is dirty)"""
+        return self._live_arrays()[1]
+
+    def __len__(self) -> int:
+        return len(self.main) - self.dead + len(self.delta)
+
+    def _live_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.dirty:
+            return self.main.ids, self.main.matrix
+        if self._live is None:
+            self._live = merge_rows(self.main, self.delta, self.tombstones)
+        return self._live
+
+    def search(self, query: np.ndarray, k: int, **params) -> List[Tuple[int, float]]:
+        """Top-k over both segments, skipping tombstones (see EmbeddingMatrix.search)"""
+        if len(self) == 0:
+            return []
+
+        query = normalize_query(query)
+        hits = []
+
+        if len(self.main) > self.dead:
+            if self.main.index is not None:
+                # Over-fetch by the tombstone count so k live rows remain
+                idx, scores = self.main.index.search(query, k + self.dead, **params)
+                keep = ~self.tombstones[idx]
+                idx, scores = idx[keep][:k], scores[keep][:k]
+            else:
+                scores = self.main.matrix @ query
+                if self.dead:
+                    scores[self.tombstones] = -np.inf
+                idx = top_k_indices(scores, min(k, len(self.main) - self.dead))
+                scores = scores[idx]
+            hits = [(int(self.main.ids[i]), float(score)) for i, score in zip(idx, scores)]
+
+        if len(self.delta):
+            hits.extend(self.delta.search(query, k))
+            hits.sort(key=lambda hit: -hit[1])
+        return hits[:k]
+
+    def apply_changes(self, conn: sqlite3.Connection, kind: str, language: str, model_name: str) -> bool:
+        """
+        Bring the segments up to date with the database.
+
+        Only embedding rows added since high_water are read and decoded; they
+        are appended to the delta. Items that were deleted or re-embedded
+        become tombstones on the main segment (or leave the delta).
+
+        Returns:
+            True if the live rows changed
+        """
+        table, fk = EMBEDDING_TABLES[kind]
+        blob_column = 'embedding_blob' if has_blob_column(conn, table) else 'NULL'
+
+        new_rows = conn.execute(f"""
+            SELECT id, {fk}, {blob_column}, embedding_json
+            FROM {table}
+            WHERE language = ? AND embedding_model = ? AND id > ?
+            ORDER BY id
+        """, (language, model_name, self.high_water)).fetchall()
+        # Read after new_rows, so a row deleted in between is not added
+        live = np.fromiter((row[0] for row in conn.execute(
+            f"SELECT {fk} FROM {table} WHERE language = ? AND embedding_model = ?",
+            (language, model_name)
+        )), dtype=np.int64)
+
+        if new_rows:
+            self.high_water = new_rows[-1][0]
+
+        # Latest row per item (an item may have been re-embedded more than once)
+        latest = {item_id: (blob, json_text) for _, item_id, blob, json_text in new_rows}
+        added = np.fromiter(latest, dtype=np.int64, count=len(latest))
+        added = added[np.isin(added, live)]
+
+        tombstones = self.tombstones | ~np.isin(self.main.ids, live) | np.isin(self.main.ids, added)
+        keep_delta = np.isin(self.delta.ids, live) & ~np.isin(self.delta.ids, added)
+
+        dead = int(tombstones.sum())
+        if not len(added) and dead == self.dead and keep_delta.all():
+            return False
+
+        parts = [self.delta.matrix[keep_delta]]
+        if len(added):
+            parts.append(normalize_rows(np.vstack([decode_row(*latest[item_id]) for item_id in added.tolist()])
+                                        .astype(np.float32, copy=False)))
+        parts = [part for part in parts if len(part)]
+
+        # New arrays rather than in-place updates, so snapshots taken for compaction stay consistent
+        self.delta = EmbeddingMatrix(
+            np.concatenate([self.delta.ids[keep_delta], added]),
+            np.vstack(parts) if parts else np.empty((0, 0), dtype=np.float32)
+        )
+        self.tombstones = tombstones
+        self.dead = dead
+        self.version += 1
+        self._live = None
+        return True
+
+    def needs_compaction(self) -> bool:
+        """Whether enough delta rows and tombstones have accumulated to merge the segments"""
+        pending = self.dead + len(self.delta)
+        return pending > max(COMPACT_MIN_ROWS, COMPACT_FRACTION * len(self.main))
+
+    def snapshot(self) -> tuple:
+        """Consistent view of the segments for merge() (take it under the owner's lock)"""
+        return self.main, self.delta, self.tombstones, self.high_water, self.version
+
+    @classmethod
+    def merge(cls, snapshot: tuple, index_type: str = 'exact', index_params: Optional[dict] = None) -> 'SegmentedMatrix':
+        """Fold a snapshot's live rows into a new main segment (rebuilding the index)"""
+        main, delta, tombstones, high_water, _ = snapshot
+        ids, matrix = merge_rows(main, delta, tombstones)
+
+        order = np.argsort(ids, kind='stable')
+        merged = EmbeddingMatrix(ids[order], np.ascontiguousarray(matrix[order]))
+        if index_type != 'exact' and len(merged):
+            merged.index = build_index(index_type, merged.matrix, **(index_params or {}))
+        return cls(merged, high_water)
+
+    def share_main(self, view: EmbeddingMatrix):
+        """Use a view holding the same rows as a clean, exact main segment (avoids a second copy)"""
+        if self.main.index is None and not self.dirty:
+            self.main = view
+
+
+def merge_rows(main: EmbeddingMatrix, delta: EmbeddingMatrix, tombstones: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Ids and matrix of main's live rows followed by the delta rows"""
+    keep = ~tombstones
+    ids = np.concatenate([main.ids[keep], delta.ids])
+    parts = [part for part in (np.asarray(main.matrix[keep], dtype=np.float32), delta.matrix) if len(part)]
+    return ids, np.vstack(parts) if parts else np.empty((0, 0), dtype=np.float32)
+
+
+class MultiLanguageMatrix:
+    """Embeddings of every language of one kind in a single matrix with an offset table"""
+
+    def __init__(self, languages: List[str], offsets: np.ndarray, ids: np.ndarray, matrix: np.ndarray):
+        """
+        Args:
+            languages: Languages in matrix order
+            offsets: Language i owns rows offsets[i]:offsets[i + 1]
+            ids: Item id per row
+            matrix: Normalized (N, dim) matrix
+        """
+        self.languages = languages
+        self.offsets = offsets
+        self.ids = ids
+        self.matrix = matrix
+        self._id_order = np.argsort(ids, kind='stable')  # For id -> row lookups
+
+    @classmethod
+    def from_matrices(cls, matrices: Dict[str, EmbeddingMatrix]) -> 'MultiLanguageMatrix':
+        """Stack per-language matrices (empty ones are skipped)"""
+        languages = sorted(lang for lang, m in matrices.items() if len(m))
+        if not languages:
+            return cls([], np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64),
+                       np.empty((0, 0), dtype=np.float32))
+
+        counts = [len(matrices[lang]) for lang in languages]
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        ids = np.concatenate([matrices[lang].ids for lang in languages])
+        matrix = np.vstack([np.asarray(matrices[lang].matrix, dtype=np.float32) for lang in languages])
+        return cls(languages, offsets, ids, matrix)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def language_rows(self, language: str) -> slice:
+        """Row range of one language"""
+        i = self.languages.index(language)
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def row_languages(self, rows: np.ndarray) -> List[str]:
+        """Language owning each matrix row"""
+        owners = np.searchsorted(self.offsets, rows, side='right') - 1
+        return [self.languages[owner] for owner in owners]
+
+    def rows_for_ids(self, ids: List[int]) -> np.ndarray:
+        """Matrix rows of the given item ids, in order (ids without an embedding are dropped)"""
+        if len(self) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        ids = np.asarray(ids, dtype=np.int64)
+        sorted_ids = self.ids[self._id_order]
+        pos = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+        return self._id_order[pos[sorted_ids[pos] == ids]]
+
+    def search_rows(self, query: np.ndarray, rows: np.ndarray, k: int) -> List[Tuple[str, int, float]]:
+        """
+        Search only the given matrix rows (e.g. full-text prefilter candidates).
+
+        Returns:
+            List of (language, item_id, similarity), best first
+        """
+        if len(rows) == 0:
+            return []
+
+        # Sorted contiguous rows (e.g. a subtree in document order) are scored through a view, not a gather
+        if rows[-1] - rows[0] + 1 == len(rows) and np.all(rows[1:] > rows[:-1]):
+            candidates = self.matrix[rows[0]:rows[-1] + 1]
+        else:
+            candidates = self.matrix[rows]
+        scores = candidates @ normalize_query(query)
+        idx = top_k_indices(scores, k)
+        hit_rows = rows[idx]
+        return [(language, int(self.ids[r]), float(scores[i]))
+                for language, r, i in zip(self.row_languages(hit_rows), hit_rows, idx)]
+
+    def language_view(self, language: str) -> EmbeddingMatrix:
+        """Per-language matrix sharing this matrix's memory"""
+        rows = self.language_rows(language)
+        return EmbeddingMatrix(self.ids[rows], self.matrix[rows])
+
+    def search(self, query: np.ndarray, k: int, languages: Optional[List[str]] = None) -> dict:
+        """
+        Search several languages with one matrix product.
+
+        Args:
+            query: Query embedding (normalized here)
+            k: Results per language and in the merged ranking
+            languages: Languages to search (default: all)
+
+        Returns:
+            Dict with 'by_language' ({language: [(item_id, similarity)]}) and
+            'merged' ([(language, item_id, similarity)] best first)
+        """
+        languages = [lang for lang in (languages or self.languages) if lang in self.languages]
+        if not languages or len(self) == 0:
+            return {'by_language': {}, 'merged': []}
+
+        scores = self.matrix @ normalize_query(query)
+
+        by_language = {}
+        merged = []
+        for language in languages:
+            rows = self.language_rows(language)
+            idx = top_k_indices(scores[rows], k) + rows.start
+            by_language[language] = [(int(self.ids[i]), float(scores[i])) for i in idx]
+            merged.extend((language, item_id, similarity) for item_id, similarity in by_language[language])
+
+        # The global top-k is always within the union of the per-language top-k
+        merged.sort(key=lambda hit: -hit[2])
+        return {'by_language': by_language, 'merged': merged[:k]}
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        ks: List[int],
+        languages: List[Optional[List[str]]]
+    ) -> List[List[Tuple[str, int, float]]]:
+        """
+        Search many queries with one matrix-matrix product.
+
+        Queries that search the same languages are ranked together with one
+        per-row argpartition over their columns of the score matrix.
+
+        Args:
+            queries: (N, dim) query embeddings (normalized here)
+            ks: Number of results per query
+            languages: Languages per query (None = all)
+
+        Returns:
+            One [(language, item_id, similarity)] list per query, best first, in query order
+        """
+        results = [[] for _ in range(len(queries))]
+        if len(self) == 0 or len(queries) == 0:
+            return results
+
+        queries = normalize_rows(np.array(queries, dtype=np.float32, ndmin=2))
+        scores = queries @ self.matrix.T
+
+        # Group queries by the (sorted) set of languages they search
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for i, langs in enumerate(languages):
+            key = tuple(sorted(lang for lang in (langs or self.languages) if lang in self.languages))
+            groups.setdefault(key, []).append(i)
+
+        for key, members in groups.items():
+            if not key:
+                continue
+
+            if len(key) == len(self.languages):
+                columns = None
+                group_scores = scores[members]
+            else:
+                columns = np.concatenate([np.arange(self.language_rows(lang).start, self.language_rows(lang).stop)
+                                          for lang in key])
+                group_scores = scores[np.ix_(members, columns)]
+
+            top = top_k_indices_rows(group_scores, max(ks[i] for i in members))
+            for row, i in enumerate(members):
+                idx = top[row, :ks[i]]
+                matrix_rows = idx if columns is None else columns[idx]
+                results[i] = [(language, int(self.ids[r]), float(group_scores[row, c]))
+                              for language, r, c in zip(self.row_languages(matrix_rows), matrix_rows, idx)]
+
+        return results
+
+
+class VectorStore:
+    """Lazily loaded embedding matrices for each (kind, language) of one model"""
+
+    def __init__(
+        self,
+        db_path: str,
+        model_name: str,
+        export_dir: Optional[str] = None,
+        index_type: str = 'exact',
+        index_params: Optional[dict] = None,
+        search_params: Optional[dict] = None,
+        refresh_on_generation: bool = True
+    ):
+        """
+        Args:
+            db_path: Path to SQLite database
+            model_name: Embedding model whose vectors are searched
+            export_dir: Base directory of export_embeddings.py output (default: embeddings/ next to db)
+            index_type: 'exact' or an ann_index type such as 'ivf'
+            index_params: Build parameters when the index is built at load time
+            search_params: Parameters passed to every index search (e.g. {'nprobe': 16})
+            refresh_on_generation: Apply changes in check_generation() (off when a reloader
+                swaps in new stores instead)
+        """
+        self.db_path = Path(db_path)
+        self.model_name = model_name
+        self.index_type = index_type
+        self.index_params = index_params or {}
+        self.search_params = search_params or {}
+        self.refresh_on_generation = refresh_on_generation
+        self.export_base = Path(export_dir) if export_dir else self.db_path.parent / 'embeddings'
+        self.export_dir = model_export_dir(self.export_base, model_name)
+        # Identifies the export the sets are loaded from (reloaded() reloads them when it changes)
+        self.export_created_at = (read_manifest(self.export_dir) or {}).get('created_at')
+        self._matrices: Dict[Tuple[str, str], SegmentedMatrix] = {}
+        self._multi: Dict[str, MultiLanguageMatrix] = {}
+        self._metadata: Dict[str, SectionMetadata] = {}
+        self._lock = threading.RLock()
+        self.generation: Optional[int] = None  # Index generation of the loaded data
+        self._generation_checked = 0.0
+
+        # Compactions run one at a time, off the search path
+        self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='compact')
+        self._compacting = set()
+
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"Database not found: {db_path}")
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a read-only connection (one per caller; safe across server threads)"""
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+
+    def check_generation(self) -> int:
+        """
+        Current index generation, read at most once per GENERATION_CHECK_INTERVAL_S.
+
+        When the generation has changed, loaded sets pick up the changed
+        embeddings (see refresh()) instead of being reloaded. Without
+        refresh_on_generation the generation is only read once.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.generation is not None and (not self.refresh_on_generation
+                                                or now - self._generation_checked < GENERATION_CHECK_INTERVAL_S):
+                return self.generation
+
+            conn = self.connect()
+            try:
+                generation = read_generation(conn)
+            finally:
+                conn.close()
+            self._generation_checked = now
+
+            if self.generation is not None and generation != self.generation:
+                print(f"Index generation {self.generation} -> {generation}; applying changes", file=sys.stderr)
+                self.refresh()
+            self.generation = generation
+            return generation
+
+    def get_matrix(self, kind: str, language: str) -> SegmentedMatrix:
+        """Get the embedding set for a kind/language, loading it on first use"""
+        if kind not in EMBEDDING_TABLES:
+            raise ValueError(f"Invalid kind: {kind}")
+
+        key = (kind, language)
+        with self._lock:
+            if key not in self._matrices:
+                table, _ = EMBEDDING_TABLES[kind]
+                conn = self.connect()
+                try:
+                    high_water = max_row_id(conn, table)
+                    exported = self._load_exported(conn, kind, language)
+                    if exported is None:
+                        segment = SegmentedMatrix(
+                            EmbeddingMatrix.from_db(conn, kind, language, self.model_name, max_row_id=high_water),
+                            high_water)
+                    else:
+                        # Rows embedded since the export (or removed) are applied on top
+                        segment = SegmentedMatrix(*exported)
+                        segment.apply_changes(conn, kind, language, self.model_name)
+
+                    main = segment.main
+                    if main.index is None and self.index_type != 'exact' and len(main):
+                        main.index = build_index(self.index_type, main.matrix, **self.index_params)
+                    self._matrices[key] = segment
+                    if segment.needs_compaction():
+                        self._schedule_compaction(key)
+                except sqlite3.OperationalError:
+                    # Embedding table missing (database predates this kind) - nothing to search
+                    self._matrices[key] = SegmentedMatrix(
+                        EmbeddingMatrix(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)), 0)
+                finally:
+                    conn.close()
+            return self._matrices[key]
+
+    def _load_exported(
+        self,
+        conn: sqlite3.Connection,
+        kind: str,
+        language: str
+    ) -> Optional[Tuple[EmbeddingMatrix, int]]:
+        """
+        Memory-map an exported set if it exists.
+
+        Returns:
+            Tuple of (matrix, largest embedding row id it contains), or None
+        """
+        manifest = read_manifest(self.export_dir)
+        if not manifest or manifest.get('model') != self.model_name:
+            return None
+
+        entry = manifest.get('sets', {}).get(f"{kind}/{language}")
+        if entry is None:
+            return None
+
+        table, _ = EMBEDDING_TABLES[kind]
+        high_water = entry.get('max_row_id')
+        if high_water is None:
+            # Exports that predate max_row_id cannot be caught up incrementally
+            count = conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE language = ? AND embedding_model = ?",
+                (language, self.model_name)
+            ).fetchone()[0]
+            if count != entry['count']:
+                print(f"Exported {kind}/{language} embeddings are stale ({entry['count']} vs {count} in database); "
+                      f"loading from database (re-run export_embeddings.py)", file=sys.stderr)
+                return None
+            high_water = max_row_id(conn, table)
+
+        try:
+            matrix = EmbeddingMatrix.from_npy(self.export_dir / entry['vectors'], self.export_dir / entry['ids'])
+        except (OSError, ValueError) as e:
+            print(f"Exported {kind}/{language} embeddings unreadable ({e}); loading from database",
+                  file=sys.stderr)
+            return None
+        # The .npy files may have been rewritten by an export whose manifest is not (yet) this one
+        if len(matrix) != entry['count'] or len(matrix.matrix) != entry['count']:
+            print(f"Exported {kind}/{language} embeddings do not match the manifest "
+                  f"({len(matrix.matrix)} rows vs {entry['count']}); loading from database", file=sys.stderr)
+            return None
+
+        index_dir = entry.get('indexes', {}).get(self.index_type)
+        if index_dir:
+            matrix.index = load_index(self.export_dir / index_dir, matrix.matrix)
+        return matrix, high_water
+
+    def get_languages(self, kind: str) -> List[str]:
+        """Languages that have embeddings of a kind for this model"""
+        table, _ = EMBEDDING_TABLES[kind]
+        conn = self.connect()
+        try:
+            return [row[0] for row in conn.execute(
+                f"SELECT DISTINCT language FROM {table} WHERE embedding_model = ? ORDER BY language",
+                (self.model_name,)
+            )]
+        except sqlite3.OperationalError:
+            return []
+        finally:
+            conn.close()
+
+    def get_multi_matrix(self, kind: str) -> MultiLanguageMatrix:
+        """Get the all-languages matrix for a kind, building it on first use"""
+        if kind not in EMBEDDING_TABLES:
+            raise ValueError(f"Invalid kind: {kind}")
+
+        with self._lock:
+            if kind not in self._multi:
+                matrices = {lang: self.get_matrix(kind, lang) for lang in self.get_languages(kind)}
+                multi = MultiLanguageMatrix.from_matrices(matrices)
+
+                # Clean exact-scan languages become views into the stacked matrix instead of a second copy
+                for language in multi.languages:
+                    matrices[language].share_main(multi.language_view(language))
+
+                self._multi[kind] = multi
+            return self._multi[kind]
+
+    def get_section_metadata(self, kind: str) -> SectionMetadata:
+        """Get section metadata arrays aligned with the all-languages matrix of a kind"""
+        with self._lock:
+            multi = self.get_multi_matrix(kind)
+            if kind not in self._metadata:
+                conn = self.connect()
+                try:
+                    self._metadata[kind] = SectionMetadata.from_db(conn, kind, multi)
+                finally:
+                    conn.close()
+            return self._metadata[kind]
+
+    def filter_rows(self, kind: str, languages: Optional[List[str]], filters: dict) -> np.ndarray:
+        """
+        Rows of the all-languages matrix passing section filters.
+
+        Args:
+            kind: 'sections', 'code' or 'tables'
+            languages: Languages to include (None = all)
+            filters: Any of section, min_depth, max_depth, page_from, page_to
+
+        Raises:
+            ValueError: On an unknown filter
+        """
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown filter(s): {', '.join(sorted(unknown))} (expected {', '.join(FILTERS)})")
+
+        metadata = self.get_section_metadata(kind)
+        return metadata.filter_rows(languages or metadata.multi.languages, **filters)
+
+    def search_filtered(
+        self,
+        kind: str,
+        query: np.ndarray,
+        k: int,
+        languages: Optional[List[str]],
+        filters: dict
+    ) -> Tuple[List[Tuple[str, int, float]], int]:
+        """
+        Top-k over the rows passing section filters (exact scan of those rows only).
+
+        Returns:
+            Tuple of ([(language, item_id, similarity)] best first, number of rows scanned)
+        """
+        rows = self.filter_rows(kind, languages, filters)
+        return self.get_multi_matrix(kind).search_rows(query, rows, k), len(rows)
+
+    def search(self, kind: str, language: str, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Top-k (item_id, similarity) for a query embedding"""
+        return self.get_matrix(kind, language).search(query, k, **self.search_params)
+
+    def search_languages(self, kind: str, query: np.ndarray, k: int, languages: Optional[List[str]] = None) -> dict:
+        """Per-language and merged top-k across languages (see MultiLanguageMatrix.search)"""
+        return self.get_multi_matrix(kind).search(query, k, languages)
+
+    def search_batch(
+        self,
+        kind: str,
+        queries: np.ndarray,
+        ks: List[int],
+        languages: List[Optional[List[str]]]
+    ) -> List[List[Tuple[str, int, float]]]:
+        """Top-k per query for a batch of query embeddings (see MultiLanguageMatrix.search_batch)"""
+        return self.get_multi_matrix(kind).search_batch(queries, ks, languages)
+
+    def fetch_items(self, kind: str, hits: List[Tuple[int, float]]) -> List[dict]:
+        """Hydrate search hits into row dicts (in hit order) with a 'similarity' field"""
+        if not hits:
+            return []
+
+        conn = self.connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            ids = [item_id for item_id, _ in hits]
+            query = ITEM_QUERIES[kind].format(ids=','.join('?' * len(ids)))
+            rows = {row['id']: dict(row) for row in conn.execute(query, ids)}
+        finally:
+            conn.close()
+
+        results = []
+        for item_id, similarity in hits:
+            row = rows.get(item_id)
+            if row is not None:
+                row['similarity'] = similarity
+                results.append(row)
+        return results
+
+    def refresh(self) -> int:
+        """
+        Apply database changes to every loaded set (see SegmentedMatrix.apply_changes).
+
+        All-languages matrices are restacked only for kinds whose rows or
+        languages changed; section metadata is always reloaded, since sections
+        may have been reparsed without new embeddings.
+
+        Returns:
+            Number of sets that changed
+        """
+        with self._lock:
+            changed = 0
+            changed_kinds = set()
+            conn = self.connect()
+            try:
+                for key, segment in list(self._matrices.items()):
+                    kind, language = key
+                    try:
+                        if not segment.apply_changes(conn, kind, language, self.model_name):
+                            continue
+                    except sqlite3.OperationalError:
+                        continue
+                    changed += 1
+                    changed_kinds.add(kind)
+                    if segment.needs_compaction():
+                        self._schedule_compaction(key)
+            finally:
+                conn.close()
+
+            for kind in list(self._multi):
+                loaded = {language for loaded_kind, language in self._matrices if loaded_kind == kind}
+                # A language that gained its first embeddings has no loaded set yet
+                if kind in changed_kinds or not set(self.get_languages(kind)) <= loaded:
+                    del self._multi[kind]
+            self._metadata.clear()
+            return changed
+
+    def reloaded(self, generation: Optional[int] = None) -> 'VectorStore':
+        """
+        A new store over the database's current state, leaving this one untouched.
+
+        Loaded sets are carried over as copies caught up with
+        SegmentedMatrix.apply_changes (or loaded again if the export was
+        rewritten), and the all-languages matrices and section metadata in use
+        are rebuilt, so the new store is warm when it replaces this one.
+
+        Args:
+            generation: Index generation the new store reports (default: read from the database)
+        """
+        store = VectorStore(
+            self.db_path, self.model_name,
+            export_dir=self.export_base,
+            index_type=self.index_type,
+            index_params=self.index_params,
+            search_params=self.search_params,
+            refresh_on_generation=False
+        )
+
+        with self._lock:
+            carried = ({key: copy.copy(segment) for key, segment in self._matrices.items()}
+                       if store.export_created_at == self.export_created_at else {})
+            keys = list(self._matrices)
+            multi_kinds = list(self._multi)
+            metadata_kinds = list(self._metadata)
+
+        with store._lock:
+            conn = store.connect()
+            try:
+                for (kind, language), segment in carried.items():
+                    try:
+                        segment.apply_changes(conn, kind, language, store.model_name)
+                    except sqlite3.OperationalError:
+                        continue
+                    store._matrices[(kind, language)] = segment
+                    if segment.needs_compaction():
+                        store._schedule_compaction((kind, language))
+                store.generation = read_generation(conn) if generation is None else generation
+            finally:
+                conn.close()
+
+            for kind, language in keys:
+                store.get_matrix(kind, language)
+            for kind in multi_kinds:
+                store.get_multi_matrix(kind)
+            for kind in metadata_kinds:
+                store.get_section_metadata(kind)
+        return store
+
+    def close(self):
+        """Stop background compaction (searches keep working on what is loaded)"""
+        self._compactor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_compaction(self, key: Tuple[str, str]):
+        """Queue a background merge of a set's segments (lock held)"""
+        if key not in self._compacting:
+            try:
+                self._compactor.submit(self._compact, key)
+            except RuntimeError:
+                return  # Closed: a replacement store has taken over
+            self._compacting.add(key)
+
+    def _compact(self, key: Tuple[str, str]):
+        """
+        Merge a set's segments and swap the result in.
+
+        The merge (and index build) runs without the lock, so searches keep
+        using the old segments; if the set changed meanwhile, the result is
+        discarded and the merge retried.
+        """
+        retry = False
+        try:
+            with self._lock:
+                segment = self._matrices.get(key)
+                if segment is None:
+                    return
+                snapshot = segment.snapshot()
+
+            start = time.perf_counter()
+            compacted = SegmentedMatrix.merge(snapshot, self.index_type, self.index_params)
+
+            with self._lock:
+                if self._matrices.get(key) is not segment:
+                    return  # Invalidated meanwhile
+                if segment.version != snapshot[-1]:
+                    retry = True
+                    return
+                # Same live rows, so the all-languages matrix and metadata stay valid
+                self._matrices[key] = compacted
+            print(f"Compacted {key[0]}/{key[1]}: {len(segment.main)} main + {len(segment.delta)} delta rows, "
+                  f"{segment.dead} tombstones -> {len(compacted)} rows "
+                  f"({(time.perf_counter() - start) * 1000:.0f} ms)", file=sys.stderr)
+        except Exception as e:
+            print(f"Compaction of {key[0]}/{key[1]} failed: {e}", file=sys.stderr)
+        finally:
+            with self._lock:
+                self._compacting.discard(key)
+                segment = self._matrices.get(key)
+                if retry and segment is not None and segment.needs_compaction():
+                    self._schedule_compaction(key)
+
+    def segment_stats(self) -> List[dict]:
+        """Main/delta row and tombstone counts of every loaded set"""
+        with self._lock:
+            return [{
+                'kind': kind,
+                'language': language,
+                'rows': len(segment),
+                'main_rows': len(segment.main),
+                'delta_rows': len(segment.delta),
+                'tombstones': segment.dead,
+                'high_water': segment.high_water,
+                'index': type(segment.index).__name__ if segment.index is not None else 'exact',
+                'compacting': (kind, language) in self._compacting
+            } for (kind, language), segment in sorted(self._matrices.items())]
+
+    def invalidate(self):
+        """Drop loaded matrices so the next search reloads from the database"""
+        with self._lock:
+            self._matrices.clear()
+            self._multi.clear()
+            self._metadata.clear()
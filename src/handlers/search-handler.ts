@@ -3,7 +3,7 @@
  * Handles semantic search across LRM content
  */
 
-import { HDLDatabase } from '../storage/database.js';
+import { HDLDatabase, SectionFilters, SemanticSearchResult } from '../storage/database.js';
 import {
     createMetadata,
     formatSearchResponse,
@@ -17,18 +17,51 @@ export async function handleSearchLRM(db: HDLDatabase, args: any) {
         query,
         language,
         max_results = 5,
+        search_mode = 'semantic',
+        within_section,
+        max_depth,
+        page_from,
+        page_to,
         format = 'json',
         detail_level = 'minimal',
         include_metadata = true,
         verbose_errors = true
     } = args;
 
-    // Use semantic search
-    const results = await db.semanticSearchByText(
-        query,
-        language,
-        Math.min(max_results, 20)
-    );
+    // Section filters are evaluated in the embedding server before scoring
+    const filters: SectionFilters = {
+        section: within_section !== undefined ? String(within_section) : undefined,
+        max_depth,
+        page_from,
+        page_to
+    };
+    const hasFilters = Object.values(filters).some(value => value !== undefined);
+
+    // Hybrid modes fuse full-text and vector rankings in the embedding server
+    let stageTimings: Record<string, number> | undefined;
+    let results: SemanticSearchResult[];
+    if (search_mode === 'hybrid' || search_mode === 'prefilter') {
+        const hybrid = await db.hybridSearch(
+            query,
+            language,
+            Math.min(max_results, 20),
+            search_mode === 'prefilter',
+            hasFilters ? filters : undefined
+        );
+        results = hybrid.results;
+        stageTimings = hybrid.timings;
+    } else if (hasFilters) {
+        results = await db.filteredSemanticSearch(query, language, filters, Math.min(max_results, 20));
+    } else {
+        // Use semantic search ("all" ranks every language together in the embedding server)
+        results = language === 'all'
+            ? await db.semanticSearchAllLanguages(query, Math.min(max_results, 20))
+            : await db.semanticSearchByText(
+                query,
+                language,
+                Math.min(max_results, 20)
+            );
+    }
 
     if (results.length === 0) {
         // Structured error response
@@ -74,7 +107,9 @@ export async function handleSearchLRM(db: HDLDatabase, args: any) {
         query,
         language,
         detail_level,
-        metadata: (include_metadata && detail_level !== 'minimal') ? createMetadata('search_lrm', results.length, results.length) : undefined,
+        metadata: (include_metadata && detail_level !== 'minimal')
+            ? { ...createMetadata('search_lrm', results.length, results.length), stage_timings_ms: stageTimings }
+            : undefined,
         results: results.map(r => {
             // Minimal: only section_number, title, page, similarity
             const result: any = {
@@ -84,6 +119,10 @@ export async function handleSearchLRM(db: HDLDatabase, args: any) {
                 similarity: r.similarity
             };
 
+            if (r.language) {
+                result.language = r.language;
+            }
+
             // Preview: add first 200 chars of content
             if (detail_level === 'preview' || detail_level === 'full') {
                 result.content_preview = r.content.substring(0, 200) + (r.content.length > 200 ? '...' : '');
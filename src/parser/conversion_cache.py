@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of Docling conversions.
+
+Converting an LRM takes minutes, extracting sections from the converted
+document takes seconds. The converted document is saved as gzipped JSON,
+keyed by everything that determines it: the PDF's SHA-256, the Docling
+version and a hash of the pipeline options. A later parse of the same PDF
+(e.g. after changing extraction heuristics) loads it and goes straight to
+extraction. Upgrading Docling or changing the pipeline options gives a new
+key, so a stale conversion is never used.
+
+    data/docling_cache/<pdf sha256>-docling<version>-<options hash>.json.gz
+
+Parallel conversions (--jobs) are stored as their page-range parts and
+loaded back into a MergedDocument; either kind serves both serial and
+parallel runs.
+"""
+
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from docling_core.types.doc import DoclingDocument
+
+from pdf_conversion import MergedDocument
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent / 'data' / 'docling_cache'
+
+# Bump when the cache file layout changes
+CACHE_FORMAT = 1
+
+
+def cache_key(pdf_hash: str, docling_version: str, options_hash: str) -> str:
+    """File name stem of a conversion"""
+    return f"{pdf_hash}-docling{docling_version}-{options_hash[:16]}"
+
+
+def cache_path(cache_dir, key: str) -> Path:
+    """Cache file of a key"""
+    return Path(cache_dir) / f"{key}.json.gz"
+
+
+def save_conversion(path: Path, doc) -> int:
+    """
+    Write a converted document (written atomically, so readers never see a partial file).
+
+    Args:
+        path: Cache file from cache_path()
+        doc: DoclingDocument or MergedDocument
+
+    Returns:
+        Size of the cache file in bytes
+    """
+    if isinstance(doc, MergedDocument):
+        parts, ranges = doc.parts, doc.ranges
+    else:
+        parts, ranges = [doc], None
+
+    payload = {
+        'format': CACHE_FORMAT,
+        'ranges': ranges,
+        'parts': [part.export_to_dict() for part in parts]
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+    return path.stat().st_size
+
+
+def load_conversion(path: Path):
+    """
+    Read a cached conversion.
+
+    Returns:
+        DoclingDocument or MergedDocument, or None if there is no usable cache file
+    """
+    if not path.exists():
+        return None
+
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('format') != CACHE_FORMAT:
+            return None
+        parts = [DoclingDocument.model_validate(part) for part in payload['parts']]
+    except Exception as e:
+        print(f"  Warning: ignoring unreadable conversion cache {path.name}: {e}")
+        return None
+
+    if payload['ranges'] is None:
+        return parts[0]
+    return MergedDocument(parts, [tuple(r) for r in payload['ranges']])
@@ -85,6 +85,37 @@ def is_heading(item) -> bool:
     )
 
 
+def is_code_item(item) -> bool:
+    """
+    Check if an item is a code block (Docling CodeItem).
+    
+    Args:
+        item: A Docling item
+    
+    Returns:
+        True if item is code
+    """
+    return get_item_label(item) == 'code' or item.__class__.__name__ == 'CodeItem'
+
+
+def get_code_language(item) -> Optional[str]:
+    """
+    Get the programming language Docling detected for a code item.
+    
+    Args:
+        item: A Docling CodeItem
+    
+    Returns:
+        Language name (e.g., 'Verilog'), or None if unknown
+    """
+    language = getattr(item, 'code_language', None)
+    if language is None:
+        return None
+    
+    name = str(getattr(language, 'value', language))
+    return None if name.lower() == 'unknown' else name
+
+
 def extract_section_number(text: str) -> Optional[str]:
     """
     Extract section number from heading text.
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Page-to-section lookup for attributing tables and code examples.
+
+Section page ranges overlap: a page can hold the end of one section and the
+start of the next, and parent sections span their children. Attribution has
+always used the first section, in extraction order, whose range contains
+the page. PageIntervalIndex answers that in O(log n) instead of scanning all
+sections for every item. Sections are ordered stably by page_start, which is
+extraction order for extract_sections() output (starts never decrease in
+reading order); otherwise the earliest-starting section wins:
+
+    starts[i]   page_start of the i-th section (sorted)
+    reach[i]    max(page_end of sections 0..i), non-decreasing
+
+For page p, sections 0..bisect_right(starts, p) - 1 start on or before p,
+and the first of them that still reaches p is bisect_left(reach, p).
+"""
+
+import bisect
+from typing import Dict, List, Optional
+
+
+class PageIntervalIndex:
+    """First section (in extraction order) whose page range contains a page"""
+
+    def __init__(self, sections: List[Dict]):
+        """
+        Args:
+            sections: Section dicts with section_number, page_start and page_end, in
+                extraction order
+        """
+        ordered = sorted(range(len(sections)), key=lambda i: (sections[i]['page_start'], i))
+
+        self.numbers = [sections[i]['section_number'] for i in ordered]
+        self.starts = [sections[i]['page_start'] for i in ordered]
+        self.reach = []
+        reach = float('-inf')
+        for i in ordered:
+            reach = max(reach, sections[i]['page_end'])
+            self.reach.append(reach)
+
+        self.last = sections[-1]['section_number'] if sections else None
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def lookup(self, page: int) -> Optional[str]:
+        """
+        Section containing a page.
+
+        Args:
+            page: Page number
+
+        Returns:
+            Section number, or None if no section's range contains the page
+        """
+        candidates = bisect.bisect_right(self.starts, page)
+        first = bisect.bisect_left(self.reach, page, 0, candidates)
+        return self.numbers[first] if first < candidates else None
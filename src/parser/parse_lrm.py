@@ -10,16 +10,20 @@ Key Features:
 - Direct item iteration (no markdown intermediary)
 - SectionHeaderItem detection for better section boundaries
 - Accurate code/table association to sections
+- Converted documents cached per PDF hash, Docling version and pipeline options
+- Unchanged PDFs skipped when parser code and options match the last parse
 
 Usage:
-    python parse_lrm.py --pdf <path> --language <lang> --output <db_path>
+    python parse_lrm.py --pdf <path> --language <lang> --output <db_path> [--jobs N] [--no-cache] [--force]
 
 Example:
     python parse_lrm.py --pdf data/lrms/LRM_V_2005.pdf --language verilog --output data/hdl-lrm.db
     python parse_lrm.py --pdf data/test_snippets/verilog_snippet_5p.pdf --language verilog --output data/test.db
+    python parse_lrm.py --pdf data/lrms/LRM_SV_2023.pdf --language systemverilog --output data/hdl-lrm.db --jobs 4
 """
 
 import argparse
+import bisect
 import sqlite3
 import sys
 import re
@@ -37,24 +41,30 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='repla
 
 # Add parser directory to path for utils
 sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(1, str(Path(__file__).parent.parent))
 
 # Import utilities
 from docling_utils import (
     get_page_number,
     get_item_text,
     get_item_label,
+    get_code_language,
     is_heading,
+    is_code_item,
     extract_section_number,
     group_items_by_page
 )
+from page_index import PageIntervalIndex
+from utils.index_generation import bump_generation
+from utils.index_manifest import write_index_manifest
+
+# Modules whose code determines the parse result (hashed into parse_metadata.parse_signature)
+PARSER_SOURCES = ['parse_lrm.py', 'docling_utils.py', 'page_index.py', 'pdf_conversion.py']
 
 # Import Docling
 try:
-    from docling.document_converter import DocumentConverter, PdfFormatOption
-    from docling.datamodel.base_models import InputFormat
-    from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
-    from docling.datamodel.accelerator_options import AcceleratorOptions, AcceleratorDevice
-    import docling
+    from pdf_conversion import create_converter, convert_parallel, docling_version, pipeline_options_hash
+    from conversion_cache import DEFAULT_CACHE_DIR, cache_key, cache_path, load_conversion, save_conversion
 except ImportError as e:
     print(f"Error: Failed to import Docling: {e}")
     print("Install with: pip install docling>=2.54.0")
@@ -64,19 +74,28 @@ except ImportError as e:
 class LRMParser:
     """Enhanced parser for HDL Language Reference Manuals"""
 
-    def __init__(self, pdf_path: str, language: str, db_path: str):
+    def __init__(self, pdf_path: str, language: str, db_path: str, jobs: int = 1,
+                 cache_dir: Optional[str] = str(DEFAULT_CACHE_DIR), force: bool = False):
         self.pdf_path = Path(pdf_path)
         self.language = language.lower()
         self.db_path = Path(db_path)
+        self.jobs = max(1, jobs)
+        self.cache_dir = Path(cache_dir) if cache_dir else None  # None disables the conversion cache
+        self.force = force  # Parse even if the last parse of this language is up to date
         self.converter = None
+        self.num_threads = None
         self.db = None
+        self._pdf_hash = None
+        self._parse_signature = None
 
         # Statistics
         self.stats = {
             'sections': 0,
             'code_examples': 0,
             'tables': 0,
-            'page_accuracy': 0.0
+            'page_accuracy': 0.0,
+            'code_attribution': {},
+            'conversion_cache': 'disabled'
         }
 
         # Validate inputs
@@ -92,30 +111,18 @@ class LRMParser:
 
         # Detect CPU count for optimal threading
         cpu_count = os.cpu_count() or 4
-        num_threads = max(4, cpu_count - 2)
-
-        print(f"  Detected {cpu_count} CPU cores, using {num_threads} threads")
-
-        # Configure accelerator
-        accelerator_options = AcceleratorOptions(
-            num_threads=num_threads,
-            device=AcceleratorDevice.AUTO
-        )
-
-        # Configure PDF pipeline
-        pipeline_options = PdfPipelineOptions()
-        pipeline_options.accelerator_options = accelerator_options
-        pipeline_options.table_structure_options.mode = TableFormerMode.ACCURATE
-        pipeline_options.do_ocr = False
-
-        # Create converter
-        self.converter = DocumentConverter(
-            format_options={
-                InputFormat.PDF: PdfFormatOption(
-                    pipeline_options=pipeline_options
-                )
-            }
-        )
+
+        if self.jobs > 1:
+            # Each worker process builds its own converter; split the cores between them
+            self.num_threads = max(1, cpu_count // self.jobs)
+            print(f"  Detected {cpu_count} CPU cores, using {self.jobs} worker processes "
+                  f"with {self.num_threads} threads each")
+            return
+
+        self.num_threads = max(4, cpu_count - 2)
+        print(f"  Detected {cpu_count} CPU cores, using {self.num_threads} threads")
+
+        self.converter = create_converter(self.num_threads)
 
         print("✓ Converter ready")
 
@@ -127,8 +134,12 @@ class LRMParser:
         start_time = time.time()
 
         try:
-            result = self.converter.convert(str(self.pdf_path))
-            doc = result.document if hasattr(result, 'document') else result.legacy_document
+            if self.jobs > 1:
+                doc = convert_parallel(self.pdf_path, self.jobs, self.num_threads)
+                print(f"  Converted {len(doc.ranges)} page ranges in {self.jobs} processes")
+            else:
+                result = self.converter.convert(str(self.pdf_path))
+                doc = result.document if hasattr(result, 'document') else result.legacy_document
         except Exception as e:
             raise RuntimeError(f"Docling parsing failed: {e}")
 
@@ -137,6 +148,114 @@ class LRMParser:
 
         return doc, duration
 
+    @property
+    def pdf_hash(self) -> str:
+        """SHA256 of the PDF (computed once)"""
+        if self._pdf_hash is None:
+            self._pdf_hash = self._calculate_file_hash(self.pdf_path)
+        return self._pdf_hash
+
+    @property
+    def parse_signature(self) -> str:
+        """
+        SHA256 over everything besides the PDF that determines the parse result:
+        the parser's source code, the Docling version and the pipeline options.
+        """
+        if self._parse_signature is None:
+            code = hashlib.sha256()
+            for name in PARSER_SOURCES:
+                code.update((Path(__file__).parent / name).read_bytes())
+
+            signature = json.dumps({
+                'parser': code.hexdigest(),
+                'docling': docling_version(),
+                'pipeline': pipeline_options_hash()
+            }, sort_keys=True)
+            self._parse_signature = hashlib.sha256(signature.encode('utf-8')).hexdigest()
+        return self._parse_signature
+
+    def find_unchanged_parse(self) -> Optional[Dict]:
+        """
+        Last successful parse of this language, if it used the same PDF, parser
+        code and options and its sections are still in the database.
+
+        Returns:
+            The parse_metadata row as a dict, or None if a parse is needed
+        """
+        if not self.db_path.exists():
+            return None
+
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        try:
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(parse_metadata)")}
+            if 'parse_signature' not in columns:
+                return None  # Database predates parse signatures
+
+            last = conn.execute("""
+                SELECT * FROM parse_metadata WHERE language = ? ORDER BY id DESC LIMIT 1
+            """, (self.language,)).fetchone()
+            if last is None or last['pdf_hash'] != self.pdf_hash or last['parse_signature'] != self.parse_signature:
+                return None
+
+            # The content may have been removed or replaced since (e.g. by a parse of another PDF)
+            section_count = conn.execute(
+                "SELECT COUNT(*) FROM sections WHERE language = ?", (self.language,)
+            ).fetchone()[0]
+            if section_count != last['section_count']:
+                return None
+
+            return dict(last)
+        finally:
+            conn.close()
+
+    def _ensure_parse_signature_column(self, cursor: sqlite3.Cursor):
+        """Add parse_metadata.parse_signature to databases created before it existed"""
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(parse_metadata)")}
+        if 'parse_signature' not in columns:
+            cursor.execute("ALTER TABLE parse_metadata ADD COLUMN parse_signature TEXT")
+
+    def _conversion_cache_path(self) -> Optional[Path]:
+        """Cache file for this PDF under the installed Docling and pipeline options"""
+        if self.cache_dir is None:
+            return None
+        return cache_path(self.cache_dir, cache_key(self.pdf_hash, docling_version(), pipeline_options_hash()))
+
+    def load_cached_conversion(self):
+        """
+        Load this PDF's converted document from the conversion cache.
+
+        Returns:
+            Tuple of (document, load duration), or (None, 0.0) on a cache miss
+        """
+        path = self._conversion_cache_path()
+        if path is None:
+            return None, 0.0
+
+        start_time = time.time()
+        doc = load_conversion(path)
+        if doc is None:
+            self.stats['conversion_cache'] = 'miss'
+            return None, 0.0
+
+        duration = time.time() - start_time
+        self.stats['conversion_cache'] = 'hit'
+        print(f"\n✓ Loaded cached conversion of {self.pdf_path.name} in {duration:.1f}s")
+        print(f"  {path}")
+        return doc, duration
+
+    def save_cached_conversion(self, doc):
+        """Store a converted document in the conversion cache (failures only warn)"""
+        path = self._conversion_cache_path()
+        if path is None:
+            return
+
+        try:
+            size = save_conversion(path, doc)
+            print(f"✓ Cached conversion ({size / 1024 / 1024:.1f} MB): {path}")
+        except Exception as e:
+            print(f"  Warning: could not cache conversion: {e}")
+
     def extract_sections(self, doc) -> List[Dict]:
         """Extract sections using native Docling API with accurate pages"""
         print("\nExtracting sections using native Docling API...")
@@ -186,7 +305,8 @@ class LRMParser:
                     'page_start': page,
                     'page_end': page,
                     'depth': depth,
-                    'content': []
+                    'content': [],
+                    'heading_ref': id(item)  # Lets extract_code_examples() follow the same walk
                 }
             elif current_section:
                 # Add content to current section
@@ -268,19 +388,124 @@ class LRMParser:
         
         return sections
 
-    def extract_code_examples(self, doc, sections: List[Dict]) -> Dict[str, List[Dict]]:
-        """Extract code examples (enhanced detection coming in Phase 5)"""
+    def extract_code_examples(self, doc, sections: List[Dict],
+                              page_index: Optional[PageIntervalIndex] = None) -> Dict[str, List[Dict]]:
+        """
+        Extract code examples in one pass over Docling's text items.
+
+        A code item belongs to the section whose heading it follows in reading
+        order (the walk extract_sections() makes), and its page comes from its
+        provenance. Documents without code items fall back to scanning the
+        markdown export for fenced blocks.
+
+        Args:
+            doc: Docling document
+            sections: Output of extract_sections()
+            page_index: Page lookup over the sections (built here if not given)
+        """
         print("\nExtracting code examples...")
+        start_time = time.time()
+
+        page_index = page_index or PageIntervalIndex(sections)
+        texts = getattr(doc, 'texts', None)
+        result = self._extract_code_from_items(texts, sections, page_index) if isinstance(texts, list) else None
+        if result is None:
+            result = self._extract_code_from_markdown(doc, sections, page_index)
+        code_by_section, attribution = result
+
+        self.stats['code_attribution'] = attribution
+        total_code = sum(len(codes) for codes in code_by_section.values())
+        print(f"✓ Found {total_code} code examples in {time.time() - start_time:.2f}s "
+              f"(by heading: {attribution['heading']}, by page: {attribution['page']}, "
+              f"last section: {attribution['last_section']})")
+        return code_by_section
+
+    def _extract_code_from_items(self, texts: List, sections: List[Dict],
+                                 page_index: PageIntervalIndex) -> Optional[Tuple[Dict, Dict]]:
+        """
+        Attribute Docling code items to sections by walking the text items once.
 
+        line_start is the code's line within its section's content (content
+        items are joined with blank lines, see extract_sections()).
+
+        Returns:
+            Tuple of (code by section number, attribution counts), or None if
+            the document has no code items
+        """
+        heading_sections = {s['heading_ref']: s['section_number'] for s in sections if s.get('heading_ref')}
         code_by_section = {}
+        attribution = {'heading': 0, 'page': 0, 'last_section': 0}
+        found_code = False
+
+        current_section = None  # Section number of the heading in force
+        line = 0  # Line within the current section's content
+
+        for item in texts:
+            if is_heading(item):
+                current_section = heading_sections.get(id(item))
+                line = 0
+                continue
+
+            text = get_item_text(item)
+            if not text.strip():
+                continue
+
+            if is_code_item(item):
+                found_code = True
+                code = text.strip()
+
+                if len(code) >= 10:
+                    section_num = current_section
+                    how = 'heading'
+                    if section_num is None:
+                        section_num, how = self._section_for_page(page_index, get_page_number(item) or 1)
+
+                    if section_num:
+                        attribution[how] += 1
+                        code_by_section.setdefault(section_num, []).append({
+                            'code': code,
+                            'description': get_code_language(item),
+                            'line_start': line
+                        })
+
+            line += text.count('\n') + 2
+
+        return (code_by_section, attribution) if found_code else None
+
+    def _extract_code_from_markdown(self, doc, sections: List[Dict],
+                                    page_index: PageIntervalIndex) -> Tuple[Dict, Dict]:
+        """
+        Fallback: attribute fenced code blocks in the markdown export.
+
+        Offsets become line numbers through a precomputed line-start index
+        (bisect), and each block goes to the closest numbered heading before
+        it; blocks before any known heading are placed by estimated page.
+
+        Returns:
+            Tuple of (code by section number, attribution counts)
+        """
+        code_by_section = {}
+        attribution = {'heading': 0, 'page': 0, 'last_section': 0}
 
         try:
             markdown = doc.export_to_markdown()
         except Exception as e:
             print(f"  Warning: Could not export markdown: {e}")
-            return code_by_section
+            return code_by_section, attribution
+
+        # Line i starts at line_starts[i]
+        line_starts = [0] + [match.end() for match in re.finditer('\n', markdown)]
+
+        # Numbered headings that became sections, in line order
+        known_sections = {section['section_number'] for section in sections}
+        heading_pattern = re.compile(r'^#{1,6}\s+(\d+(?:\.\d+)*)\s+', re.MULTILINE)
+        heading_lines = []
+        heading_numbers = []
+        for match in heading_pattern.finditer(markdown):
+            if match.group(1) in known_sections:
+                heading_lines.append(bisect.bisect_right(line_starts, match.start()) - 1)
+                heading_numbers.append(match.group(1))
 
-        # Find code blocks in markdown
         code_block_pattern = re.compile(r'```(\w+)?\n(.*?)```', re.DOTALL)
 
         for match in code_block_pattern.finditer(markdown):
@@ -289,40 +514,43 @@ class LRMParser:
             if len(code) < 10:
                 continue
 
-            # Map to section by position
-            pos = match.start()
-            line_num = markdown[:pos].count('\n')
-            
-            # Find closest section (now with accurate pages!)
-            section_num = None
-            estimated_page = max(1, line_num // 50)
-            
-            for section in sections:
-                if section['page_start'] <= estimated_page <= section['page_end']:
-                    section_num = section['section_number']
-                    break
+            line_num = bisect.bisect_right(line_starts, match.start()) - 1
 
-            if not section_num and sections:
-                section_num = sections[-1]['section_number']
+            heading = bisect.bisect_right(heading_lines, line_num) - 1
+            if heading >= 0:
+                section_num, how = heading_numbers[heading], 'heading'
+            else:
+                section_num, how = self._section_for_page(page_index, max(1, line_num // 50))
 
             if section_num:
-                if section_num not in code_by_section:
-                    code_by_section[section_num] = []
-
-                code_by_section[section_num].append({
+                attribution[how] += 1
+                code_by_section.setdefault(section_num, []).append({
                     'code': code,
                     'description': match.group(1),
                     'line_start': line_num
                 })
 
-        total_code = sum(len(codes) for codes in code_by_section.values())
-        print(f"✓ Found {total_code} code examples")
-        return code_by_section
+        return code_by_section, attribution
+
+    def _section_for_page(self, page_index: PageIntervalIndex, page: int) -> Tuple[Optional[str], str]:
+        """
+        Section whose page range contains a page (else the last section).
 
-    def extract_tables(self, doc, sections: List[Dict]) -> Dict[str, List[Dict]]:
-        """Extract tables using Docling's native table objects"""
+        Returns:
+            Tuple of (section number or None, 'page' or 'last_section')
+        """
+        section_num = page_index.lookup(page)
+        if section_num:
+            return section_num, 'page'
+        return page_index.last, 'last_section'
+
+    def extract_tables(self, doc, sections: List[Dict],
+                       page_index: Optional[PageIntervalIndex] = None) -> Dict[str, List[Dict]]:
+        """Extract tables using Docling's native table objects (page_index as in extract_code_examples)"""
         print("\nExtracting tables...")
 
+        page_index = page_index or PageIntervalIndex(sections)
+
         tables_by_section = {}
         seen_table_hashes = set()
         duplicates_skipped = 0
@@ -340,14 +568,7 @@ class LRMParser:
                             page = 1
 
                         # Find corresponding section by page
-                        section_num = None
-                        for section in sections:
-                            if section['page_start'] <= page <= section['page_end']:
-                                section_num = section['section_number']
-                                break
-
-                        if not section_num and sections:
-                            section_num = sections[-1]['section_number']
+                        section_num, _ = self._section_for_page(page_index, page)
 
                         if section_num:
                             # Convert table to markdown
@@ -473,27 +694,33 @@ class LRMParser:
                     self.stats['tables'] += 1
 
             # Store parse metadata
-            pdf_hash = self._calculate_file_hash(self.pdf_path)
-            docling_version = getattr(docling, '__version__', 'unknown')
-
+            self._ensure_parse_signature_column(cursor)
             cursor.execute("""
                 INSERT INTO parse_metadata (language, pdf_path, pdf_hash, parse_date, docling_version,
-                                           section_count, code_count, table_count, parse_duration_sec)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                           section_count, code_count, table_count, parse_duration_sec,
+                                           parse_signature)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 self.language,
                 str(self.pdf_path),
-                pdf_hash,
+                self.pdf_hash,
                 int(datetime.now().timestamp()),
-                f"{docling_version} (v2-native-api)",
+                f"{docling_version()} (v2-native-api)",
                 self.stats['sections'],
                 self.stats['code_examples'],
                 self.stats['tables'],
-                parse_duration
+                parse_duration,
+                self.parse_signature
             ))
 
+            # Tell running servers (vector store, result cache) the content changed
+            generation = bump_generation(self.db)
+
             self.db.commit()
-            print("✓ Data stored successfully")
+            print(f"✓ Data stored successfully (index generation {generation})")
+
+            # Running embedding servers reload when the manifest changes
+            write_index_manifest(self.db, self.db_path, 'parse_lrm.py')
 
         except Exception as e:
             self.db.rollback()
@@ -518,20 +745,38 @@ class LRMParser:
         start_time = datetime.now()
 
         try:
-            # Step 1: Setup
-            self.setup_converter()
-
-            # Step 2: Parse PDF
-            doc, parse_duration = self.parse_pdf()
+            # Nothing to do if this PDF was already parsed by the same code and options
+            if not self.force:
+                previous = self.find_unchanged_parse()
+                if previous is not None:
+                    parsed_at = datetime.fromtimestamp(previous['parse_date'])
+                    print(f"\n✓ {self.language} is up to date: {self.pdf_path.name} was parsed with the same "
+                          f"parser and options on {parsed_at:%Y-%m-%d %H:%M}")
+                    print(f"  {previous['section_count']} sections, {previous['code_count']} code examples, "
+                          f"{previous['table_count']} tables in {self.db_path}")
+                    print("  Skipping (use --force to parse again)")
+                    return
+
+            # Step 1: Reuse an earlier conversion of this PDF if there is one
+            doc, parse_duration = self.load_cached_conversion()
+
+            if doc is None:
+                # Step 2: Setup and parse PDF
+                self.setup_converter()
+                doc, parse_duration = self.parse_pdf()
+                self.save_cached_conversion(doc)
 
             # Step 3: Extract sections with accurate pages
             sections = self.extract_sections(doc)
 
+            # Page lookup shared by code and table attribution
+            page_index = PageIntervalIndex(sections)
+
             # Step 4: Extract code
-            code_by_section = self.extract_code_examples(doc, sections)
+            code_by_section = self.extract_code_examples(doc, sections, page_index)
 
             # Step 5: Extract tables
-            tables_by_section = self.extract_tables(doc, sections)
+            tables_by_section = self.extract_tables(doc, sections, page_index)
 
             # Step 6: Store in database
             self.store_in_database(sections, code_by_section, tables_by_section, parse_duration)
@@ -546,6 +791,7 @@ class LRMParser:
             print(f"  Code Examples:  {self.stats['code_examples']}")
             print(f"  Tables:         {self.stats['tables']}")
             print(f"  Page Accuracy:  {self.stats['page_accuracy']:.1f}%")
+            print(f"  Conversion:     {self.stats['conversion_cache']} (cache)")
             print(f"  Total Time:     {total_time:.1f}s")
             print(f"  Database:       {self.db_path}")
             print("=" * 70)
@@ -565,11 +811,37 @@ def main():
     parser.add_argument('--language', required=True, choices=['verilog', 'systemverilog', 'vhdl'],
                         help='HDL language')
     parser.add_argument('--output', required=True, help='Output SQLite database path')
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Convert page ranges in N worker processes (default: 1, one converter for the whole PDF)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=str(DEFAULT_CACHE_DIR),
+        help=f'Directory of cached Docling conversions (default: {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always convert the PDF and do not write the conversion cache'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Parse even if this PDF was already parsed with the same parser code and options'
+    )
 
     args = parser.parse_args()
 
     # Run parser
-    lrm_parser = LRMParser(args.pdf, args.language, args.output)
+    lrm_parser = LRMParser(
+        args.pdf, args.language, args.output,
+        jobs=args.jobs,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        force=args.force
+    )
     lrm_parser.run()
 
 
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Docling PDF conversion, serial or split into page ranges across processes.
+
+Converting a 1,300-page LRM in one DocumentConverter.convert call keeps one
+process busy for many minutes. convert_parallel() splits the PDF into page
+ranges, converts them in a process pool (each worker builds its own
+converter once and reuses it for every range it gets), and joins the partial
+documents in page order into a MergedDocument.
+
+Extraction walks the merged items in the same order as a serial parse, so
+a section that starts in one range and continues into the next is still one
+section. Each item keeps its page number in the original PDF.
+"""
+
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Tuple
+
+from docling.document_converter import DocumentConverter, PdfFormatOption
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
+from docling.datamodel.accelerator_options import AcceleratorOptions, AcceleratorDevice
+
+
+# Page ranges per worker: smaller ranges balance uneven pages across the pool
+RANGES_PER_JOB = 2
+
+_worker_converter = None  # Converter of a pool worker process, created on its first range
+
+
+def create_pipeline_options(num_threads: int) -> PdfPipelineOptions:
+    """The parser's PDF pipeline settings"""
+    accelerator_options = AcceleratorOptions(
+        num_threads=num_threads,
+        device=AcceleratorDevice.AUTO
+    )
+
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.accelerator_options = accelerator_options
+    pipeline_options.table_structure_options.mode = TableFormerMode.ACCURATE
+    pipeline_options.do_ocr = False
+    return pipeline_options
+
+
+def create_converter(num_threads: int) -> DocumentConverter:
+    """Docling converter with the parser's pipeline settings"""
+    return DocumentConverter(
+        format_options={
+            InputFormat.PDF: PdfFormatOption(
+                pipeline_options=create_pipeline_options(num_threads)
+            )
+        }
+    )
+
+
+def pipeline_options_hash() -> str:
+    """
+    SHA-256 of the pipeline settings that shape the converted document.
+
+    Accelerator settings (threads, device) only change how fast a conversion
+    runs, so they are left out.
+    """
+    options = create_pipeline_options(1).model_dump(mode='json', exclude={'accelerator_options'})
+    canonical = json.dumps(options, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def docling_version() -> str:
+    """Installed Docling version"""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version('docling')
+    except PackageNotFoundError:
+        import docling
+        return getattr(docling, '__version__', 'unknown')
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    """Number of pages in a PDF"""
+    import pypdfium2  # Installed with Docling
+
+    pdf = pypdfium2.PdfDocument(str(pdf_path))
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def page_ranges(page_count: int, chunks: int) -> List[Tuple[int, int]]:
+    """Split pages 1..page_count into at most `chunks` contiguous, inclusive ranges"""
+    size = max(1, math.ceil(page_count / max(1, chunks)))
+    return [(start, min(start + size - 1, page_count)) for start in range(1, page_count + 1, size)]
+
+
+def shift_pages(doc, first_page: int):
+    """
+    Make page numbers refer to the original PDF.
+
+    Docling numbers pages of a page-range conversion by their position in the
+    source file; should a version number them from 1 instead, every
+    provenance and page entry is shifted to the range's first page.
+    """
+    pages = getattr(doc, 'pages', None) or {}
+    if not pages or min(pages) >= first_page:
+        return
+
+    offset = first_page - min(pages)
+    for item in list(doc.texts) + list(doc.tables) + list(getattr(doc, 'pictures', [])):
+        for prov in getattr(item, 'prov', None) or []:
+            prov.page_no += offset
+
+    shifted = {}
+    for page_no, page in pages.items():
+        page.page_no = page_no + offset
+        shifted[page_no + offset] = page
+    doc.pages = shifted
+
+
+def convert_page_range(pdf_path: str, page_range: Tuple[int, int], num_threads: int):
+    """Convert one page range in a pool worker (top-level so it pickles)"""
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = create_converter(num_threads)
+
+    result = _worker_converter.convert(str(pdf_path), page_range=page_range)
+    doc = result.document
+    shift_pages(doc, page_range[0])
+    return doc
+
+
+class MergedDocument:
+    """
+    Page-range documents joined in page order.
+
+    Exposes what extraction uses from a DoclingDocument: texts and tables in
+    reading order, and the markdown export.
+    """
+
+    def __init__(self, parts: List, ranges: List[Tuple[int, int]]):
+        """
+        Args:
+            parts: Converted documents, one per page range
+            ranges: Their (first, last) pages, ascending
+        """
+        self.parts = parts
+        self.ranges = ranges
+        self.texts = [item for doc in parts for item in doc.texts]
+        self.tables = [table for doc in parts for table in doc.tables]
+
+    def export_to_markdown(self) -> str:
+        return '\n\n'.join(doc.export_to_markdown() for doc in self.parts)
+
+
+def convert_parallel(pdf_path: str, jobs: int, num_threads: int = None) -> MergedDocument:
+    """
+    Convert a PDF as page ranges in `jobs` worker processes.
+
+    Args:
+        pdf_path: PDF to convert
+        jobs: Worker processes
+        num_threads: Docling threads per worker (default: CPU cores / jobs)
+
+    Returns:
+        The merged document
+    """
+    num_threads = num_threads or max(1, (os.cpu_count() or 4) // jobs)
+    ranges = page_ranges(pdf_page_count(pdf_path), jobs * RANGES_PER_JOB)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        parts = list(pool.map(convert_page_range, repeat(str(pdf_path)), ranges, repeat(num_threads)))
+
+    return MergedDocument(parts, ranges)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Compare code example extraction before and after the single-pass rewrite.
+
+Runs the original markdown-based extraction (a newline count over the prefix
+for every match, a page guessed as line // 50 and a linear section scan) and
+LRMParser.extract_code_examples() on the same document, and reports the stage
+time and attribution accuracy of each:
+
+- page-consistent: the snippet's provenance page lies within the page range
+  of the section it was attached to
+- exact (synthetic documents only): the snippet was attached to the section
+  it was generated under
+
+Usage:
+    python benchmark_code_extraction.py --synthetic 1300
+    python benchmark_code_extraction.py --pdf data/test_snippets/verilog_snippet_5p.pdf --language verilog
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+# Add parser directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from parse_lrm import LRMParser
+
+
+class SyntheticItem:
+    """Stand-in for a Docling text item (label, text, provenance, self_ref)"""
+
+    def __init__(self, label: str, text: str, page: int, ref: str):
+        self.label = label
+        self.text = text
+        self.prov = [SimpleNamespace(page_no=page)]
+        self.self_ref = ref
+
+
+class SyntheticDocument:
+    """Stand-in for a DoclingDocument with headings, paragraphs and code items"""
+
+    def __init__(self, texts: List[SyntheticItem], truth: Dict[str, str]):
+        self.texts = texts
+        self.tables = []
+        self.truth = truth  # Code text -> section number it was generated under
+
+    def export_to_markdown(self) -> str:
+        blocks = []
+        for item in self.texts:
+            if item.label == 'section_header':
+                depth = item.text.split()[0].count('.')
+                blocks.append('#' * (depth + 1) + ' ' + item.text)
+            elif item.label == 'code':
+                blocks.append('```\n' + item.text + '\n```')
+            else:
+                blocks.append(item.text)
+        return '\n\n'.join(blocks)
+
+
+def synthetic_document(pages: int, items_per_page: int = 24, seed: int = 0) -> SyntheticDocument:
+    """An LRM-shaped document: numbered headings, multi-line paragraphs and code on every page"""
+    rng = random.Random(seed)
+    texts = []
+    truth = {}
+    numbers = [0]
+    current = None
+
+    for page in range(1, pages + 1):
+        for _ in range(items_per_page):
+            roll = rng.random()
+            ref = f"#/texts/{len(texts)}"
+
+            if roll < 0.08 or current is None:
+                # Next heading: a sibling, a child or back up a level
+                if len(numbers) < 3 and rng.random() < 0.5:
+                    numbers.append(1)
+                elif len(numbers) > 1 and rng.random() < 0.3:
+                    numbers.pop()
+                    numbers[-1] += 1
+                else:
+                    numbers[-1] += 1
+                current = '.'.join(map(str, numbers))
+                texts.append(SyntheticItem('section_header', f"{current} Heading {len(texts)}", page, ref))
+            elif roll < 0.14:
+                code = '\n'.join(f"assign w{len(texts)}_{i} = a & b;" for i in range(rng.randint(2, 12)))
+                truth[code] = current
+                texts.append(SyntheticItem('code', code, page, ref))
+            else:
+                lines = ' '.join(['word'] * rng.randint(10, 60))
+                texts.append(SyntheticItem('text', '\n'.join([lines] * rng.randint(1, 4)), page, ref))
+
+    return SyntheticDocument(texts, truth)
+
+
+def legacy_extract_code_examples(markdown: str, sections: List[Dict]) -> Dict[str, List[Dict]]:
+    """The extraction this benchmark replaced (kept verbatim apart from prints)"""
+    code_by_section = {}
+    code_block_pattern = re.compile(r'```(\w+)?\n(.*?)```', re.DOTALL)
+
+    for match in code_block_pattern.finditer(markdown):
+        code = match.group(2).strip()
+
+        if len(code) < 10:
+            continue
+
+        pos = match.start()
+        line_num = markdown[:pos].count('\n')
+
+        section_num = None
+        estimated_page = max(1, line_num // 50)
+
+        for section in sections:
+            if section['page_start'] <= estimated_page <= section['page_end']:
+                section_num = section['section_number']
+                break
+
+        if not section_num and sections:
+            section_num = sections[-1]['section_number']
+
+        if section_num:
+            code_by_section.setdefault(section_num, []).append({
+                'code': code,
+                'description': match.group(1),
+                'line_start': line_num
+            })
+
+    return code_by_section
+
+
+def accuracy(code_by_section: Dict[str, List[Dict]], sections: List[Dict], pages: Dict[str, int],
+             truth: Dict[str, str]) -> Tuple[int, float, float]:
+    """Snippet count, page-consistent fraction and exact fraction (NaN without ground truth)"""
+    ranges = {section['section_number']: (section['page_start'], section['page_end']) for section in sections}
+    total = consistent = exact = 0
+
+    for section_num, codes in code_by_section.items():
+        start, end = ranges[section_num]
+        for code in codes:
+            total += 1
+            page = pages.get(code['code'])
+            consistent += page is not None and start <= page <= end
+            exact += truth.get(code['code']) == section_num
+
+    if not total:
+        return 0, float('nan'), float('nan')
+    return total, consistent / total, exact / total if truth else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare legacy and single-pass code example extraction'
+    )
+    parser.add_argument(
+        '--pdf',
+        default=None,
+        help='PDF to convert with Docling and extract from'
+    )
+    parser.add_argument(
+        '--language',
+        default='verilog',
+        choices=['verilog', 'systemverilog', 'vhdl'],
+        help='HDL language of the PDF (default: verilog)'
+    )
+    parser.add_argument(
+        '--synthetic',
+        type=int,
+        default=None,
+        help='Use a synthetic document with this many pages instead of a PDF'
+    )
+
+    args = parser.parse_args()
+
+    if not args.pdf and not args.synthetic:
+        parser.error('Give --pdf or --synthetic')
+
+    fd, placeholder = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+    try:
+        lrm_parser = LRMParser(args.pdf or placeholder, args.language, os.devnull)
+        if args.pdf:
+            lrm_parser.setup_converter()
+            doc, _ = lrm_parser.parse_pdf()
+            truth = {}
+        else:
+            doc = synthetic_document(args.synthetic)
+            truth = doc.truth
+            print(f"Synthetic document: {args.synthetic} pages, {len(doc.texts)} items, {len(truth)} code items")
+
+        sections = lrm_parser.extract_sections(doc)
+        pages = {item.text.strip(): item.prov[0].page_no for item in doc.texts
+                 if getattr(item, 'prov', None) and str(getattr(item, 'label', '')) == 'code'}
+
+        start = time.perf_counter()
+        markdown = doc.export_to_markdown()
+        legacy = legacy_extract_code_examples(markdown, sections)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        current = lrm_parser.extract_code_examples(doc, sections)
+        current_time = time.perf_counter() - start
+    finally:
+        os.unlink(placeholder)
+
+    print(f"\n{'Method':<14} {'Time (s)':>10} {'Snippets':>9} {'Page-consistent':>16} {'Exact':>8}")
+    print("-" * 61)
+    for name, elapsed, result in (('legacy', legacy_time, legacy), ('single-pass', current_time, current)):
+        total, consistent, exact = accuracy(result, sections, pages, truth)
+        print(f"{name:<14} {elapsed:>10.3f} {total:>9} {consistent:>15.1%} {exact:>8.1%}")
+    print(f"\nSpeedup: {legacy_time / current_time:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of page-to-section lookup: linear scan vs PageIntervalIndex.
+
+Builds an LRM-shaped section list (document order, overlapping parent and
+boundary ranges) and times attributing a batch of item pages with the old
+per-item linear scan and with the interval index, checking both agree.
+
+Usage:
+    python benchmark_page_index.py
+    python benchmark_page_index.py --sections 3000 --items 5000 --pages 1300
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add parser directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from page_index import PageIntervalIndex
+
+
+def synthetic_sections(count: int, pages: int, seed: int = 0) -> List[Dict]:
+    """Sections in document order spread over the pages, some spanning several pages"""
+    rng = random.Random(seed)
+    starts = sorted(rng.randint(1, pages) for _ in range(count))
+    return [{
+        'section_number': str(i),
+        'page_start': start,
+        'page_end': min(pages, start + rng.choice([0, 0, 1, 2, 5, 20]))
+    } for i, start in enumerate(starts)]
+
+
+def linear_lookup(sections: List[Dict], page: int) -> Optional[str]:
+    """Per-item scan used before PageIntervalIndex"""
+    for section in sections:
+        if section['page_start'] <= page <= section['page_end']:
+            return section['section_number']
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark page-to-section lookup'
+    )
+    parser.add_argument(
+        '--sections',
+        type=int,
+        default=3000,
+        help='Number of sections (default: 3000)'
+    )
+    parser.add_argument(
+        '--items',
+        type=int,
+        default=5000,
+        help='Number of tables/code examples to attribute (default: 5000)'
+    )
+    parser.add_argument(
+        '--pages',
+        type=int,
+        default=1300,
+        help='Pages in the document (default: 1300)'
+    )
+
+    args = parser.parse_args()
+
+    sections = synthetic_sections(args.sections, args.pages)
+    rng = random.Random(1)
+    item_pages = [rng.randint(1, args.pages) for _ in range(args.items)]
+
+    start = time.perf_counter()
+    expected = [linear_lookup(sections, page) for page in item_pages]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = PageIntervalIndex(sections)
+    built = time.perf_counter()
+    found = [index.lookup(page) for page in item_pages]
+    lookup_time = time.perf_counter() - built
+
+    print(f"{args.sections} sections, {args.items} items, {args.pages} pages")
+    print(f"  Linear scan:     {linear_time * 1000:9.2f} ms")
+    print(f"  Interval index:  {(built - start + lookup_time) * 1000:9.2f} ms "
+          f"(build {(built - start) * 1000:.2f} ms, lookups {lookup_time * 1000:.2f} ms)")
+    print(f"  Speedup:         {linear_time / (built - start + lookup_time):9.1f}x")
+
+    if found != expected:
+        mismatches = sum(a != b for a, b in zip(found, expected))
+        print(f"✗ {mismatches} lookups differ from the linear scan")
+        return 1
+
+    print("✓ Identical attribution")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,68 @@
+"""
+Unit tests for the Docling conversion cache
+"""
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from docling_core.types.doc import DocItemLabel, DoclingDocument
+from conversion_cache import CACHE_FORMAT, cache_key, cache_path, load_conversion, save_conversion
+from pdf_conversion import MergedDocument
+
+
+def document(*texts):
+    doc = DoclingDocument(name='lrm')
+    for text in texts:
+        doc.add_text(label=DocItemLabel.TEXT, text=text)
+    return doc
+
+
+class TestConversionCache:
+    """Test suite for the conversion cache"""
+
+    def test_key_changes_with_each_input(self):
+        """PDF hash, Docling version and pipeline options each select a different file"""
+        key = cache_key('a' * 64, '2.54.0', 'f' * 64)
+        assert key != cache_key('b' * 64, '2.54.0', 'f' * 64)
+        assert key != cache_key('a' * 64, '2.55.0', 'f' * 64)
+        assert key != cache_key('a' * 64, '2.54.0', 'e' * 64)
+
+    def test_miss(self, tmp_path):
+        assert load_conversion(cache_path(tmp_path, 'missing')) is None
+
+    def test_document_round_trip(self, tmp_path):
+        """A serial conversion comes back as a DoclingDocument with the same texts"""
+        path = cache_path(tmp_path / 'cache', 'key')
+        save_conversion(path, document('1 Overview', 'Intro'))
+
+        loaded = load_conversion(path)
+        assert isinstance(loaded, DoclingDocument)
+        assert [item.text for item in loaded.texts] == ['1 Overview', 'Intro']
+
+    def test_merged_round_trip(self, tmp_path):
+        """A parallel conversion comes back as its page-range parts"""
+        path = cache_path(tmp_path, 'key')
+        save_conversion(path, MergedDocument([document('a'), document('b', 'c')], [(1, 10), (11, 20)]))
+
+        loaded = load_conversion(path)
+        assert isinstance(loaded, MergedDocument)
+        assert loaded.ranges == [(1, 10), (11, 20)]
+        assert [item.text for item in loaded.texts] == ['a', 'b', 'c']
+
+    @pytest.mark.parametrize('content', [b'not gzip', gzip.compress(b'{"format": 0}')])
+    def test_unusable_file_is_a_miss(self, tmp_path, content):
+        """Corrupt files and files from another cache format are ignored"""
+        path = cache_path(tmp_path, 'key')
+        path.write_bytes(content)
+        assert load_conversion(path) is None
+
+    def test_format_recorded(self, tmp_path):
+        path = cache_path(tmp_path, 'key')
+        save_conversion(path, document('a'))
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            assert json.load(f)['format'] == CACHE_FORMAT
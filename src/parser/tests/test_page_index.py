@@ -0,0 +1,90 @@
+"""
+Unit tests for the page-to-section interval index
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from page_index import PageIntervalIndex
+
+
+def linear_lookup(sections, page):
+    """The scan PageIntervalIndex replaces: first section whose range contains the page"""
+    for section in sections:
+        if section['page_start'] <= page <= section['page_end']:
+            return section['section_number']
+    return None
+
+
+def section(number, start, end):
+    return {'section_number': number, 'page_start': start, 'page_end': end}
+
+
+class TestPageIntervalIndex:
+    """Test suite for PageIntervalIndex"""
+
+    def test_empty(self):
+        """No sections: nothing contains any page"""
+        index = PageIntervalIndex([])
+        assert len(index) == 0
+        assert index.lookup(1) is None
+        assert index.last is None
+
+    def test_disjoint_ranges(self):
+        """Each page maps to the one section containing it"""
+        sections = [section('1', 1, 3), section('2', 4, 6), section('3', 7, 9)]
+        index = PageIntervalIndex(sections)
+
+        assert [index.lookup(page) for page in range(1, 10)] == ['1'] * 3 + ['2'] * 3 + ['3'] * 3
+        assert index.last == '3'
+
+    def test_shared_boundary_page(self):
+        """A page shared by two sections goes to the earlier one"""
+        index = PageIntervalIndex([section('1', 1, 5), section('1.1', 5, 8)])
+        assert index.lookup(5) == '1'
+        assert index.lookup(6) == '1.1'
+
+    def test_parent_spans_children(self):
+        """A long parent range wins over children starting later"""
+        sections = [section('9', 10, 40), section('9.1', 12, 20), section('9.2', 21, 40)]
+        index = PageIntervalIndex(sections)
+        assert index.lookup(15) == '9'
+        assert index.lookup(30) == '9'
+
+    def test_gaps_and_out_of_range(self):
+        """Pages before, between and after all ranges are not contained"""
+        index = PageIntervalIndex([section('1', 5, 6), section('2', 10, 12)])
+        assert index.lookup(1) is None
+        assert index.lookup(8) is None
+        assert index.lookup(13) is None
+
+    def test_long_early_section_reaches_past_later_ones(self):
+        """A section covering later pages is found even after shorter sections end"""
+        sections = [section('1', 1, 100), section('2', 2, 3), section('3', 4, 5)]
+        index = PageIntervalIndex(sections)
+        assert index.lookup(50) == '1'
+        assert index.lookup(4) == '1'
+
+    def test_equal_starts_keep_extraction_order(self):
+        """Sections starting on the same page are tried in extraction order"""
+        index = PageIntervalIndex([section('a', 3, 3), section('b', 3, 9)])
+        assert index.lookup(3) == 'a'
+        assert index.lookup(4) == 'b'
+
+    @pytest.mark.parametrize('seed', range(20))
+    def test_matches_linear_scan(self, seed):
+        """Random document-ordered sections with overlaps give the linear scan's answers"""
+        rng = random.Random(seed)
+        sections = []
+        start = 1
+        for i in range(rng.randint(1, 200)):
+            start += rng.choice([0, 0, 1, 2])
+            sections.append(section(str(i), start, start + rng.choice([0, 0, 1, 3, 15])))
+
+        index = PageIntervalIndex(sections)
+        for page in range(0, start + 20):
+            assert index.lookup(page) == linear_lookup(sections, page)
@@ -9,6 +9,7 @@ import os
 from pathlib import Path
 from unittest.mock import Mock, MagicMock, patch
 from collections import Counter
+from types import SimpleNamespace
 
 # Import the parser module
 import sys
@@ -211,6 +212,37 @@ endmodule
             except:
                 pass
 
+    def test_extract_code_examples_from_items(self):
+        """Test single-pass code attribution from Docling items"""
+        def item(label, text, page, ref):
+            return SimpleNamespace(label=label, text=text, prov=[SimpleNamespace(page_no=page)], self_ref=ref)
+
+        mock_doc = SimpleNamespace(texts=[
+            item('section_header', '1 Examples', 1, '#/texts/0'),
+            item('text', 'Intro line one\nline two', 1, '#/texts/1'),
+            item('code', 'always @(posedge clk) q <= d;', 3, '#/texts/2'),
+            item('section_header', '1.1 More', 3, '#/texts/3'),
+            item('code', 'module test;\nendmodule', 3, '#/texts/4'),
+        ])
+
+        pdf_fd, pdf_path = tempfile.mkstemp(suffix='.pdf')
+        os.close(pdf_fd)
+
+        try:
+            parser = LRMParser(pdf_path, 'verilog', os.devnull)
+            sections = parser.extract_sections(mock_doc)
+            code_by_section = parser.extract_code_examples(mock_doc, sections)
+
+            # Section follows reading order, not the (overlapping) page ranges
+            assert [c['code'] for c in code_by_section['1']] == ['always @(posedge clk) q <= d;']
+            assert [c['code'] for c in code_by_section['1.1']] == ['module test;\nendmodule']
+            # Line within the section content (items joined by blank lines)
+            assert code_by_section['1'][0]['line_start'] == 3
+            assert parser.stats['code_attribution']['heading'] == 2
+
+        finally:
+            os.unlink(pdf_path)
+
     def test_duplicate_section_handling(self, temp_db):
         """Test that duplicate sections are handled correctly"""
         # Create sections with duplicates
@@ -302,6 +334,49 @@ endmodule
 
         conn.close()
 
+    def test_skip_unchanged_parse(self, temp_db):
+        """A stored parse is reused only for the same PDF, signature and content"""
+        pdf_fd, pdf_path = tempfile.mkstemp(suffix='.pdf')
+        os.write(pdf_fd, b'%PDF-1.4 test')
+        os.close(pdf_fd)
+
+        sections = [{
+            'section_number': '1',
+            'parent_section': None,
+            'title': 'Overview',
+            'content': 'Content',
+            'page_start': 1,
+            'page_end': 1,
+            'depth': 0
+        }]
+
+        try:
+            parser = LRMParser(pdf_path, 'verilog', temp_db, cache_dir=None)
+            assert parser.find_unchanged_parse() is None  # parse_metadata has no signature column yet
+
+            with patch('parse_lrm.write_index_manifest'):
+                parser.store_in_database(sections, {}, {}, 1.0)
+
+            previous = LRMParser(pdf_path, 'verilog', temp_db).find_unchanged_parse()
+            assert previous is not None
+            assert previous['section_count'] == 1
+
+            # Parser code, Docling or pipeline options changed
+            changed = LRMParser(pdf_path, 'verilog', temp_db)
+            changed._parse_signature = 'different'
+            assert changed.find_unchanged_parse() is None
+
+            # Other languages are parsed independently
+            assert LRMParser(pdf_path, 'vhdl', temp_db).find_unchanged_parse() is None
+
+            # PDF changed
+            with open(pdf_path, 'ab') as f:
+                f.write(b'%%EOF')
+            assert LRMParser(pdf_path, 'verilog', temp_db).find_unchanged_parse() is None
+
+        finally:
+            os.unlink(pdf_path)
+
     def test_file_hash_calculation(self):
         """Test file hash calculation"""
         # Create a temporary file with known content
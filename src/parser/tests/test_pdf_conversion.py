@@ -0,0 +1,102 @@
+"""
+Unit tests for page-range conversion and merging
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pdf_conversion import MergedDocument, page_ranges, shift_pages
+from parse_lrm import LRMParser
+
+
+def item(label, text, page, ref):
+    return SimpleNamespace(label=label, text=text, prov=[SimpleNamespace(page_no=page)], self_ref=ref)
+
+
+def part(texts, pages):
+    """A converted page range: texts, no tables, one page entry per page"""
+    return SimpleNamespace(
+        texts=texts,
+        tables=[],
+        pages={page: SimpleNamespace(page_no=page) for page in pages},
+        export_to_markdown=lambda: '\n\n'.join(t.text for t in texts)
+    )
+
+
+class TestPageRanges:
+    """Test suite for page_ranges"""
+
+    @pytest.mark.parametrize('page_count, chunks', [(10, 3), (1300, 8), (5, 5), (2, 5), (7, 1)])
+    def test_ranges_cover_every_page_once(self, page_count, chunks):
+        """Ranges are contiguous, ascending and never more than requested"""
+        ranges = page_ranges(page_count, chunks)
+        pages = [page for start, end in ranges for page in range(start, end + 1)]
+
+        assert pages == list(range(1, page_count + 1))
+        assert len(ranges) <= chunks
+
+    def test_no_pages(self):
+        assert page_ranges(0, 4) == []
+
+
+class TestShiftPages:
+    """Test suite for shift_pages"""
+
+    def test_renumbers_ranges_counted_from_one(self):
+        """Pages numbered from 1 within a range are moved to the range's place in the PDF"""
+        doc = part([item('text', 'a', 1, '#/texts/0'), item('text', 'b', 2, '#/texts/1')], [1, 2])
+        shift_pages(doc, 41)
+
+        assert [t.prov[0].page_no for t in doc.texts] == [41, 42]
+        assert sorted(doc.pages) == [41, 42]
+        assert doc.pages[42].page_no == 42
+
+    def test_keeps_original_page_numbers(self):
+        """Pages already numbered as in the PDF are left alone"""
+        doc = part([item('text', 'a', 41, '#/texts/0')], [41])
+        shift_pages(doc, 41)
+
+        assert doc.texts[0].prov[0].page_no == 41
+        assert list(doc.pages) == [41]
+
+
+class TestMergedDocument:
+    """Test suite for MergedDocument"""
+
+    @pytest.fixture
+    def merged(self):
+        """Section 2 starts in the first range and continues into the second; refs restart per range"""
+        first = part([
+            item('section_header', '1 Overview', 1, '#/texts/0'),
+            item('text', 'Intro', 1, '#/texts/1'),
+            item('section_header', '2 Modules', 2, '#/texts/2'),
+            item('code', 'module m; endmodule', 2, '#/texts/3'),
+        ], [1, 2])
+        second = part([
+            item('text', 'More about modules', 3, '#/texts/0'),
+            item('code', 'module n; endmodule', 3, '#/texts/1'),
+            item('section_header', '3 Ports', 4, '#/texts/2'),
+        ], [3, 4])
+        return MergedDocument([first, second], [(1, 2), (3, 4)])
+
+    def test_items_in_page_order(self, merged):
+        assert [t.prov[0].page_no for t in merged.texts] == [1, 1, 2, 2, 3, 3, 4]
+        assert merged.export_to_markdown().startswith('1 Overview\n\nIntro')
+
+    def test_section_spans_ranges(self, merged):
+        """Extraction over merged ranges sees one section 2 holding both code examples"""
+        parser = LRMParser.__new__(LRMParser)
+        parser.stats = {'sections': 0, 'code_examples': 0, 'tables': 0, 'page_accuracy': 0.0,
+                        'code_attribution': {}}
+
+        sections = parser.extract_sections(merged)
+        modules = next(s for s in sections if s['section_number'] == '2')
+        assert (modules['page_start'], modules['page_end']) == (2, 3)
+
+        code_by_section = parser.extract_code_examples(merged, sections)
+        assert [c['code'] for c in code_by_section['2']] == ['module m; endmodule', 'module n; endmodule']
+        assert '3' not in code_by_section
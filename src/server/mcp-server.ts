@@ -62,8 +62,9 @@ export class HDLMCPServer {
                 // Ensure args exists
                 const toolArgs = args || {};
 
-                // Validate language if present
-                if ('language' in toolArgs && !SUPPORTED_LANGUAGES.includes(toolArgs.language as string)) {
+                // Validate language if present ("all" is only meaningful for search_lrm)
+                const allLanguages = name === 'search_lrm' && toolArgs.language === 'all';
+                if ('language' in toolArgs && !allLanguages && !SUPPORTED_LANGUAGES.includes(toolArgs.language as string)) {
                     throw new Error(
                         `Unsupported language: ${toolArgs.language}. Supported: ${SUPPORTED_LANGUAGES.join(', ')}`
                     );
@@ -22,8 +22,30 @@ export function getToolDefinitions(): Tool[] {
                     },
                     language: {
                         type: 'string',
-                        enum: SUPPORTED_LANGUAGES,
-                        description: 'HDL language: verilog, systemverilog, or vhdl',
+                        enum: [...SUPPORTED_LANGUAGES, 'all'],
+                        description: 'HDL language: verilog, systemverilog, or vhdl; "all" searches every language at once and returns one merged ranking',
+                    },
+                    search_mode: {
+                        type: 'string',
+                        enum: ['semantic', 'hybrid', 'prefilter'],
+                        description: 'Ranking: "semantic" (default) uses embeddings only; "hybrid" fuses full-text (BM25) and embedding rankings - best for exact identifiers like $fwrite or std_logic_vector; "prefilter" ranks only sections containing the query terms by embedding similarity',
+                        default: 'semantic',
+                    },
+                    within_section: {
+                        type: 'string',
+                        description: 'Only search this section and its subsections (e.g., "9" for all of clause 9)',
+                    },
+                    max_depth: {
+                        type: 'number',
+                        description: 'Only search sections up to this depth (0 = top-level clauses, 1 = "9.2", ...)',
+                    },
+                    page_from: {
+                        type: 'number',
+                        description: 'Only search sections ending on or after this page',
+                    },
+                    page_to: {
+                        type: 'number',
+                        description: 'Only search sections starting on or before this page',
                     },
                     detail_level: {
                         type: 'string',
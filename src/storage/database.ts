@@ -68,6 +68,7 @@ export interface CodeSearchResult {
     section_title: string;
     page_start: number;
     page_end: number;
+    similarity?: number;  // Present when results come from vector search
 }
 
 export interface SemanticSearchResult {
@@ -76,6 +77,15 @@ export interface SemanticSearchResult {
     content: string;
     page_start: number;
     similarity: number;
+    language?: string;
+}
+
+export interface SectionFilters {
+    section?: string;
+    min_depth?: number;
+    max_depth?: number;
+    page_from?: number;
+    page_to?: number;
 }
 
 // =============================================================================
@@ -308,14 +318,27 @@ export class HDLDatabase {
 
     /**
      * Search code examples
+     * Uses vector search when the embedding server is ready and code embeddings
+     * exist for the language; otherwise (or if the server call fails) falls back
+     * to a substring scan
      */
     async searchCode(
         query: string,
         language: string,
-        maxResults: number = 10
+        maxResults: number = 10,
+        model: string = 'Qwen/Qwen3-Embedding-0.6B'
     ): Promise<CodeSearchResult[]> {
         this.ensureConnected();
 
+        if (this.embeddingServerReady && await this.hasEmbeddings('code_embeddings', language, model)) {
+            try {
+                return await this.semanticSearchCode(query, language, maxResults);
+            } catch (err) {
+                console.error('[EmbeddingServer] Code search failed, falling back to substring search:',
+                    err instanceof Error ? err.message : err);
+            }
+        }
+
         const sql = `
             SELECT
                 ce.code,
@@ -335,6 +358,35 @@ export class HDLDatabase {
         return this.all(sql, [language, searchPattern, searchPattern, maxResults]);
     }
 
+    /**
+     * Semantic code search: top-k over code example embeddings in the embedding server
+     * Note: Requires code embeddings generated with generate_embeddings.py
+     */
+    async semanticSearchCode(
+        query: string,
+        language: string,
+        maxResults: number = 10
+    ): Promise<CodeSearchResult[]> {
+        const result = await this.callEmbeddingServer<{ error?: string; results?: CodeSearchResult[] }>(
+            '/search_code',
+            { query, language, max_results: maxResults }
+        );
+
+        if (!result.results) {
+            throw new Error('Embedding server returned invalid response: missing results');
+        }
+
+        return result.results.map(row => ({
+            code: row.code,
+            description: row.description,
+            section_number: row.section_number,
+            section_title: row.section_title,
+            page_start: row.page_start,
+            page_end: row.page_end,
+            similarity: row.similarity
+        }));
+    }
+
     /**
      * Get code examples for a section
      */
@@ -388,6 +440,102 @@ export class HDLDatabase {
         return this.semanticSearch(queryEmbedding, language, maxResults, model);
     }
 
+    /**
+     * Semantic search across all languages in the embedding server
+     * One query encode and one matrix product over every language; results are a merged ranking
+     * Note: Requires the embedding server to be started with the database (--db)
+     */
+    async semanticSearchAllLanguages(
+        queryText: string,
+        maxResults: number = 5
+    ): Promise<SemanticSearchResult[]> {
+        const result = await this.callEmbeddingServer<{ error?: string; results?: SemanticSearchResult[] }>(
+            '/search_sections',
+            { query: queryText, language: 'all', max_results: maxResults }
+        );
+
+        if (!result.results) {
+            throw new Error('Embedding server returned invalid response: missing results');
+        }
+
+        return result.results.map(row => ({
+            section_number: row.section_number,
+            title: row.title,
+            content: row.content,
+            page_start: row.page_start,
+            similarity: row.similarity,
+            language: row.language
+        }));
+    }
+
+    /**
+     * Semantic search restricted by section filters (subtree, depth, page range) in the embedding server
+     * Filters are applied before scoring, so only matching sections are scanned
+     * Note: Requires the embedding server to be started with the database (--db)
+     */
+    async filteredSemanticSearch(
+        queryText: string,
+        language: string,
+        filters: SectionFilters,
+        maxResults: number = 5
+    ): Promise<SemanticSearchResult[]> {
+        const result = await this.callEmbeddingServer<{ error?: string; results?: SemanticSearchResult[] }>(
+            '/search_sections',
+            { query: queryText, language, max_results: maxResults, filters }
+        );
+
+        if (!result.results) {
+            throw new Error('Embedding server returned invalid response: missing results');
+        }
+
+        return result.results.map(row => ({
+            section_number: row.section_number,
+            title: row.title,
+            content: row.content,
+            page_start: row.page_start,
+            similarity: row.similarity,
+            language: row.language
+        }));
+    }
+
+    /**
+     * Hybrid search in the embedding server: FTS5 bm25() and vector rankings fused by reciprocal rank
+     * With prefilter, only the full-text hits are scored by the vector scan
+     * Note: Requires the embedding server to be started with the database (--db)
+     */
+    async hybridSearch(
+        queryText: string,
+        language: string,
+        maxResults: number = 5,
+        prefilter: boolean = false,
+        filters?: SectionFilters
+    ): Promise<{ results: SemanticSearchResult[]; timings: Record<string, number> }> {
+        const result = await this.callEmbeddingServer<{
+            error?: string;
+            results?: SemanticSearchResult[];
+            timing_ms?: Record<string, number>;
+        }>(
+            '/search_sections',
+            { query: queryText, language, max_results: maxResults, mode: prefilter ? 'prefilter' : 'hybrid', filters }
+        );
+
+        if (!result.results) {
+            throw new Error('Embedding server returned invalid response: missing results');
+        }
+
+        return {
+            results: result.results.map(row => ({
+                section_number: row.section_number,
+                title: row.title,
+                content: row.content,
+                page_start: row.page_start,
+                similarity: row.similarity ?? 0,
+                language: row.language
+            })),
+            timings: result.timing_ms ?? {}
+        };
+    }
+
     /**
      * Semantic search using pre-computed embedding
      * Note: Requires embeddings to be generated first with generate_embeddings.py
@@ -407,7 +555,7 @@ export class HDLDatabase {
                 s.title,
                 s.content,
                 s.page_start,
-                e.embedding_json
+                e.*
             FROM section_embeddings e
             JOIN sections s ON e.section_id = s.id
             WHERE s.language = ? AND e.embedding_model = ?
@@ -417,7 +565,7 @@ export class HDLDatabase {
 
         // Compute cosine similarity for each section
         const results = rows.map(row => {
-            const embedding = JSON.parse(row.embedding_json);
+            const embedding = this.decodeEmbedding(row);
             const similarity = this.cosineSimilarity(queryEmbedding, embedding);
 
             return {
@@ -495,7 +643,8 @@ export class HDLDatabase {
             serverPath,
             '--port', this.embeddingServerPort.toString(),
             '--host', '127.0.0.1',
-            '--model', 'Qwen/Qwen3-Embedding-0.6B'
+            '--model', 'Qwen/Qwen3-Embedding-0.6B',
+            '--db', this.dbPath
         ]);
 
         // Handle server output
@@ -572,11 +721,26 @@ export class HDLDatabase {
         return join(__dirname, '..', '..', '.venv', pythonBin);
     }
 
-    private async encodeQueryText(
-        query: string,
-        model: string = 'Qwen/Qwen3-Embedding-0.6B'
-    ): Promise<number[]> {
-        // Fail fast if embedding server is not ready
+    /**
+     * Check whether an embedding table has vectors for a language and model
+     * Returns false if the table does not exist (database built with an older schema)
+     */
+    private async hasEmbeddings(table: string, language: string, model: string): Promise<boolean> {
+        try {
+            const row = await this.get(
+                `SELECT EXISTS(SELECT 1 FROM ${table} WHERE language = ? AND embedding_model = ?) AS present`,
+                [language, model]
+            );
+            return !!row?.present;
+        } catch {
+            return false;
+        }
+    }
+
+    /**
+     * POST a JSON request to the embedding server (fail fast if it is not running)
+     */
+    private async callEmbeddingServer<T extends { error?: string }>(endpoint: string, body: object): Promise<T> {
         if (!this.embeddingServerReady) {
             throw new Error(
                 'Embedding server is not running. Semantic search requires the embedding server to be started. ' +
@@ -584,25 +748,37 @@ export class HDLDatabase {
             );
         }
 
-        // Call embedding server via HTTP (no fallback - fail fast)
-        const response = await fetch(`http://127.0.0.1:${this.embeddingServerPort}/encode`, {
+        const response = await fetch(`http://127.0.0.1:${this.embeddingServerPort}${endpoint}`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ query }),
+            body: JSON.stringify(body),
         });
 
         if (!response.ok) {
             throw new Error(`Embedding server returned error: HTTP ${response.status}`);
         }
 
-        const result = await response.json() as { error?: string; embedding?: number[] };
+        const result = await response.json() as T;
 
         if (result.error) {
             throw new Error(`Embedding server error: ${result.error}`);
         }
 
+        return result;
+    }
+
+    private async encodeQueryText(
+        query: string,
+        model: string = 'Qwen/Qwen3-Embedding-0.6B'
+    ): Promise<number[]> {
+        // Call embedding server via HTTP (no fallback - fail fast)
+        const result = await this.callEmbeddingServer<{ error?: string; embedding?: number[] }>(
+            '/encode',
+            { query }
+        );
+
         if (!result.embedding) {
             throw new Error('Embedding server returned invalid response: missing embedding');
         }
@@ -610,7 +786,57 @@ export class HDLDatabase {
         return result.embedding;
     }
 
-    private cosineSimilarity(a: number[], b: number[]): number {
+    /**
+     * Decode a stored embedding: the binary embedding_blob column (8-byte
+     * magic/version/dtype/dimension header + little-endian vector, see
+     * embedding_codec.py) or, for rows not yet migrated, embedding_json
+     */
+    private decodeEmbedding(row: { embedding_blob?: Buffer | null; embedding_json?: string | null }): ArrayLike<number> {
+        const blob = row.embedding_blob;
+        if (!blob) {
+            return JSON.parse(row.embedding_json as string);
+        }
+
+        if (blob.length < 8 || blob[0] !== 0x45 || blob[1] !== 0x56 || blob[2] !== 1) {
+            throw new Error('Unrecognized embedding blob header');
+        }
+
+        const dtype = blob[3];
+        const dimension = blob.readUInt32LE(4);
+
+        if (dtype === 1) {
+            // float32: copy into an aligned buffer (Buffer slices may start at any offset)
+            const bytes = new Uint8Array(blob.subarray(8, 8 + dimension * 4));
+            return new Float32Array(bytes.buffer);
+        }
+
+        if (dtype === 2) {
+            // float16: widen to float32
+            const values = new Float32Array(dimension);
+            for (let i = 0; i < dimension; i++) {
+                values[i] = this.halfToFloat(blob.readUInt16LE(8 + i * 2));
+            }
+            return values;
+        }
+
+        throw new Error(`Unsupported embedding dtype code: ${dtype}`);
+    }
+
+    private halfToFloat(half: number): number {
+        const sign = half & 0x8000 ? -1 : 1;
+        const exponent = (half >> 10) & 0x1f;
+        const fraction = half & 0x03ff;
+
+        if (exponent === 0) {
+            return sign * Math.pow(2, -14) * (fraction / 1024);
+        }
+        if (exponent === 0x1f) {
+            return fraction ? NaN : sign * Infinity;
+        }
+        return sign * Math.pow(2, exponent - 15) * (1 + fraction / 1024);
+    }
+
+    private cosineSimilarity(a: ArrayLike<number>, b: ArrayLike<number>): number {
         if (a.length !== b.length) {
             throw new Error('Vectors must have the same length');
         }
@@ -54,7 +54,8 @@ CREATE TABLE IF NOT EXISTS parse_metadata (
     section_count INTEGER,
     code_count INTEGER,
     table_count INTEGER,
-    parse_duration_sec REAL
+    parse_duration_sec REAL,
+    parse_signature TEXT                 -- Hash of parser code, Docling version and pipeline options
 );
 
 -- section_embeddings: Semantic search embeddings for sections
@@ -63,12 +64,50 @@ CREATE TABLE IF NOT EXISTS section_embeddings (
     section_id INTEGER NOT NULL,
     language TEXT NOT NULL,
     embedding_model TEXT NOT NULL,       -- e.g., 'all-mpnet-base-v2'
-    embedding_json TEXT NOT NULL,        -- JSON array of floats (768-dim for mpnet)
+    embedding_json TEXT,                 -- Legacy JSON array of floats (transition period)
+    embedding_blob BLOB,                 -- 8-byte dtype/dimension header + raw vector (embedding_codec.py)
     created_at INTEGER NOT NULL,         -- Unix timestamp
+    CHECK (embedding_blob IS NOT NULL OR embedding_json IS NOT NULL),
     FOREIGN KEY (section_id) REFERENCES sections(id) ON DELETE CASCADE,
     UNIQUE(section_id, embedding_model)
 );
 
+-- code_embeddings: Semantic search embeddings for code examples
+CREATE TABLE IF NOT EXISTS code_embeddings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code_id INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    embedding_model TEXT NOT NULL,
+    embedding_json TEXT,                 -- Legacy JSON array of floats (transition period)
+    embedding_blob BLOB,                 -- 8-byte dtype/dimension header + raw vector
+    created_at INTEGER NOT NULL,         -- Unix timestamp
+    CHECK (embedding_blob IS NOT NULL OR embedding_json IS NOT NULL),
+    FOREIGN KEY (code_id) REFERENCES code_examples(id) ON DELETE CASCADE,
+    UNIQUE(code_id, embedding_model)
+);
+
+-- table_embeddings: Semantic search embeddings for tables
+CREATE TABLE IF NOT EXISTS table_embeddings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_id INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    embedding_model TEXT NOT NULL,
+    embedding_json TEXT,                 -- Legacy JSON array of floats (transition period)
+    embedding_blob BLOB,                 -- 8-byte dtype/dimension header + raw vector
+    created_at INTEGER NOT NULL,         -- Unix timestamp
+    CHECK (embedding_blob IS NOT NULL OR embedding_json IS NOT NULL),
+    FOREIGN KEY (table_id) REFERENCES tables(id) ON DELETE CASCADE,
+    UNIQUE(table_id, embedding_model)
+);
+
+-- index_generation: Increases whenever parsed content or embeddings change
+-- (bumped by parse_lrm.py and the embedding tools; read by the embedding server)
+CREATE TABLE IF NOT EXISTS index_generation (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL          -- Unix timestamp
+);
+
 -- =============================================================================
 -- Full-Text Search (FTS5)
 -- =============================================================================
@@ -121,6 +160,8 @@ CREATE INDEX IF NOT EXISTS idx_parse_language ON parse_metadata(language);
 CREATE INDEX IF NOT EXISTS idx_embeddings_section ON section_embeddings(section_id);
 CREATE INDEX IF NOT EXISTS idx_embeddings_language ON section_embeddings(language);
 CREATE INDEX IF NOT EXISTS idx_embeddings_model ON section_embeddings(embedding_model);
+CREATE INDEX IF NOT EXISTS idx_code_embeddings_lang_model ON code_embeddings(language, embedding_model);
+CREATE INDEX IF NOT EXISTS idx_table_embeddings_lang_model ON table_embeddings(language, embedding_model);
 
 -- =============================================================================
 -- Schema Version
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Athens HDL MCP - Embedding Tables
+The embedding table and foreign-key column for each kind of embedded item,
+shared by the embedding tools, the vector store and the index manifest.
+"""
+
+
+# Embedding table and foreign-key column for each kind of embedded item
+EMBEDDING_TABLES = {
+    'sections': ('section_embeddings', 'section_id'),
+    'code': ('code_embeddings', 'code_id'),
+    'tables': ('table_embeddings', 'table_id'),
+}
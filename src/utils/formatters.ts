@@ -13,6 +13,7 @@ export interface ResponseMetadata {
     execution_time_ms?: number;
     total_matches?: number;
     returned?: number;
+    stage_timings_ms?: Record<string, number>;
 }
 
 export interface SearchResult {
@@ -20,6 +21,7 @@ export interface SearchResult {
     title: string;
     page: number;
     similarity: number;
+    language?: string;
     content?: string;
     depth?: number;
 }
@@ -4,6 +4,7 @@ Athens HDL MCP - GPU Utilities
 Provides GPU detection, optimization, and configuration utilities for AMD/NVIDIA GPUs
 """
 
+import contextlib
 import sys
 from typing import Dict, Optional, Tuple
 
@@ -97,15 +98,34 @@ def get_gpu_memory_info() -> Tuple[float, float]:
     return (reserved, total)
 
 
-def get_optimal_dtype(device: str) -> torch.dtype:
+def cpu_supports_bf16() -> bool:
+    """
+    Check whether the CPU has native bfloat16 instructions
+
+    Returns:
+        True if the CPU advertises AVX512-BF16 or AMX-BF16, False otherwise
+    """
+    try:
+        with open('/proc/cpuinfo') as f:
+            cpuinfo = f.read()
+    except OSError:
+        # Not Linux (or cpuinfo unreadable) - assume no native bf16
+        return False
+
+    return 'avx512_bf16' in cpuinfo or 'amx_bf16' in cpuinfo
+
+
+def get_optimal_dtype(device: str, cpu_bf16: bool = False) -> torch.dtype:
     """
     Get optimal dtype for device
 
     Args:
         device: 'cuda' or 'cpu'
+        cpu_bf16: Opt in to bfloat16 autocast on CPUs with native bf16 instructions
 
     Returns:
         torch.bfloat16 for GPU (RDNA 3+), torch.float32 for CPU
+        (torch.bfloat16 for CPU when cpu_bf16 is set and supported)
     """
     if device == 'cuda':
         # Check if bfloat16 is supported
@@ -117,9 +137,50 @@ def get_optimal_dtype(device: str) -> torch.dtype:
             # Fallback to float16 if bfloat16 not supported
             return torch.float16
     else:
+        if cpu_bf16:
+            if cpu_supports_bf16():
+                return torch.bfloat16
+            print("[CPU] bfloat16 requested but CPU lacks native bf16 instructions, using float32",
+                  file=sys.stderr)
         return torch.float32
 
 
+def get_model_kwargs(device: str, dtype: torch.dtype) -> Dict[str, any]:
+    """
+    Get SentenceTransformer model_kwargs that apply the chosen precision at load time
+
+    Args:
+        device: 'cuda' or 'cpu'
+        dtype: Precision from get_optimal_dtype()
+
+    Returns:
+        Dictionary to pass as SentenceTransformer(model_kwargs=...)
+    """
+    if device == 'cpu':
+        # CPU bfloat16 runs under autocast (see autocast_context), so weights stay float32
+        return {'torch_dtype': torch.float32}
+
+    return {'torch_dtype': dtype}
+
+
+def autocast_context(device: str, dtype: torch.dtype):
+    """
+    Get the context manager to run inference under for a device/dtype
+
+    Args:
+        device: 'cuda' or 'cpu'
+        dtype: Precision from get_optimal_dtype()
+
+    Returns:
+        torch.autocast for CPU bfloat16, a no-op context otherwise
+        (GPU precision is applied to the weights at load time)
+    """
+    if device == 'cpu' and dtype == torch.bfloat16:
+        return torch.autocast(device_type='cpu', dtype=torch.bfloat16)
+
+    return contextlib.nullcontext()
+
+
 def get_optimal_batch_size(base_size: int, device: str) -> int:
     """
     Get optimal batch size based on device
@@ -161,6 +222,7 @@ def print_device_info():
     else:
         print(f"  Device: CPU", file=sys.stderr)
         print(f"  Precision: {torch.float32}", file=sys.stderr)
+        print(f"  Native bf16: {'yes' if cpu_supports_bf16() else 'no'}", file=sys.stderr)
 
     print("=" * 70, file=sys.stderr)
 
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Athens HDL MCP - Index Generation Counter
+A single counter in the database that increases whenever parsed content or
+embeddings change, so long-running readers (the embedding server's vector
+store and result cache) can tell that what they loaded is out of date.
+"""
+
+import sqlite3
+import time
+
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS index_generation (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL
+    )
+"""
+
+
+def bump_generation(conn: sqlite3.Connection) -> int:
+    """
+    Increase the generation counter (creating it for databases that predate it).
+
+    Runs in the caller's transaction; it takes effect when the caller commits.
+
+    Returns:
+        The new generation
+    """
+    conn.execute(CREATE_TABLE_SQL)
+    conn.execute("""
+        INSERT INTO index_generation (id, generation, updated_at) VALUES (1, 1, ?)
+        ON CONFLICT(id) DO UPDATE SET generation = generation + 1, updated_at = excluded.updated_at
+    """, (int(time.time()),))
+    return conn.execute("SELECT generation FROM index_generation WHERE id = 1").fetchone()[0]
+
+
+def read_generation(conn: sqlite3.Connection) -> int:
+    """Current generation (0 if the database has never been bumped)"""
+    try:
+        row = conn.execute("SELECT generation FROM index_generation WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Athens HDL MCP - Index Manifest
+A JSON file next to the database describing what it currently holds: parsed
+content and embedding counts and checksums per language, embedding dimension
+per model, and the index generation (see index_generation.py).
+
+Every tool that changes the database (or its embedding exports) rewrites the
+manifest after committing. The embedding server watches it (see
+embeddings/index_reloader.py) and loads a new index in the background when it
+changes, instead of serving stale data or needing a restart.
+
+    data/hdl-lrm.db  ->  data/hdl-lrm.manifest.json
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from utils.embedding_tables import EMBEDDING_TABLES
+from utils.index_generation import read_generation
+
+
+MANIFEST_SUFFIX = '.manifest.json'
+
+# Parsed content hashed per language: table -> columns that define the content
+CONTENT_TABLES = {
+    'sections': 'id, section_number, title, content, page_start, page_end',
+    'code_examples': 'id, section_id, code',
+    'tables': 'id, section_id, content_json',
+}
+
+# Dimension field of the embedding_blob header (see embeddings/embedding_codec.py)
+BLOB_DIMENSION = struct.Struct('<I')
+BLOB_DIMENSION_OFFSET = 4
+
+
+def manifest_path(db_path) -> Path:
+    """Manifest file of a database"""
+    db_path = Path(db_path)
+    return db_path.with_name(db_path.stem + MANIFEST_SUFFIX)
+
+
+def read_index_manifest(db_path) -> Optional[dict]:
+    """Load a database's manifest, or None if there is none (or it is unreadable)"""
+    try:
+        return json.loads(manifest_path(db_path).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _hash_rows(rows: Iterable[tuple]) -> Tuple[int, str]:
+    """Row count and SHA-256 over rows (bytes hashed raw, other values as text)"""
+    hasher = hashlib.sha256()
+    count = 0
+    for row in rows:
+        for value in row:
+            hasher.update(value if isinstance(value, bytes) else str(value).encode('utf-8'))
+            hasher.update(b'\x1f')
+        hasher.update(b'\x1e')
+        count += 1
+    return count, hasher.hexdigest()
+
+
+def _embedding_dimension(blob: Optional[bytes], json_text: Optional[str]) -> int:
+    """Dimension of one stored embedding"""
+    if blob is not None:
+        return BLOB_DIMENSION.unpack_from(blob, BLOB_DIMENSION_OFFSET)[0]
+    return len(json.loads(json_text))
+
+
+def build_manifest(conn: sqlite3.Connection) -> dict:
+    """
+    Describe the database's current content and embeddings.
+
+    Returns:
+        Dict with 'generation', 'content' ({table: {language: {count, checksum}}})
+        and 'embeddings' ({model: {dimension, sets: {"kind/language": {count,
+        max_row_id, checksum}}}})
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    content = {}
+    for table, columns in CONTENT_TABLES.items():
+        if table not in existing:
+            continue
+        content[table] = {}
+        languages = [row[0] for row in conn.execute(f"SELECT DISTINCT language FROM {table} ORDER BY language")]
+        for language in languages:
+            count, checksum = _hash_rows(conn.execute(
+                f"SELECT {columns} FROM {table} WHERE language = ? ORDER BY id", (language,)))
+            content[table][language] = {'count': count, 'checksum': checksum}
+
+    embeddings = {}
+    for kind, (table, fk) in EMBEDDING_TABLES.items():
+        if table not in existing:
+            continue
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        blob_column = 'embedding_blob' if 'embedding_blob' in columns else 'NULL'
+
+        sets = conn.execute(f"""
+            SELECT embedding_model, language, MAX(id)
+            FROM {table}
+            GROUP BY embedding_model, language
+            ORDER BY embedding_model, language
+        """).fetchall()
+        for model, language, max_id in sets:
+            first = conn.execute(f"""
+                SELECT {blob_column}, embedding_json FROM {table}
+                WHERE embedding_model = ? AND language = ? LIMIT 1
+            """, (model, language)).fetchone()
+            count, checksum = _hash_rows(conn.execute(f"""
+                SELECT {fk}, {blob_column}, embedding_json FROM {table}
+                WHERE embedding_model = ? AND language = ?
+                ORDER BY {fk}
+            """, (model, language)))
+
+            entry = embeddings.setdefault(model, {'dimension': _embedding_dimension(*first), 'sets': {}})
+            entry['sets'][f"{kind}/{language}"] = {
+                'count': count,
+                'max_row_id': max_id,
+                'checksum': checksum
+            }
+
+    return {
+        'generation': read_generation(conn),
+        'content': content,
+        'embeddings': embeddings
+    }
+
+
+def write_index_manifest(conn: sqlite3.Connection, db_path, tool: str) -> dict:
+    """
+    Rewrite a database's manifest (call after committing the tool's changes).
+
+    The file is replaced atomically, so watchers never read a partial manifest.
+
+    Args:
+        conn: Connection to the database
+        db_path: Path to the database
+        tool: Name of the tool writing the manifest
+
+    Returns:
+        The manifest
+    """
+    manifest = build_manifest(conn)
+    manifest.update(written_by=tool, written_at=time.time())
+
+    path = manifest_path(db_path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, path)
+    return manifest